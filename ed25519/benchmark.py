@@ -0,0 +1,121 @@
+"""
+ed25519 微基准测试。
+
+用法:
+    python -m ed25519.benchmark
+
+编解码部分对比原先基于位列表的实现与当前按字节实现的单次调用耗时，
+模幂部分对比原先的递归快速幂、费马求逆与当前的迭代滑动窗口实现，
+并确认两者输出一致。
+"""
+import os
+import timeit
+
+from ed25519 import ed255191 as ed
+
+b = ed.b
+
+# ---------------------- 位列表参考实现（旧版） ----------------------
+
+def ref_encodeint(y):
+    bits = [(y >> i) & 1 for i in range(b)]
+    return bytes([sum([bits[i * 8 + j] << j for j in range(8)]) for i in range(b // 8)])
+
+def ref_encodepoint(P):
+    x, y = ed.toaffine(P)
+    bits = [(y >> i) & 1 for i in range(b - 1)] + [x & 1]
+    return bytes([sum([bits[i * 8 + j] << j for j in range(8)]) for i in range(b // 8)])
+
+def ref_decodeint(s):
+    return sum(2 ** i * ed.bit(s, i) for i in range(0, b))
+
+def ref_decodepoint(s):
+    y = sum(2 ** i * ed.bit(s, i) for i in range(0, b - 1))
+    x = ed.xrecover(y)
+    if x & 1 != ed.bit(s, b - 1):
+        x = ed.q - x
+    P = ed.toextended((x, y))
+    if not ed.isoncurve(P):
+        raise Exception("decoding point that is not on curve")
+    return P
+
+def ref_Hint(m):
+    h = ed.H(m)
+    return sum(2 ** i * ed.bit(h, i) for i in range(2 * b))
+
+def ref_expmod(b, e, m):
+    if e == 0:
+        return 1
+    t = ref_expmod(b, e // 2, m) ** 2 % m
+    if e & 1:
+        t = (t * b) % m
+    return t
+
+def ref_inv(x):
+    return ref_expmod(x, ed.q - 2, ed.q)
+
+def ref_xrecover(y):
+    xx = (y * y - 1) * ref_inv(ed.d * y * y + 1)
+    x = ref_expmod(xx, (ed.q + 3) // 8, ed.q)
+    if (x * x - xx) % ed.q != 0:
+        x = (x * ed.I) % ed.q
+    if x % 2 != 0:
+        x = ed.q - x
+    return x
+
+# ---------------------- 计时工具 ----------------------
+
+def per_call(func, *args, number=200):
+    """
+    返回 func(*args) 的单次调用耗时（微秒），取 3 轮中的最小值。
+    """
+    return min(timeit.repeat(lambda: func(*args), number=number, repeat=3)) / number * 1e6
+
+def report(name, old, new):
+    print(f"{name:<14}{old:>12.2f}{new:>12.2f}{old / new:>9.1f}x")
+
+def bench_codec():
+    """
+    对比 encodeint / encodepoint / decodeint / decodepoint / Hint 的新旧实现。
+    """
+    P = ed.scalarmult_B(int.from_bytes(os.urandom(32), "little"))
+    Pz = ed.edwardsdouble(P)  # Z != 1，encodepoint 需要一次求逆
+    y = int.from_bytes(os.urandom(32), "little") % ed.l
+    s = ed.encodepoint(P)
+    m = os.urandom(96)
+
+    assert ref_encodeint(y) == ed.encodeint(y)
+    assert ref_encodepoint(Pz) == ed.encodepoint(Pz)
+    assert ref_decodeint(s) == ed.decodeint(s)
+    assert ed.pointequal(ref_decodepoint(s), ed.decodepoint(s))
+    assert ref_Hint(m) == ed.Hint(m)
+
+    print(f"{'function':<14}{'bits (us)':>12}{'bytes (us)':>12}{'speedup':>10}")
+    report("encodeint", per_call(ref_encodeint, y), per_call(ed.encodeint, y))
+    report("encodepoint", per_call(ref_encodepoint, Pz, number=50), per_call(ed.encodepoint, Pz, number=50))
+    report("decodeint", per_call(ref_decodeint, s), per_call(ed.decodeint, s))
+    report("decodepoint", per_call(ref_decodepoint, s, number=50), per_call(ed.decodepoint, s, number=50))
+    report("Hint", per_call(ref_Hint, m), per_call(ed.Hint, m))
+
+def bench_expmod():
+    """
+    对比 expmod / inv / xrecover 的递归实现与迭代实现。
+    """
+    x = int.from_bytes(os.urandom(32), "little") % ed.q
+    e = (ed.q + 3) // 8
+    y = ed.toaffine(ed.scalarmult_B(x))[1]
+
+    assert ref_expmod(x, e, ed.q) == ed.expmod(x, e, ed.q)
+    assert ref_inv(x) == ed.inv(x) == ed.binvert(x, ed.q)
+    assert ref_xrecover(y) == ed.xrecover(y)
+
+    print(f"{'function':<14}{'old (us)':>12}{'new (us)':>12}{'speedup':>10}")
+    report("expmod", per_call(ref_expmod, x, e, ed.q, number=50), per_call(ed.expmod, x, e, ed.q, number=50))
+    report("inv (native)", per_call(ref_inv, x, number=50), per_call(ed.inv, x, number=50))
+    report("inv (binary)", per_call(ref_inv, x, number=50), per_call(ed.binvert, x, ed.q, number=50))
+    report("xrecover", per_call(ref_xrecover, y, number=50), per_call(ed.xrecover, y, number=50))
+
+if __name__ == "__main__":
+    bench_codec()
+    print()
+    bench_expmod()
@@ -1,4 +1,9 @@
 import hashlib
+import secrets
+import sys
+import threading
+import time
+from collections import OrderedDict
 
 b = 256  # 位数
 q = 2**255 - 19  # 素数 q
@@ -20,7 +25,7 @@ def H(m):
 # 模幂运算，计算 (b^e) % m
 def expmod(b, e, m):
     """
-    计算 (b^e) % m 的值，使用递归的快速幂算法。
+    计算 (b^e) % m 的值，使用迭代的滑动窗口快速幂算法。
 
     参数:
     b (int): 底数
@@ -35,23 +40,77 @@ def expmod(b, e, m):
     24
 
     如果 e == 0，返回 1。
-    否则，递归地计算 expmod(b, e // 2, m) 的平方并取模 m。
-    如果 e 是奇数，再乘以 b 并取模 m。
+    否则，先预计算 b 的奇数次幂 b, b^3, ..., b^(2^w - 1)，
+    再从高位到低位扫描 e：遇到 0 位只做一次平方，
+    遇到 1 位则取出以 1 结尾、最长 w 位的窗口，平方窗口长度次后乘以对应的奇数次幂。
+    与递归写法相比没有函数调用开销，乘法次数约减少 (w - 1) / w。
     """
     if e == 0:
         return 1
-    t = expmod(b, e // 2, m) ** 2 % m  # 使用 `//` 确保 `e` 是整数
-    if e & 1:
-        t = (t * b) % m
+    nbits = e.bit_length()
+    w = 1 if nbits <= 16 else 4 if nbits <= 128 else 5  # 窗口宽度
+    b %= m
+    bb = b * b % m
+    odd = [b]  # odd[k] = b^(2k+1)
+    for _ in range(1, 1 << (w - 1)):
+        odd.append(odd[-1] * bb % m)
+    t = 1
+    i = nbits - 1
+    while i >= 0:
+        if not (e >> i) & 1:
+            t = t * t % m
+            i -= 1
+            continue
+        j = max(i - w + 1, 0)
+        while not (e >> j) & 1:  # 窗口以 1 结尾
+            j += 1
+        for _ in range(i - j + 1):
+            t = t * t % m
+        t = t * odd[((e >> j) & ((1 << (i - j + 1)) - 1)) >> 1] % m
+        i = j - 1
     return t
 
+# 二进制扩展欧几里得算法求模逆
+def binvert(x, m):
+    """
+    使用二进制扩展欧几里得算法计算 x 在模 m 下的逆元。
+
+    只使用移位和减法，适用于没有原生模逆的解释器。
+
+    参数:
+    x (int): 需要求逆的整数，与 m 互素。
+    m (int): 奇数模数。
+
+    返回:
+    int: x 在模 m 下的乘法逆元。
+    """
+    u, v = x % m, m
+    x1, x2 = 1, 0
+    while u != 1 and v != 1:
+        while not u & 1:
+            u >>= 1
+            x1 = x1 >> 1 if not x1 & 1 else (x1 + m) >> 1
+        while not v & 1:
+            v >>= 1
+            x2 = x2 >> 1 if not x2 & 1 else (x2 + m) >> 1
+        if u >= v:
+            u -= v
+            x1 -= x2
+        else:
+            v -= u
+            x2 -= x1
+    return (x1 if u == 1 else x2) % m
+
+NATIVE_MODINV = sys.version_info >= (3, 8)  # Python 3.8 起 pow(x, -1, m) 可直接求模逆
+
 # 计算 x 的逆元，满足 (x * inv(x)) % q == 1
 def inv(x):
     """
     计算给定数值 x 在模 q 下的乘法逆元。
 
-    这是通过使用费马小定理实现的，该定理指出，对于一个素数 q 和一个整数 x，
-    x^(q-1) ≡ 1 (mod q)。因此，x^(q-2) ≡ x^(-1) (mod q)。
+    Python 3.8 及以上使用解释器原生的 pow(x, -1, q)，
+    更早的版本回退到二进制扩展欧几里得算法 binvert。
+    与费马小定理 x^(q-2) 的写法保持一致，x ≡ 0 时返回 0。
 
     参数:
     x (int): 需要计算逆元的整数。
@@ -59,7 +118,12 @@ def inv(x):
     返回:
     int: x 在模 q 下的乘法逆元。
     """
-    return expmod(x, q - 2, q)
+    x %= q
+    if x == 0:
+        return 0
+    if NATIVE_MODINV:
+        return pow(x, -1, q)
+    return binvert(x, q)
 
 d = -121665 * inv(121666)  # 常数 d
 I = expmod(2, (q - 1) // 4, q)  # 常数 I
@@ -93,32 +157,145 @@ def xrecover(y):
 
 By = 4 * inv(5)  # 基点 B 的 y 坐标
 Bx = xrecover(By)  # 基点 B 的 x 坐标
-B = [Bx % q, By % q]  # 基点 B
+d2 = 2 * d % q  # 扩展坐标加法公式中使用的 2d
+
+# 仿射坐标 (x, y) 转换为扩展坐标 (X:Y:Z:T)
+def toextended(P):
+    """
+    将仿射坐标点 (x, y) 转换为扩展扭曲爱德华兹坐标 (X:Y:Z:T)。
+
+    扩展坐标满足 x = X/Z, y = Y/Z, x*y = T/Z，点运算全程无需求逆。
+
+    参数:
+    P (tuple): 仿射坐标点 (x, y)。
+
+    返回:
+    tuple: 扩展坐标点 (X, Y, Z, T)。
+    """
+    x, y = P
+    return (x % q, y % q, 1, x * y % q)
+
+# 扩展坐标转换为仿射坐标，只需一次求逆
+def toaffine(P):
+    """
+    将扩展坐标点 (X:Y:Z:T) 转换回仿射坐标 (x, y)。
+
+    这是整个点运算中唯一需要求逆的地方，仅在编码输出时调用。
+
+    参数:
+    P (tuple): 扩展坐标点 (X, Y, Z, T)。
+
+    返回:
+    tuple: 仿射坐标点 (x, y)。
+    """
+    X, Y, Z, T = P
+    if Z == 1:  # 解码得到的点已是仿射形式，省去求逆
+        return (X, Y)
+    zi = inv(Z)
+    return (X * zi % q, Y * zi % q)
+
+B = toextended((Bx, By))  # 基点 B（扩展坐标）
+ident = (0, 1, 1, 0)  # 单位元（中性点）
 
 # 爱德华兹曲线上的点加法
 def edwards(P, Q):
     """
-    计算爱德华曲线上的点加法。
+    计算爱德华曲线上的点加法（扩展坐标，add-2008-hwcd-3 公式）。
 
     参数:
-    P (tuple): 第一个点 (x1, y1)。
-    Q (tuple): 第二个点 (x2, y2)。
+    P (tuple): 第一个点 (X1, Y1, Z1, T1)。
+    Q (tuple): 第二个点 (X2, Y2, Z2, T2)。
 
     返回:
-    list: 结果点 (x3, y3)，其中 x3 和 y3 都是模 q 的结果。
-
-    公式:
+    tuple: 结果点 (X3, Y3, Z3, T3)，各分量均为模 q 的结果。
 
     注意:
-    - inv 表示求逆运算。
-    - d 是爱德华曲线的常数参数。
-    - q 是模数。
+    - 公式是完备的，P == Q 或任一点为单位元时同样适用。
+    - 不做任何求逆运算，需要仿射坐标时调用 toaffine。
+    """
+    X1, Y1, Z1, T1 = P
+    X2, Y2, Z2, T2 = Q
+    A = (Y1 - X1) * (Y2 - X2) % q
+    B_ = (Y1 + X1) * (Y2 + X2) % q
+    C = T1 * d2 * T2 % q
+    D = Z1 * 2 * Z2 % q
+    E = B_ - A
+    F = D - C
+    G = D + C
+    H_ = B_ + A
+    return (E * F % q, G * H_ % q, F * G % q, E * H_ % q)
+
+# 爱德华兹曲线上的倍点运算
+def edwardsdouble(P):
+    """
+    计算爱德华曲线上的倍点 2P（扩展坐标，dbl-2008-hwcd 公式）。
+
+    比通用加法少用一次乘法，且不需要 T 分量参与计算。
+
+    参数:
+    P (tuple): 点 (X1, Y1, Z1, T1)。
+
+    返回:
+    tuple: 结果点 (X3, Y3, Z3, T3)。
+    """
+    X1, Y1, Z1, _ = P
+    A = X1 * X1 % q
+    B_ = Y1 * Y1 % q
+    C = 2 * Z1 * Z1 % q
+    H_ = A + B_
+    E = H_ - (X1 + Y1) * (X1 + Y1)
+    G = A - B_
+    F = C + G
+    return (E * F % q, G * H_ % q, F * G % q, E * H_ % q)
+
+# 判断两个扩展坐标点是否相等
+def pointequal(P, Q):
+    """
+    在射影形式下比较两个点是否相等，无需求逆。
+
+    参数:
+    P (tuple): 第一个点 (X1, Y1, Z1, T1)。
+    Q (tuple): 第二个点 (X2, Y2, Z2, T2)。
+
+    返回:
+    bool: 两点相等返回 True，否则返回 False。
+    """
+    X1, Y1, Z1, _ = P
+    X2, Y2, Z2, _ = Q
+    return (X1 * Z2 - X2 * Z1) % q == 0 and (Y1 * Z2 - Y2 * Z1) % q == 0
+
+# 判断 8·P 是否为单位元
+def cofactorzero(P):
+    """
+    判断 8·P 是否为单位元，即 P 只含小阶（挠）分量。
+
+    checkvalid 与 checkvalid_batch 都检查带余因子的等式 8·(S·B - R - h·A) == 单位元：
+    R 或 A 中的小阶分量在两条路径中都被消去，批量验证的结果因此与逐个验证一致。
+
+    参数:
+    P (tuple): 扩展坐标点 (X, Y, Z, T)。
+
+    返回:
+    bool: 8·P 为单位元返回 True，否则返回 False。
+    """
+    for _ in range(3):
+        P = edwardsdouble(P)
+    X, Y, Z, _ = P
+    return X % q == 0 and (Y - Z) % q == 0
+
+# 点取负
+def edwardsneg(P):
+    """
+    计算点 P 的负元 -P。扭曲爱德华兹曲线上 -(x, y) = (-x, y)。
+
+    参数:
+    P (tuple): 扩展坐标点 (X, Y, Z, T)。
+
+    返回:
+    tuple: 扩展坐标点 (-X, Y, Z, -T)。
     """
-    x1, y1 = P
-    x2, y2 = Q
-    x3 = (x1 * y2 + x2 * y1) * inv(1 + d * x1 * x2 * y1 * y2)
-    y3 = (y1 * y2 + x1 * x2) * inv(1 - d * x1 * x2 * y1 * y2)
-    return [x3 % q, y3 % q]
+    X, Y, Z, T = P
+    return (-X % q, Y, Z, -T % q)
 
 # 标量乘法，计算 e * P
 def scalarmult(P, e):
@@ -126,23 +303,248 @@ def scalarmult(P, e):
     对给定的点 P 进行标量乘法运算，计算 e * P。
 
     参数:
-    P (list): 椭圆曲线上的一个点，表示为 [x, y]。
+    P (tuple): 椭圆曲线上的一个点，扩展坐标 (X, Y, Z, T)。
     e (int): 标量值。
 
     返回:
-    list: 结果点 Q，表示为 [x, y]。
+    tuple: 结果点 Q，扩展坐标 (X, Y, Z, T)。
 
     说明:
-    该函数使用二进制方法进行标量乘法运算。初始化结果点 Q 为无穷远点 [0, 1]。
-    在循环中，如果 e 的最低位为 1，则将当前点 P 累加到 Q 上。然后将 P 自加（倍点运算），
-    并将 e 右移一位（除以 2）。循环结束后返回结果点 Q。
+    该函数使用从高位到低位的二进制方法进行标量乘法运算。初始化结果点 Q 为单位元。
+    每处理一位先对 Q 倍点，若该位为 1 再累加 P。全程不做求逆。
+    """
+    Q = ident  # 初始化为单位元
+    for i in range(e.bit_length() - 1, -1, -1):
+        Q = edwardsdouble(Q)  # 倍点运算
+        if (e >> i) & 1:
+            Q = edwards(Q, P)  # 累加
+    return Q
+
+BASE_WINDOW = 4  # 基点预计算表的窗口宽度（位），可通过 configure_base_table 调整
+_base_table = None  # 基点预计算表，首次使用时构建
+
+# 设置基点预计算表的窗口宽度
+def configure_base_table(window):
+    """
+    设置基点 B 预计算表的窗口宽度，并丢弃已构建的表。
+
+    表中共有 ceil(253 / window) 行，每行 2**window 个点：
+    window=4 时约 1024 个点，window=8 时约 8192 个点。
+    内存受限的验证节点可以选择较小的窗口。
+
+    参数:
+    window (int): 窗口宽度，取值 1 到 8。
+
+    异常:
+    ValueError: 当窗口宽度超出范围时抛出。
+    """
+    global BASE_WINDOW, _base_table
+    if not 1 <= window <= 8:
+        raise ValueError("base table window must be between 1 and 8")
+    BASE_WINDOW = window
+    _base_table = None
+
+# 构建基点的预计算表
+def base_table():
+    """
+    返回基点 B 的固定基预计算表，首次调用时构建并缓存在模块中。
+
+    第 i 行第 j 列保存 j * 2**(window*i) * B，
+    这样任意标量乘法只需每行查表一次再做加法，无需倍点。
+
+    返回:
+    list: 预计算表，每行是一个点列表。
     """
-    Q = [0, 1]  # 初始化为无穷远点
+    global _base_table
+    if _base_table is None:
+        w = BASE_WINDOW
+        table = []
+        P = B
+        for _ in range((l.bit_length() + w - 1) // w):
+            row = [ident, P]
+            for _ in range(2, 1 << w):
+                row.append(edwards(row[-1], P))
+            table.append(row)
+            P = edwards(row[-1], P)  # 2**window * P
+        _base_table = table
+    return _base_table
+
+# 基点标量乘法，计算 e * B
+def scalarmult_B(e):
+    """
+    使用预计算表计算 e * B。
+
+    B 的阶为 l，因此先将 e 对 l 取模，结果与 scalarmult(B, e) 相同。
+
+    参数:
+    e (int): 标量值。
+
+    返回:
+    tuple: 结果点，扩展坐标 (X, Y, Z, T)。
+    """
+    table = base_table()
+    w = BASE_WINDOW
+    mask = (1 << w) - 1
+    e %= l
+    Q = ident
+    for row in table:
+        if e & mask:
+            Q = edwards(Q, row[e & mask])
+        e >>= w
+    return Q
+
+BASE_NAF_WINDOW = 8  # 双标量乘法中基点 B 的 wNAF 窗口宽度
+POINT_NAF_WINDOW = 5  # 双标量乘法中任意点的 wNAF 窗口宽度
+_base_odd_multiples = None  # B 的奇数倍表，首次使用时构建
+
+# 标量的 wNAF 表示
+def wnaf(e, w):
+    """
+    计算非负整数 e 的宽度为 w 的非相邻形式（wNAF）。
+
+    每个非零数字都是奇数且绝对值小于 2**(w-1)，任意连续 w 位中至多一个非零，
+    因此加法次数约为 bit_length / (w + 1)。
+
+    参数:
+    e (int): 非负整数标量。
+    w (int): 窗口宽度，至少为 2。
+
+    返回:
+    list: 从低位到高位排列的数字列表。
+    """
+    digits = []
+    full = 1 << w
+    half = 1 << (w - 1)
     while e > 0:
         if e & 1:
-            Q = edwards(Q, P)  # 累加
-        P = edwards(P, P)  # 自加（倍点运算）
-        e //= 2
+            digit = e & (full - 1)
+            if digit >= half:
+                digit -= full
+            e -= digit
+        else:
+            digit = 0
+        digits.append(digit)
+        e >>= 1
+    return digits
+
+# 点的奇数倍表
+def oddmultiples(P, w):
+    """
+    计算 wNAF 所需的奇数倍表 [P, 3P, 5P, ..., (2**(w-1) - 1)P]。
+
+    参数:
+    P (tuple): 扩展坐标点。
+    w (int): wNAF 窗口宽度。
+
+    返回:
+    list: 共 2**(w-2) 个点。
+    """
+    P2 = edwardsdouble(P)
+    table = [P]
+    for _ in range(1, 1 << (w - 2)):
+        table.append(edwards(table[-1], P2))
+    return table
+
+# 双标量乘法，计算 a * B + c * Q
+def doublescalarmult_B(a, c, Qtable, w=POINT_NAF_WINDOW):
+    """
+    使用 Straus（Shamir）交错方法计算 a * B + c * Q。
+
+    两个标量都重编码为 wNAF，在同一趟倍点循环中交替累加，
+    倍点次数只有 max(len(a), len(c)) 次，约为分别计算两次标量乘法的一半。
+
+    参数:
+    a (int): 基点 B 的标量，应已对 l 取模。
+    c (int): 点 Q 的标量。
+    Qtable (list): oddmultiples(Q, w) 的结果。
+    w (int): Qtable 对应的窗口宽度。
+
+    返回:
+    tuple: 结果点，扩展坐标 (X, Y, Z, T)。
+    """
+    global _base_odd_multiples
+    if _base_odd_multiples is None:
+        _base_odd_multiples = oddmultiples(B, BASE_NAF_WINDOW)
+    Btable = _base_odd_multiples
+    na = wnaf(a, BASE_NAF_WINDOW)
+    nc = wnaf(c, w)
+    n = max(len(na), len(nc))
+    na += [0] * (n - len(na))
+    nc += [0] * (n - len(nc))
+    Q = ident
+    started = False  # 累加之前对单位元倍点没有意义，直接跳过
+    for i in range(n - 1, -1, -1):
+        if started:
+            Q = edwardsdouble(Q)
+        digit = na[i]
+        if digit > 0:
+            Q = edwards(Q, Btable[digit >> 1])
+            started = True
+        elif digit < 0:
+            Q = edwards(Q, edwardsneg(Btable[-digit >> 1]))
+            started = True
+        digit = nc[i]
+        if digit > 0:
+            Q = edwards(Q, Qtable[digit >> 1])
+            started = True
+        elif digit < 0:
+            Q = edwards(Q, edwardsneg(Qtable[-digit >> 1]))
+            started = True
+    return Q
+
+# 预先构建所有基点预计算表
+def precompute():
+    """
+    立即构建基点 B 的固定基表和 wNAF 奇数倍表。
+
+    两张表本来会在首次使用时惰性构建；工作进程启动时调用本函数，
+    可以把构建开销移出第一批请求。
+    """
+    global _base_odd_multiples
+    base_table()
+    if _base_odd_multiples is None:
+        _base_odd_multiples = oddmultiples(B, BASE_NAF_WINDOW)
+
+# 多标量乘法，计算 sum(scalars[i] * points[i])
+def multiscalarmult(scalars, points):
+    """
+    使用 Pippenger 桶算法计算多标量乘法 sum(e_i * P_i)。
+
+    将标量按 c 位窗口切分，每个窗口内把点按窗口数字放入桶中累加，
+    再用前缀和一次性求出 sum(j * bucket_j)。点数为 n 时，
+    总代价约为 (n + 2**c) * 256 / c 次加法，远少于 n 次独立的标量乘法。
+
+    参数:
+    scalars (list): 非负整数标量列表。
+    points (list): 与标量一一对应的扩展坐标点列表。
+
+    返回:
+    tuple: 结果点，扩展坐标 (X, Y, Z, T)。
+    """
+    n = len(points)
+    if n == 0:
+        return ident
+    c = max(1, min(16, n.bit_length() - 1))  # 窗口宽度约为 log2(n)
+    mask = (1 << c) - 1
+    windows = (max(scalars).bit_length() + c - 1) // c
+    Q = ident
+    for win in range(windows - 1, -1, -1):
+        for _ in range(c):
+            Q = edwardsdouble(Q)
+        shift = win * c
+        buckets = [None] * (mask + 1)
+        for e, P in zip(scalars, points):
+            digit = (e >> shift) & mask
+            if digit:
+                bucket = buckets[digit]
+                buckets[digit] = P if bucket is None else edwards(bucket, P)
+        running = ident
+        acc = ident
+        for j in range(mask, 0, -1):
+            if buckets[j] is not None:
+                running = edwards(running, buckets[j])
+            acc = edwards(acc, running)
+        Q = edwards(Q, acc)
     return Q
 
 # 将整数编码为字节
@@ -156,8 +558,7 @@ def encodeint(y):
     返回:
     bytes: 编码后的字节序列。
     """
-    bits = [(y >> i) & 1 for i in range(b)]
-    return bytes([sum([bits[i * 8 + j] << j for j in range(8)]) for i in range(b//8)])
+    return (y & ((1 << b) - 1)).to_bytes(b // 8, "little")
 
 # 将点编码为字节
 def encodepoint(P):
@@ -165,18 +566,18 @@ def encodepoint(P):
     将给定的点P编码为字节序列。
 
     参数:
-    P (tuple): 一个包含两个整数 (x, y) 的元组，表示点的坐标。
+    P (tuple): 扩展坐标点 (X, Y, Z, T)。
 
     返回:
     bytes: 编码后的字节序列。
 
     说明:
-    该函数首先将y坐标的每一位提取出来，形成一个位列表，然后将x坐标的最低位添加到该列表的末尾。
-    最后，将这些位打包成字节序列并返回。
+    该函数先通过一次求逆将点转换为仿射坐标 (x, y)，
+    然后取 y 坐标的低 b-1 位，把 x 坐标的最低位放在最高位，
+    最后按小端序输出 b // 8 个字节。
     """
-    x, y = P
-    bits = [(y >> i) & 1 for i in range(b - 1)] + [x & 1]
-    return bytes([sum([bits[i * 8 + j] << j for j in range(8)]) for i in range(b // 8)])
+    x, y = toaffine(P)
+    return ((y & ((1 << (b - 1)) - 1)) | ((x & 1) << (b - 1))).to_bytes(b // 8, "little")
 
 # 获取哈希值的第 i 位
 def bit(h, i):
@@ -192,6 +593,81 @@ def bit(h, i):
     """
     return (h[i // 8] >> (i % 8)) & 1  # 修正 `ord()`
 
+_tracer = None  # 追踪回调，None 表示关闭；关闭时热路径只多一次全局变量判断
+_trace_counters = {}  # 各阶段累计计时 {阶段: [调用次数, 累计秒数]}
+
+# 设置追踪回调
+def set_tracer(tracer):
+    """
+    设置（或关闭）模块级追踪钩子。
+
+    开启后 publickey、signature 和 checkvalid 每次调用都会统计
+    hash / scalarmult / encode / decode 各阶段耗时，累加到 trace_counters，
+    并调用 tracer(event, fields)。fields 只包含公开数据（公钥、签名、验证结果），
+    不会把私钥或私钥标量交给回调。
+
+    参数:
+    tracer (callable | logging.Logger | None): 回调函数 tracer(event, fields)，
+        或者 Logger（以 DEBUG 级别输出），传入 None 关闭追踪。
+    """
+    global _tracer
+    if tracer is not None and not callable(tracer):
+        logger = tracer
+        tracer = lambda event, fields: logger.debug("%s %s", event, fields)
+    _tracer = tracer
+
+# 获取各阶段累计计时
+def trace_counters():
+    """
+    返回追踪开启期间各阶段的累计计时。
+
+    返回:
+    dict: {阶段: {"calls": 调用次数, "seconds": 累计秒数}}。
+    """
+    return {phase: {"calls": calls, "seconds": seconds}
+            for phase, (calls, seconds) in _trace_counters.items()}
+
+# 清空各阶段累计计时
+def reset_trace_counters():
+    """
+    清空 trace_counters 中的累计计时。
+    """
+    _trace_counters.clear()
+
+# 记录一次追踪事件
+def _emit(event, timings, fields):
+    """
+    将一次调用的阶段耗时累加到计数器，并交给追踪回调。
+
+    参数:
+    event (str): 事件名，例如 "publickey"。
+    timings (dict): {阶段: 秒数}。
+    fields (dict): 附带的调试字段。
+    """
+    for phase, seconds in timings.items():
+        counter = _trace_counters.setdefault(phase, [0, 0.0])
+        counter[0] += 1
+        counter[1] += seconds
+    fields["timings"] = timings
+    tracer = _tracer
+    if tracer is not None:
+        tracer(event, fields)
+
+# 从私钥哈希中提取标量 a
+def secretscalar(h):
+    """
+    从私钥哈希 h 的前 b // 8 个字节中提取私钥标量 a。
+
+    清除最低 3 位和最高位，并置第 b-2 位为 1。
+
+    参数:
+    h (bytes): 私钥的哈希值。
+
+    返回:
+    int: 私钥标量 a。
+    """
+    return (1 << (b - 2)) | (int.from_bytes(h[: b // 8], "little") & ((1 << (b - 2)) - 8))
+
 # 生成公钥
 def publickey(sk):
     """
@@ -208,32 +684,46 @@ def publickey(sk):
     最后将点 A 编码为字节序列并返回。
 
     注意:
-    - 函数依赖于外部定义的 H、bit、scalarmult、B 和 encodepoint 函数或变量。
+    - 函数依赖于外部定义的 H、secretscalar、scalarmult_B 和 encodepoint 函数或变量。
     - b 是一个全局变量，表示位数。
     """
+    if _tracer is not None:
+        return _publickey_traced(sk)
     h = H(sk)
-    a = 2 ** (b - 2) + sum(2 ** i * bit(h, i) for i in range(3, b - 2))
-    print(a)
-    A = scalarmult(B, a)
-    print(A)
+    a = secretscalar(h)
+    A = scalarmult_B(a)
     return encodepoint(A)
 
+# 带阶段计时的 publickey
+def _publickey_traced(sk):
+    """
+    与 publickey 相同，额外记录各阶段耗时并发出 "publickey" 事件。
+    事件只包含公钥，不包含私钥标量 a 等秘密数据。
+    """
+    t0 = time.perf_counter()
+    h = H(sk)
+    a = secretscalar(h)
+    t1 = time.perf_counter()
+    A = scalarmult_B(a)
+    t2 = time.perf_counter()
+    pk = encodepoint(A)
+    t3 = time.perf_counter()
+    _emit("publickey", {"hash": t1 - t0, "scalarmult": t2 - t1, "encode": t3 - t2},
+          {"A": pk})
+    return pk
+
 # 计算消息的哈希值
 def Hint(m):
     """
-    计算消息 m 的哈希值，并返回哈希值的位的加权和。
+    计算消息 m 的哈希值，并将其按小端序解释为整数。
 
     参数:
-    m (str): 输入消息。
+    m (bytes): 输入消息。
 
     返回:
-    int: 哈希值的位的加权和。
-
-    该函数首先计算消息 m 的哈希值 h，然后计算 h 的每个位的加权和。
-    加权和的计算方式是将每个位乘以 2 的该位索引次方，然后求和。
+    int: 哈希值对应的 2b 位整数。
     """
-    h = H(m)
-    return sum(2 ** i * bit(h, i) for i in range(2 * b))
+    return int.from_bytes(H(m), "little")
 
 # 生成签名
 def signature(m, sk, pk):
@@ -261,22 +751,45 @@ def signature(m, sk, pk):
     - r 对于每条不同的消息 m 都是不同的，确保签名的唯一性。
     - S 包含了随机数 r 和私钥 a 的隐藏计算，保证签名的安全性。
     """
+    if _tracer is not None:
+        return _signature_traced(m, sk, pk)
     h = H(sk)
-    a = 2 ** (b - 2) + sum(2 ** i * bit(h, i) for i in range(3, b - 2))
+    a = secretscalar(h)
     #取 h 的部分（h[b // 8 : b // 4]）作为一个随机种子 结合m 生成hash值
     #这样 r 对于每条不同的 m 都是不同的，确保签名的唯一性。
     r = Hint(h[b // 8 : b // 4] + m)
     #随机值生成随机点
-    R = scalarmult(B, r)
+    R = scalarmult_B(r)
     #计算 c = Hint(encodepoint(R) + pk + m)，即对 R、公钥 pk 和消息 m 进行哈希。
     #计算 S = (r + c * a) % l，这里：
     #       c * a 相当于用私钥 a 进行了一次隐藏的计算。
     #       r 作为随机数，确保 S 是不可预测的。
     #       mod l 使得 S 处于有限域 l 内，保证安全性。
-    S = (r + Hint(encodepoint(R) + pk + m) * a) % l
-    print("R:",R)
-    print("S:",S)
-    return encodepoint(R) + encodeint(S)
+    Rs = encodepoint(R)  # 只转换一次仿射坐标
+    S = (r + Hint(Rs + pk + m) * a) % l
+    return Rs + encodeint(S)
+
+# 带阶段计时的 signature
+def _signature_traced(m, sk, pk):
+    """
+    与 signature 相同，额外记录各阶段耗时并发出 "signature" 事件。
+    """
+    t0 = time.perf_counter()
+    h = H(sk)
+    a = secretscalar(h)
+    r = Hint(h[b // 8 : b // 4] + m)
+    t1 = time.perf_counter()
+    R = scalarmult_B(r)
+    t2 = time.perf_counter()
+    Rs = encodepoint(R)
+    t3 = time.perf_counter()
+    S = (r + Hint(Rs + pk + m) * a) % l
+    t4 = time.perf_counter()
+    sig = Rs + encodeint(S)
+    t5 = time.perf_counter()
+    _emit("signature", {"hash": (t1 - t0) + (t4 - t3), "scalarmult": t2 - t1, "encode": (t3 - t2) + (t5 - t4)},
+          {"R": Rs, "S": S})
+    return sig
 
 # 检查点是否在曲线上
 def isoncurve(P):
@@ -284,20 +797,25 @@ def isoncurve(P):
     检查给定点 P 是否在曲线上。
 
     参数:
-    P (tuple): 包含点的 x 和 y 坐标的元组。
+    P (tuple): 扩展坐标点 (X, Y, Z, T)。
 
     返回:
     bool: 如果点在曲线上则返回 True，否则返回 False。
+
+    说明:
+    射影形式的曲线方程为 (-X^2 + Y^2) * Z^2 = Z^4 + d * X^2 * Y^2，
+    同时要求 X * Y = Z * T。
     """
-    x, y = P
-    return (-x * x + y * y - 1 - d * x * x * y * y) % q == 0
+    X, Y, Z, T = P
+    XX, YY, ZZ = X * X, Y * Y, Z * Z
+    return (ZZ * (YY - XX) - ZZ * ZZ - d * XX * YY) % q == 0 and (X * Y - Z * T) % q == 0
 
 # 将字节解码为整数
 def decodeint(s):
     """
     解码整数
 
-    该函数将字节串 `s` 解码为一个整数。它通过对每个字节的位进行加权求和来实现这一点。
+    该函数将字节串 `s` 的前 b // 8 个字节按小端序解码为一个整数。
 
     参数:
     s (bytes): 要解码的字节串
@@ -305,7 +823,7 @@ def decodeint(s):
     返回:
     int: 解码后的整数
     """
-    return sum(2**i * bit(s,i) for i in range(0,b))
+    return int.from_bytes(s[: b // 8], "little")
 
 # 将字节解码为点
 def decodepoint(s):
@@ -316,18 +834,124 @@ def decodepoint(s):
     s (bytes): 要解码的字节串。
 
     返回:
-    list: 椭圆曲线上的点 [x, y]。
+    tuple: 椭圆曲线上的点，扩展坐标 (X, Y, Z, T)。
 
     异常:
     Exception: 如果解码的点不在曲线上，则抛出异常。
     """
-    y = sum(2**i * bit(s,i) for i in range(0,b-1))
+    y = int.from_bytes(s[: b // 8], "little") & ((1 << (b - 1)) - 1)
     x = xrecover(y)
-    if x & 1 != bit(s,b-1): x = q-x
-    P = [x,y]
+    if x & 1 != s[b // 8 - 1] >> 7: x = q-x
+    P = toextended((x, y))
     if not isoncurve(P): raise Exception("decoding point that is not on curve")
     return P
 
+PK_CACHE_SIZE = 1024  # 公钥解码缓存的默认容量
+
+class PublicKeyCache:
+    """
+    已解码公钥的有界 LRU 缓存。
+
+    少量公钥（例如 leader）几乎签名了所有数据，缓存可以让同一公钥的重复验证
+    跳过 decodepoint（含 xrecover 开方与 isoncurve 检查）以及 -A 奇数倍表的构建。
+
+    属性:
+        capacity (int): 最多缓存的公钥数量。
+        hits (int): 命中次数。
+        misses (int): 未命中次数。
+    """
+
+    def __init__(self, capacity=PK_CACHE_SIZE):
+        self.capacity = capacity
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, pk):
+        """
+        返回公钥 pk 对应的点 A 及 -A 的 wNAF 奇数倍表。
+
+        参数:
+        pk (bytes): 公钥。
+
+        返回:
+        tuple: (A, Atable)。
+
+        异常:
+        Exception: 公钥无法解码时抛出，无效公钥不会进入缓存。
+        """
+        with self._lock:
+            entry = self._entries.get(pk)
+            if entry is not None:
+                self._entries.move_to_end(pk)
+                self.hits += 1
+                return entry
+            self.misses += 1
+        A = decodepoint(pk)
+        entry = (A, oddmultiples(edwardsneg(A), POINT_NAF_WINDOW))
+        if self.capacity > 0:
+            with self._lock:
+                self._entries[pk] = entry
+                while len(self._entries) > self.capacity:
+                    self._entries.popitem(last=False)
+        return entry
+
+    def resize(self, capacity):
+        """
+        调整缓存容量，超出部分按最近最少使用顺序淘汰。
+
+        参数:
+        capacity (int): 新的容量。
+        """
+        with self._lock:
+            self.capacity = capacity
+            while len(self._entries) > capacity:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """
+        清空缓存并重置计数器。
+        """
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """
+        返回缓存的统计信息。
+
+        返回:
+        dict: 包含 size、capacity、hits、misses 和 hit_rate。
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "capacity": self.capacity,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
+
+pkcache = PublicKeyCache()  # 模块级公钥缓存，checkvalid 与 checkvalid_batch 共用
+
+# 设置公钥缓存容量
+def configure_pk_cache(capacity):
+    """
+    设置公钥缓存的容量，超出部分按最近最少使用顺序淘汰。容量为 0 时关闭缓存。
+
+    参数:
+    capacity (int): 最多缓存的公钥数量。
+
+    异常:
+    ValueError: 当容量为负数时抛出。
+    """
+    if capacity < 0:
+        raise ValueError("public key cache capacity must not be negative")
+    pkcache.resize(capacity)
+
 # 验证签名
 def checkvalid(s, m, pk) -> bool:
     """
@@ -346,12 +970,14 @@ def checkvalid(s, m, pk) -> bool:
         raise Exception("Signature length is wrong")
     if len(pk) != b // 8:
         raise Exception("Public-key length is wrong")
+    if _tracer is not None:
+        return _checkvalid_traced(s, m, pk)
     #----------------签名的前半部分和后半部分--------------------------
     R = decodepoint(s[: b // 8])  # s取前32位 (反向计算随机点)
     S = decodeint(s[b // 8 : b // 4]) # s取32到64位
     #-----------------公钥和挑战值-----------------------------------
-    A = decodepoint(pk)           # pk为32位 (计算公钥点)
-    h = Hint(encodepoint(R) + pk + m) # 计算挑战值
+    A, Atable = pkcache.get(pk)   # pk为32位 (计算公钥点，重复的公钥直接命中缓存)
+    h = Hint(s[: b // 8] + pk + m) # 计算挑战值（解码成功时 encodepoint(R) 与 s 的前 32 字节相同）
     #-----------------验证签名---------------------------------------
     #计算 c = Hint(encodepoint(R) + pk + m)，即对 R、公钥 pk 和消息 m 进行哈希。
     #计算 S = (r + c * a) % l，这里：
@@ -364,6 +990,137 @@ def checkvalid(s, m, pk) -> bool:
     #       S*B=B*r+c.B*a=B*(r+c*a)
     #       B*S=B*(r+c*a)
     #       B*r+B*a*c=B*(r+c*a)
-    if scalarmult(B, S) != edwards(R, scalarmult(A, h)):
+    #一趟交错计算 S·B - h·A，再检查带余因子的等式 8·(S·B - h·A - R) == 单位元，
+    #R、A 中的小阶分量被消去，与 checkvalid_batch 的随机线性组合给出相同的结果。
+    #曲线群的阶为 8l，h 对 8l 取模不改变 h·A（即使 A 含有小阶分量）。
+    if not cofactorzero(edwards(doublescalarmult_B(S % l, h % (8 * l), Atable), edwardsneg(R))):
         raise Exception("Signature does not pass verification")
     return True
+
+# 带阶段计时的 checkvalid
+def _checkvalid_traced(s, m, pk):
+    """
+    与 checkvalid 相同（长度已检查），额外记录各阶段耗时并发出 "checkvalid" 事件。
+    """
+    t0 = time.perf_counter()
+    R = decodepoint(s[: b // 8])
+    S = decodeint(s[b // 8 : b // 4])
+    A, Atable = pkcache.get(pk)
+    t1 = time.perf_counter()
+    h = Hint(s[: b // 8] + pk + m)
+    t2 = time.perf_counter()
+    valid = cofactorzero(edwards(doublescalarmult_B(S % l, h % (8 * l), Atable), edwardsneg(R)))
+    t3 = time.perf_counter()
+    _emit("checkvalid", {"decode": t1 - t0, "hash": t2 - t1, "scalarmult": t3 - t2},
+          {"valid": valid})
+    if not valid:
+        raise Exception("Signature does not pass verification")
+    return True
+
+
+# 解析签名三元组，供批量验证使用
+def _prepare_batch_item(s, m, pk):
+    """
+    解析 (签名, 消息, 公钥) 三元组，返回 (R, S, A, h, Atable)。
+
+    参数:
+    s (bytes): 签名。
+    m (bytes): 消息。
+    pk (bytes): 公钥。
+
+    返回:
+    tuple: (R, S, A, h, Atable)，签名格式错误或点解码失败时返回 None。
+    """
+    if len(s) != b // 4 or len(pk) != b // 8:
+        return None
+    try:
+        R = decodepoint(s[: b // 8])
+        A, Atable = pkcache.get(pk)
+    except Exception:
+        return None
+    S = decodeint(s[b // 8 : b // 4])
+    h = Hint(s[: b // 8] + pk + m)
+    return (R, S, A, h, Atable)
+
+# 用随机线性组合一次性验证多个签名
+def _batch_equation_holds(entries):
+    """
+    检查带余因子的随机线性组合 8·((sum z_i*S_i)·B - sum z_i·R_i - sum (z_i*h_i)·A_i) == 单位元。
+
+    乘以余因子 8 后各项都落在阶为 l 的子群中：R_i、A_i 的小阶分量不会因随机系数而
+    相互抵消或残留，结果与逐个 checkvalid 一致（无效签名整批通过的概率约为 2**-128）。
+    单个条目直接按 checkvalid 的方式验证。
+
+    参数:
+    entries (list): _prepare_batch_item 返回的 (R, S, A, h, Atable) 列表。
+
+    返回:
+    bool: 等式成立返回 True，否则返回 False。
+    """
+    if len(entries) == 1:
+        R, S, A, h, Atable = entries[0]
+        return cofactorzero(edwards(doublescalarmult_B(S % l, h % (8 * l), Atable), edwardsneg(R)))
+    Ssum = 0
+    scalars = []
+    points = []
+    for R, S, A, h, _ in entries:
+        z = secrets.randbits(128) | 1  # 随机系数，防止伪造签名相互抵消
+        Ssum += z * S
+        scalars.append(z)
+        points.append(R)
+        # 整个曲线群的阶为 8l，对 8l 取模不改变 A 上的结果（即使 A 含有小阶分量）
+        scalars.append(z * h % (8 * l))
+        points.append(A)
+    return cofactorzero(edwards(scalarmult_B(Ssum), edwardsneg(multiscalarmult(scalars, points))))
+
+# 二分定位批次中验证失败的签名
+def _bisect_batch(entries, positions, results):
+    """
+    批量等式不成立时递归二分，直到定位出所有无效签名。
+
+    参数:
+    entries (list): (R, S, A, h, Atable) 列表。
+    positions (list): 每个条目在原始输入中的位置。
+    results (list): 结果向量，无效条目对应位置被置为 False。
+    """
+    if _batch_equation_holds(entries):
+        return
+    if len(entries) == 1:
+        results[positions[0]] = False
+        return
+    mid = len(entries) // 2
+    _bisect_batch(entries[:mid], positions[:mid], results)
+    _bisect_batch(entries[mid:], positions[mid:], results)
+
+# 批量验证签名
+def checkvalid_batch(items):
+    """
+    批量验证多个签名，返回每个签名的验证结果。
+
+    所有签名合并为一次多标量乘法（随机线性组合）进行检查；
+    若整批失败，则二分查找出无效的签名。与 checkvalid 不同，
+    该函数不抛出异常，而是返回布尔向量。
+
+    参数:
+    items (iterable): (签名, 消息, 公钥) 三元组序列。
+
+    返回:
+    list: 与输入顺序一致的布尔列表，True 表示签名有效。
+
+    注意:
+    - 与 checkvalid 相同检查带余因子的等式，R 或 A 含小阶分量的签名在两者中结果一致；
+      随机系数为 128 位，无效签名混入整批通过的概率约为 2**-128。
+    - 长度错误或无法解码的签名直接判为 False，不参与批量计算。
+    """
+    results = []
+    entries = []
+    positions = []
+    for i, (s, m, pk) in enumerate(items):
+        entry = _prepare_batch_item(s, m, pk)
+        results.append(entry is not None)
+        if entry is not None:
+            entries.append(entry)
+            positions.append(i)
+    if entries:
+        _bisect_batch(entries, positions, results)
+    return results
@@ -0,0 +1,333 @@
+"""
+基于 NumPy 的批量（锁步）域运算与点运算。
+
+ed255191 中每次域运算只处理一个 Python 整数，验证大量签名时解释器开销占主导。
+这里把 N 个域元素放进一个 (16, N) 的 int64 数组，每个元素拆成 16 个 16 位的肢（limb），
+一次 NumPy 调用同时处理整批数据：
+
+- 乘法：16 × 16 个肢乘积按 2**256 ≡ 38 (mod q) 折叠回 16 个肢，再做三轮并行进位；
+  输入肢的绝对值不超过 2**19 时，中间结果远小于 2**63，不会溢出；
+- 进位后每个肢的绝对值小于 2**17，只在最终比较时转换回 Python 整数做规范化；
+- 点运算沿用 ed255191 的扩展坐标公式（add-2008-hwcd-3 / dbl-2008-hwcd），加法对单位元同样成立，
+  因此整批签名执行完全相同的运算序列。
+
+checkvalid_vectorized 用 4 位定长窗口锁步计算 S·B - h·A，与 checkvalid 一样检查
+带余因子的等式 8·(S·B - h·A - R) == 单位元，结果与 checkvalid 一致；
+R 与 A 的解码（开方）仍逐个在 ed255191 中完成，A 命中 pkcache 时不再解码。
+每次 NumPy 调用的固定开销按批摊薄，实测约 64 个签名时与逐个 checkvalid 持平（VECTORIZE_MIN_BATCH）；
+批更小或未安装 NumPy 时退回逐个调用 checkvalid。
+
+用法:
+    results = checkvalid_vectorized([(sig, msg, pk), ...])
+
+    python -m ed25519.vectorized   # 比较不同批大小下每个签名的验证耗时
+"""
+import os
+import time
+from typing import List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # NumPy 是可选依赖
+    np = None
+
+from ed25519 import ed255191 as ed
+
+HAVE_NUMPY = np is not None
+LIMBS = 16  # 每个域元素的肢数
+LIMB_BITS = 16  # 每个肢的位数
+WINDOW = 4  # 定长窗口宽度（位）
+WINDOWS = 256 // WINDOW  # 每个标量的窗口数
+VECTORIZE_MIN_BATCH = 64  # 实测的盈亏平衡点：更小的批逐个调用 checkvalid 更快
+
+if HAVE_NUMPY:
+    _k = np.arange(LIMBS)[:, None]
+    _i = np.arange(LIMBS)[None, :]
+    # 乘积第 k 个肢 = sum_i a[i] * b'[_FOLD[k, i]]，b' = concat(b, 38 * b)：k < i 的项来自 2**256 的折叠
+    _FOLD = (_k - _i) % LIMBS + LIMBS * (_k < _i)
+    del _k, _i
+
+# ---------------------- 域运算 ----------------------
+
+def to_limbs(values: Sequence[int]):
+    """
+    把整数序列转换为 (16, N) 的肢数组。
+
+    参数:
+    values (Sequence[int]): 域元素（任意整数，先对 q 取模）。
+
+    返回:
+    numpy.ndarray: int64 数组，第 i 行为各元素的第 i 个 16 位肢。
+    """
+    raw = b"".join((v % ed.q).to_bytes(32, "little") for v in values)
+    limbs = np.frombuffer(raw, dtype="<u2").reshape(len(values), LIMBS)
+    return limbs.T.astype(np.int64)
+
+def from_limbs(x) -> List[int]:
+    """
+    把肢数组转换回规范化的整数列表（对 q 取模）。
+    """
+    columns = x.T.tolist()
+    return [sum(limb << (LIMB_BITS * i) for i, limb in enumerate(column)) % ed.q for column in columns]
+
+def constant(value: int, n: int):
+    """
+    返回 n 份相同域元素组成的肢数组。
+    """
+    return np.repeat(to_limbs([value]), n, axis=1)
+
+def _carry(x):
+    """
+    三轮并行进位：每个肢保留低 16 位，高位加到下一个肢，最高肢的进位乘 38 加回最低肢。
+    """
+    for _ in range(3):
+        c = x >> LIMB_BITS
+        x &= 0xFFFF
+        x[1:] += c[:-1]
+        x[0] += 38 * c[-1]
+    return x
+
+def fe_mul(a, b):
+    """
+    逐列计算 a * b (mod q)。
+    """
+    folded = np.concatenate((b, 38 * b))[_FOLD]  # (16, 16, N)
+    return _carry(np.einsum("kin,in->kn", folded, a))
+
+def fe_mul_many(*pairs):
+    """
+    把多组互不依赖的乘法拼接成一次 fe_mul，摊薄每次 NumPy 调用的固定开销。
+
+    参数:
+    pairs: 若干 (a, b) 肢数组对，列数相同。
+
+    返回:
+    list: 各组的乘积。
+    """
+    a = np.concatenate([p[0] for p in pairs], axis=1)
+    b = np.concatenate([p[1] for p in pairs], axis=1)
+    return np.split(fe_mul(a, b), len(pairs), axis=1)
+
+# ---------------------- 点运算 ----------------------
+# 点为 (X, Y, Z, T) 四个肢数组；"缓存形式" 为 (Y - X, Y + X, 2Z, 2d·T)，用作加法的第二个操作数。
+
+def to_points(points: Sequence[tuple]):
+    """
+    把 ed255191 的扩展坐标点序列转换为锁步点。
+    """
+    return tuple(to_limbs([P[c] for P in points]) for c in range(4))
+
+def from_points(P) -> List[tuple]:
+    """
+    把锁步点转换回 ed255191 的扩展坐标点列表。
+    """
+    return list(zip(*(from_limbs(c) for c in P)))
+
+def cached(P):
+    """
+    返回点 P 的缓存形式。
+    """
+    X, Y, Z, T = P
+    n = X.shape[1]
+    return (Y - X, Y + X, 2 * Z, fe_mul(T, constant(ed.d2, n)))
+
+def add_cached(P, Qc):
+    """
+    逐列计算 P + Q，Q 为缓存形式（add-2008-hwcd-3）。
+    """
+    X1, Y1, Z1, T1 = P
+    YmX2, YpX2, Z2, T2d = Qc
+    A, B_, C, D = fe_mul_many((Y1 - X1, YmX2), (Y1 + X1, YpX2), (T1, T2d), (Z1, Z2))
+    E, F, G, H_ = B_ - A, D - C, D + C, B_ + A
+    return tuple(fe_mul_many((E, F), (G, H_), (F, G), (E, H_)))
+
+def add(P, Q):
+    """
+    逐列计算 P + Q。
+    """
+    return add_cached(P, cached(Q))
+
+def double(P, with_t: bool = True):
+    """
+    逐列计算 2P（dbl-2008-hwcd）。with_t 为 False 时不计算 T（下一步仍是倍点时不需要）。
+    """
+    X1, Y1, Z1, _ = P
+    XpY = X1 + Y1
+    A, B_, ZZ, XpY2 = fe_mul_many((X1, X1), (Y1, Y1), (Z1, Z1), (XpY, XpY))
+    H_ = A + B_
+    E = H_ - XpY2
+    G = A - B_
+    F = 2 * ZZ + G
+    if with_t:
+        return tuple(fe_mul_many((E, F), (G, H_), (F, G), (E, H_)))
+    return tuple(fe_mul_many((E, F), (G, H_), (F, G))) + (None,)
+
+def _identity(n: int):
+    return (np.zeros((LIMBS, n), np.int64), constant(1, n), constant(1, n), np.zeros((LIMBS, n), np.int64))
+
+def _multiples(P, n: int):
+    """
+    返回 0·P 到 15·P 的缓存形式，数组形状为 (16, 4, 16, n)。
+    """
+    table = [cached(_identity(n)), cached(P)]
+    Q = P
+    for _ in range(2, 1 << WINDOW):
+        Q = add_cached(Q, table[1])
+        table.append(cached(Q))
+    return np.stack([np.stack(entry) for entry in table])
+
+_base_multiples = None  # B 的 0..15 倍（缓存形式），形状 (16, 4, 16)，首次使用时构建
+
+def _base_table():
+    global _base_multiples
+    if _base_multiples is None:
+        _base_multiples = _multiples(to_points([ed.B]), 1)[:, :, :, 0]
+    return _base_multiples
+
+def _digits(scalars: Sequence[int]):
+    """
+    把 256 位以内的标量拆成 4 位窗口，返回 (N, 64) 数组，第 j 列为第 j 个窗口（低位在前）。
+    """
+    raw = np.frombuffer(b"".join(s.to_bytes(32, "little") for s in scalars), dtype=np.uint8)
+    raw = raw.reshape(len(scalars), 32)
+    digits = np.empty((len(scalars), WINDOWS), dtype=np.intp)
+    digits[:, 0::2] = raw & 0xF
+    digits[:, 1::2] = raw >> 4
+    return digits
+
+def doublescalarmult(a: Sequence[int], c: Sequence[int], Q):
+    """
+    锁步计算 a_i·B + c_i·Q_i。
+
+    参数:
+    a (Sequence[int]): 基点 B 的标量，小于 2**256。
+    c (Sequence[int]): 各点的标量，小于 2**256。
+    Q (tuple): 锁步点。
+
+    返回:
+    tuple: 锁步结果点。
+    """
+    n = len(a)
+    lanes = np.arange(n)
+    btable = _base_table()
+    qtable = _multiples(Q, n)
+    da, dc = _digits(a), _digits(c)
+    P = None
+    for w in range(WINDOWS - 1, -1, -1):
+        if P is None:
+            P = _identity(n)
+        else:
+            for step in range(WINDOW):
+                P = double(P, with_t=step == WINDOW - 1)
+        P = add_cached(P, tuple(btable[da[:, w]].transpose(1, 2, 0)))
+        P = add_cached(P, tuple(qtable[dc[:, w], :, :, lanes].transpose(1, 2, 0)))
+    return P
+
+# ---------------------- 签名验证 ----------------------
+
+def _prepare(s, m, pk) -> Optional[Tuple[tuple, int, tuple, int]]:
+    """
+    解码签名三元组，返回 (R, S, -A, h)；格式错误或点解码失败时返回 None。
+    """
+    if len(s) != ed.b // 4 or len(pk) != ed.b // 8:
+        return None
+    try:
+        R = ed.decodepoint(s[: ed.b // 8])
+        A, _ = ed.pkcache.get(pk)
+    except Exception:
+        return None
+    S = ed.decodeint(s[ed.b // 8 : ed.b // 4])
+    h = ed.Hint(s[: ed.b // 8] + pk + m)
+    return R, S % ed.l, ed.edwardsneg(A), h % (8 * ed.l)
+
+def _checkvalid_scalar(items) -> List[bool]:
+    results = []
+    for s, m, pk in items:
+        try:
+            results.append(ed.checkvalid(s, m, pk))
+        except Exception:
+            results.append(False)
+    return results
+
+def checkvalid_vectorized(items) -> List[bool]:
+    """
+    锁步验证多个签名，逐个返回与 checkvalid 相同的结果（不抛出异常）。
+
+    与 checkvalid_batch 不同，每个签名单独检查 8·(S·B - h·A - R) == 单位元，不使用随机线性组合。
+    少于 VECTORIZE_MIN_BATCH 个签名或未安装 NumPy 时逐个调用 checkvalid。
+
+    参数:
+    items (iterable): (签名, 消息, 公钥) 三元组序列。
+
+    返回:
+    list: 与输入顺序一致的布尔列表，True 表示签名有效。
+    """
+    items = list(items)
+    if not HAVE_NUMPY or len(items) < VECTORIZE_MIN_BATCH:
+        return _checkvalid_scalar(items)
+    return _checkvalid_lockstep(items)
+
+def _checkvalid_lockstep(items) -> List[bool]:
+    """
+    不论批大小都走锁步路径，供 checkvalid_vectorized 与基准测试使用。
+    """
+    results = [False] * len(items)
+    entries = []
+    positions = []
+    for i, item in enumerate(items):
+        entry = _prepare(*item)
+        if entry is not None:
+            entries.append(entry)
+            positions.append(i)
+    if not entries:
+        return results
+    R, S, negA, h = zip(*entries)
+    P = doublescalarmult(S, h, to_points(negA))
+    # 与 checkvalid 相同检查带余因子的等式：8·(S·B - h·A - R) 为单位元
+    P = add(P, to_points([ed.edwardsneg(point) for point in R]))
+    for step in range(3):
+        P = double(P, with_t=False)
+    X, Y, Z, _ = P
+    dx = from_limbs(X)
+    dy = from_limbs(Y - Z)
+    for position, ex, ey in zip(positions, dx, dy):
+        results[position] = ex == 0 and ey == 0
+    return results
+
+# ---------------------- 基准测试 ----------------------
+
+BATCH_SIZES = [1, 4, 16, 64, 256, 1024]
+
+def main():
+    """
+    比较不同批大小下锁步路径与逐个 checkvalid 的每签名耗时，并确认结果一致；
+    据此确定 VECTORIZE_MIN_BATCH。
+    """
+    sk = os.urandom(32)
+    pk = ed.publickey(sk)
+    items = []
+    for i in range(max(BATCH_SIZES)):
+        m = os.urandom(100)
+        sig = ed.signature(m, sk, pk)
+        if i % 7 == 3:
+            m = m[:-1] + bytes([m[-1] ^ 1])  # 混入无效签名
+        items.append((sig, m, pk))
+    expected = _checkvalid_scalar(items[:64])
+    start = time.perf_counter()
+    _checkvalid_scalar(items[:64])
+    scalar = (time.perf_counter() - start) / 64 * 1e3
+    print(f"numpy: {np.__version__ if HAVE_NUMPY else 'not installed'}")
+    print(f"{'batch':>6}{'ms/sig':>10}{'vs checkvalid':>15}")
+    print(f"{'scalar':>6}{scalar:>10.3f}{1.0:>14.2f}x")
+    if not HAVE_NUMPY:
+        return
+    _checkvalid_lockstep(items[:1])  # 预热：构建基点表
+    for size in BATCH_SIZES:
+        start = time.perf_counter()
+        results = _checkvalid_lockstep(items[:size])
+        per_sig = (time.perf_counter() - start) / size * 1e3
+        assert results == (expected + _checkvalid_scalar(items[64:size]))[:size]
+        print(f"{size:>6}{per_sig:>10.3f}{scalar / per_sig:>14.2f}x")
+
+if __name__ == "__main__":
+    main()
@@ -24,7 +24,7 @@ _sym_db = _symbol_database.Default()
 
 
 
-DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\nsync.proto\x12\x04sync\",\n\x0bSyncRequest\x12\x0f\n\x07node_id\x18\x01 \x01(\x05\x12\x0c\n\x04\x64\x61ta\x18\x02 \x01(\t\"-\n\x0cSyncResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\x12\x0c\n\x04\x64\x61ta\x18\x02 \x01(\t2F\n\rStreamService\x12\x35\n\x08\x42iStream\x12\x11.sync.SyncRequest\x1a\x12.sync.SyncResponse(\x01\x30\x01\x62\x06proto3')
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\nsync.proto\x12\x04sync\"X\n\x0bSyncRequest\x12\x0f\n\x07node_id\x18\x01 \x01(\x05\x12\x0c\n\x04\x64\x61ta\x18\x02 \x01(\t\x12\x0f\n\x07\x63redits\x18\x03 \x01(\r\x12\x19\n\x05nacks\x18\x04 \x03(\x0b\x32\n.sync.Nack\"&\n\x04Nack\x12\r\n\x05tx_id\x18\x01 \x01(\x04\x12\x0f\n\x07indices\x18\x02 \x03(\r\"<\n\x0cSyncResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\x12\x0c\n\x04\x64\x61ta\x18\x02 \x01(\t\x12\r\n\x05shred\x18\x03 \x01(\x0c\"\x1c\n\nShredBatch\x12\x0e\n\x06shreds\x18\x01 \x03(\x0c\x32~\n\rStreamService\x12\x35\n\x08\x42iStream\x12\x11.sync.SyncRequest\x1a\x12.sync.SyncResponse(\x01\x30\x01\x12\x36\n\x0b\x42\x61tchStream\x12\x11.sync.SyncRequest\x1a\x10.sync.ShredBatch(\x01\x30\x01\x62\x06proto3')
 
 _globals = globals()
 _builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
@@ -32,9 +32,13 @@ _builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'sync_pb2', _globals)
 if not _descriptor._USE_C_DESCRIPTORS:
   DESCRIPTOR._loaded_options = None
   _globals['_SYNCREQUEST']._serialized_start=20
-  _globals['_SYNCREQUEST']._serialized_end=64
-  _globals['_SYNCRESPONSE']._serialized_start=66
-  _globals['_SYNCRESPONSE']._serialized_end=111
-  _globals['_STREAMSERVICE']._serialized_start=113
-  _globals['_STREAMSERVICE']._serialized_end=183
+  _globals['_SYNCREQUEST']._serialized_end=108
+  _globals['_NACK']._serialized_start=110
+  _globals['_NACK']._serialized_end=148
+  _globals['_SYNCRESPONSE']._serialized_start=150
+  _globals['_SYNCRESPONSE']._serialized_end=210
+  _globals['_SHREDBATCH']._serialized_start=212
+  _globals['_SHREDBATCH']._serialized_end=240
+  _globals['_STREAMSERVICE']._serialized_start=242
+  _globals['_STREAMSERVICE']._serialized_end=368
 # @@protoc_insertion_point(module_scope)
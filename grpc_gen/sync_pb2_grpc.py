@@ -40,6 +40,11 @@ class StreamServiceStub(object):
                 request_serializer=sync__pb2.SyncRequest.SerializeToString,
                 response_deserializer=sync__pb2.SyncResponse.FromString,
                 _registered_method=True)
+        self.BatchStream = channel.stream_stream(
+                '/sync.StreamService/BatchStream',
+                request_serializer=sync__pb2.SyncRequest.SerializeToString,
+                response_deserializer=sync__pb2.ShredBatch.FromString,
+                _registered_method=True)
 
 
 class StreamServiceServicer(object):
@@ -52,6 +57,13 @@ class StreamServiceServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def BatchStream(self, request_iterator, context):
+        """每条消息携带多个分片
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
 
 def add_StreamServiceServicer_to_server(servicer, server):
     rpc_method_handlers = {
@@ -60,6 +72,11 @@ def add_StreamServiceServicer_to_server(servicer, server):
                     request_deserializer=sync__pb2.SyncRequest.FromString,
                     response_serializer=sync__pb2.SyncResponse.SerializeToString,
             ),
+            'BatchStream': grpc.stream_stream_rpc_method_handler(
+                    servicer.BatchStream,
+                    request_deserializer=sync__pb2.SyncRequest.FromString,
+                    response_serializer=sync__pb2.ShredBatch.SerializeToString,
+            ),
     }
     generic_handler = grpc.method_handlers_generic_handler(
             'sync.StreamService', rpc_method_handlers)
@@ -98,3 +115,30 @@ class StreamService(object):
             timeout,
             metadata,
             _registered_method=True)
+
+    @staticmethod
+    def BatchStream(request_iterator,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.stream_stream(
+            request_iterator,
+            target,
+            '/sync.StreamService/BatchStream',
+            sync__pb2.SyncRequest.SerializeToString,
+            sync__pb2.ShredBatch.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
@@ -0,0 +1,138 @@
+"""
+列式分片批次。
+
+验证节点同时持有大量在途分片时，每个 Shred 对象的开销（对象头、负载与证明的 bytes 对象、列表）
+远大于分片本身。ShredColumns 把同一批分片按列存放（与 gRPC 消息 sync_pb2.ShredBatch 无关）：
+
+- 定长头部字段存入 array（tx_id 为 'Q'，index / total 等为 'I' / 'H' / 'B'）；
+- 签名依次存入一个 bytearray（每个 64 字节）；
+- 负载与 Merkle 证明分别连续存入 bytearray，另用 array('I') 记录偏移。
+
+迭代或按下标访问时才构造 Shred 对象，负载与证明为从列中复制出的 bytes
+（列是可增长的 bytearray，导出 memoryview 会使后续追加失败）。
+"""
+from array import array
+from typing import Iterable, Iterator
+
+from .shred import PROOF_NODE_SIZE, SHRED_HEADER, Shred
+
+SIGNATURE_SIZE = 64  # Ed25519 签名长度
+
+
+class ShredColumns:
+    """
+    按列存放的一批分片。
+
+    属性:
+        tx_ids, indices, totals, shred_types, fec_set_indices, num_data, num_coding, flags, merkle_indices (array):
+            各分片的头部字段。
+        signatures (bytearray): 依次存放的 64 字节签名。
+        payloads (bytearray): 依次存放的负载，第 i 个为 payloads[payload_offsets[i]:payload_offsets[i + 1]]。
+        proofs (bytearray): 依次存放的证明节点，第 i 个分片的节点为 proof_offsets[i] 到 proof_offsets[i + 1]。
+    """
+
+    __slots__ = ("tx_ids", "indices", "totals", "shred_types", "fec_set_indices", "num_data",
+                 "num_coding", "flags", "merkle_indices", "signatures", "payloads", "payload_offsets",
+                 "proofs", "proof_offsets")
+
+    def __init__(self, shreds: Iterable[Shred] = ()):
+        self.tx_ids = array("Q")
+        self.indices = array("I")
+        self.totals = array("I")
+        self.shred_types = array("B")
+        self.fec_set_indices = array("I")
+        self.num_data = array("H")
+        self.num_coding = array("H")
+        self.flags = array("B")
+        self.merkle_indices = array("I")
+        self.signatures = bytearray()
+        self.payloads = bytearray()
+        self.payload_offsets = array("I", [0])
+        self.proofs = bytearray()
+        self.proof_offsets = array("I", [0])  # 以证明节点计
+        for shred in shreds:
+            self.append(shred)
+
+    def __len__(self) -> int:
+        return len(self.indices)
+
+    def _append_header(self, tx_id, index, total, shred_type, fec_set_index, num_data, num_coding,
+                       flags, signature, merkle_index) -> None:
+        if len(signature) != SIGNATURE_SIZE:
+            raise ValueError(f"shred signature must be {SIGNATURE_SIZE} bytes, got {len(signature)}")
+        self.tx_ids.append(tx_id)
+        self.indices.append(index)
+        self.totals.append(total)
+        self.shred_types.append(shred_type)
+        self.fec_set_indices.append(fec_set_index)
+        self.num_data.append(num_data)
+        self.num_coding.append(num_coding)
+        self.flags.append(flags)
+        self.merkle_indices.append(merkle_index)
+        self.signatures += signature
+
+    def append(self, shred: Shred) -> None:
+        """
+        追加一个分片（复制其负载与证明）。
+
+        异常:
+            ValueError: 分片签名不是 64 字节（例如尚未签名）时抛出。
+        """
+        self._append_header(*shred.header_fields(), bytes(shred.signature), shred.merkle_index)
+        self.payloads += shred.payload
+        self.payload_offsets.append(len(self.payloads))
+        for node in shred.proof:
+            self.proofs += node
+        self.proof_offsets.append(self.proof_offsets[-1] + len(shred.proof))
+
+    def append_bytes(self, data) -> None:
+        """
+        直接从线路格式追加一个分片，不构造中间的 Shred 对象。
+
+        异常:
+            ValueError: 数据长度与头部声明不符时抛出。
+        """
+        view = memoryview(data)
+        if len(view) < SHRED_HEADER.size:
+            raise ValueError("shred is shorter than its header")
+        *fields, signature, merkle_index, proof_len, length = SHRED_HEADER.unpack_from(view)
+        start = SHRED_HEADER.size + proof_len * PROOF_NODE_SIZE
+        if len(view) < start + length:
+            raise ValueError("shred payload is truncated")
+        self._append_header(*fields, signature, merkle_index)
+        self.proofs += view[SHRED_HEADER.size:start]
+        self.proof_offsets.append(self.proof_offsets[-1] + proof_len)
+        self.payloads += view[start:start + length]
+        self.payload_offsets.append(len(self.payloads))
+
+    def __getitem__(self, i: int) -> Shred:
+        """
+        构造第 i 个分片的 Shred 对象，负载、签名与证明节点均为复制出的 bytes。
+        """
+        if i < 0:
+            i += len(self)
+        shred = Shred(self.indices[i], self.totals[i],
+                      bytes(self.payloads[self.payload_offsets[i]:self.payload_offsets[i + 1]]),
+                      self.shred_types[i], self.fec_set_indices[i], self.num_data[i],
+                      self.num_coding[i], self.tx_ids[i])
+        shred.flags = self.flags[i]
+        shred.signature = bytes(self.signatures[i * SIGNATURE_SIZE:(i + 1) * SIGNATURE_SIZE])
+        shred.merkle_index = self.merkle_indices[i]
+        first, last = self.proof_offsets[i], self.proof_offsets[i + 1]
+        shred.proof = [bytes(self.proofs[n * PROOF_NODE_SIZE:(n + 1) * PROOF_NODE_SIZE])
+                       for n in range(first, last)]
+        return shred
+
+    def __iter__(self) -> Iterator[Shred]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def nbytes(self) -> int:
+        """
+        返回各列占用的字节数（不含列对象本身的固定开销）。
+        """
+        columns = (self.tx_ids, self.indices, self.totals, self.shred_types, self.fec_set_indices,
+                   self.num_data, self.num_coding, self.flags, self.merkle_indices, self.payload_offsets,
+                   self.proof_offsets)
+        return (sum(len(c) * c.itemsize for c in columns)
+                + len(self.signatures) + len(self.payloads) + len(self.proofs))
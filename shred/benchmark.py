@@ -0,0 +1,121 @@
+"""
+分片微基准测试。
+
+用法:
+    python -m shred.benchmark
+    python -m shred.benchmark --memory
+
+测量不同 FEC 比例（N 个数据分片 : K 个编码分片）下，
+Reed-Solomon 编码与解码每 MB 数据的耗时和吞吐量。
+解码时丢弃集合中前 min(N, K) 个数据分片，即需要恢复的最坏情况。
+
+--memory 用 tracemalloc 比较持有大量已解析分片时的每分片内存：
+带 __dict__ 的对象（原先的布局）、__slots__ 的 Shred 与列式 ShredColumns。
+"""
+import argparse
+import os
+import time
+import tracemalloc
+
+from shred import fec
+from shred.batch import ShredColumns
+from shred.shred import Shred
+
+SHRED_LENGTH = 100  # 与 turbine.shredding.SHRED_LENGTH 保持一致
+FEC_RATIOS = [(8, 8), (16, 16), (32, 32), (32, 8), (64, 16)]
+DATA_SIZE = 1 << 20  # 每轮编码的数据量：1 MB
+
+def bench_fec(num_data: int, num_coding: int, size: int = DATA_SIZE):
+    """
+    返回 (编码 MB/s, 解码 MB/s)。
+
+    参数:
+        num_data (int): 每个 FEC 集合的数据分片数 N。
+        num_coding (int): 每个 FEC 集合的编码分片数 K。
+        size (int): 参与测试的数据总字节数。
+    """
+    set_bytes = num_data * SHRED_LENGTH
+    sets = [[os.urandom(SHRED_LENGTH) for _ in range(num_data)]
+            for _ in range(max(1, size // set_bytes))]
+    total = len(sets) * set_bytes / (1 << 20)
+
+    start = time.perf_counter()
+    coded = [fec.encode(blocks, num_coding) for blocks in sets]
+    encode_time = time.perf_counter() - start
+
+    lost = min(num_data, num_coding)
+    start = time.perf_counter()
+    for blocks, coding in zip(sets, coded):
+        received = {i: block for i, block in enumerate(blocks) if i >= lost}
+        received.update({num_data + j: block for j, block in enumerate(coding)})
+        assert fec.decode(num_data, received) == blocks
+    decode_time = time.perf_counter() - start
+    return total / encode_time, total / decode_time
+
+class _DictShred(Shred):
+    """
+    带每实例 __dict__ 的 Shred，用于对照原先的内存布局。
+    """
+
+
+def _traced(build):
+    """
+    返回 build() 的结果在 tracemalloc 下新占用的字节数。
+    """
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del result
+    return used
+
+
+def bench_memory(count: int = 100_000):
+    """
+    返回 [(布局, 每分片字节数)]。
+
+    模拟验证节点持有收到的分片：每个分片先编码为线路格式（负载长度为 SHRED_LENGTH，带 64 字节签名），
+    再解析为 Shred 对象或追加到 ShredColumns，只保留解析结果。
+    """
+    template = Shred(0, count, os.urandom(SHRED_LENGTH))
+    template.signature = os.urandom(64)
+
+    def wire(i):
+        template.index, template.tx_id = i, i // 64
+        return template.to_bytes()
+
+    def parse(cls):
+        return [cls.from_bytes(wire(i)) for i in range(count)]
+
+    def build_batch():
+        batch = ShredColumns()
+        for i in range(count):
+            batch.append_bytes(wire(i))
+        return batch
+
+    return [
+        ("dict", _traced(lambda: parse(_DictShred)) / count),
+        ("slots", _traced(lambda: parse(Shred)) / count),
+        ("batch", _traced(build_batch) / count),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Shred micro benchmarks")
+    parser.add_argument("--memory", action="store_true", help="测量每分片内存而不是 FEC 吞吐量")
+    parser.add_argument("--count", type=int, default=100_000, help="--memory 模式下的分片数")
+    args = parser.parse_args()
+
+    if args.memory:
+        print(f"{'layout':<8}{'bytes/shred':>14}")
+        for layout, per_shred in bench_memory(args.count):
+            print(f"{layout:<8}{per_shred:>14.1f}")
+        return
+    print(f"{'N:K':<8}{'encode MB/s':>14}{'decode MB/s':>14}{'encode ms/MB':>15}{'decode ms/MB':>15}")
+    for num_data, num_coding in FEC_RATIOS:
+        enc, dec = bench_fec(num_data, num_coding)
+        print(f"{num_data}:{num_coding:<5}{enc:>14.2f}{dec:>14.2f}{1000 / enc:>15.1f}{1000 / dec:>15.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+"""
+Reed-Solomon 纠删码（FEC）。
+
+每 N 个数据分片组成一个 FEC 集合，生成 K 个编码分片；
+收到集合中任意 N 个分片（数据或编码）即可恢复全部数据分片，无需等待重传。
+
+编码矩阵使用 GF(2^8) 上的 Cauchy 矩阵，任意 N 行线性无关，因此 N + K 不超过 256。
+字节块与常数的乘法通过 bytes.translate 查表完成，块之间的异或借助大整数一次完成，
+避免逐字节的 Python 循环。
+"""
+import struct
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .shred import CODING_SHRED, DATA_SHRED, Shred
+
+GF_POLY = 0x11D  # GF(2^8) 的本原多项式 x^8 + x^4 + x^3 + x^2 + 1
+MAX_FEC_SHREDS = 256  # 一个 FEC 集合中数据分片与编码分片的总数上限
+LENGTH_PREFIX = struct.Struct("<H")  # 编码前给每个数据负载加上的长度前缀
+
+# ---------------------- GF(2^8) 运算 ----------------------
+
+GF_EXP = [0] * 512
+GF_LOG = [0] * 256
+_x = 1
+for _i in range(255):
+    GF_EXP[_i] = _x
+    GF_LOG[_x] = _i
+    _x <<= 1
+    if _x & 0x100:
+        _x ^= GF_POLY
+for _i in range(255, 512):
+    GF_EXP[_i] = GF_EXP[_i - 255]
+
+def gf_mul(a: int, c: int) -> int:
+    """
+    GF(2^8) 乘法。
+    """
+    if a == 0 or c == 0:
+        return 0
+    return GF_EXP[GF_LOG[a] + GF_LOG[c]]
+
+def gf_inv(a: int) -> int:
+    """
+    GF(2^8) 乘法逆元。
+
+    异常:
+        ZeroDivisionError: a 为 0 时抛出。
+    """
+    if a == 0:
+        raise ZeroDivisionError("0 has no inverse in GF(256)")
+    return GF_EXP[255 - GF_LOG[a]]
+
+# MUL_TABLES[c] 是 bytes.translate 使用的 256 字节表：x -> c * x
+MUL_TABLES = [bytes(gf_mul(c, x) for x in range(256)) for c in range(256)]
+
+def cauchy(row: int, col: int, num_data: int) -> int:
+    """
+    Cauchy 编码矩阵第 row 个编码分片对第 col 个数据分片的系数 1 / (x_row + y_col)。
+    x_row = num_data + row, y_col = col，二者互不相同，因此分母非零。
+    """
+    return gf_inv((num_data + row) ^ col)
+
+def _xor_scaled(acc: int, coef: int, block: bytes) -> int:
+    """
+    返回 acc ^ (coef * block)，块以小端大整数表示。
+    """
+    if coef == 0:
+        return acc
+    if coef != 1:
+        block = block.translate(MUL_TABLES[coef])
+    return acc ^ int.from_bytes(block, "little")
+
+def _invert_matrix(matrix: List[List[int]]) -> List[bytes]:
+    """
+    GF(2^8) 上的高斯-约当消元求逆。
+
+    每行存为 bytes，行的缩放用 translate 查表，行之间的消元用大整数异或，
+    避免逐元素的 Python 循环。
+
+    返回:
+        List[bytes]: 逆矩阵的各行。
+
+    异常:
+        ValueError: 矩阵不可逆时抛出。
+    """
+    n = len(matrix)
+    width = 2 * n
+    rows = [bytes(row) + bytes(1 if i == j else 0 for j in range(n)) for i, row in enumerate(matrix)]
+    for col in range(n):
+        pivot = next((r for r in range(col, n) if rows[r][col]), None)
+        if pivot is None:
+            raise ValueError("FEC matrix is singular")
+        rows[col], rows[pivot] = rows[pivot], rows[col]
+        pivot_row = rows[col].translate(MUL_TABLES[gf_inv(rows[col][col])])
+        rows[col] = pivot_row
+        for r in range(n):
+            factor = rows[r][col]
+            if r != col and factor:
+                rows[r] = _xor_scaled(int.from_bytes(rows[r], "little"), factor,
+                                      pivot_row).to_bytes(width, "little")
+    return [row[n:] for row in rows]
+
+@lru_cache(maxsize=256)
+def _decode_matrix(num_data: int, positions: Tuple[int, ...]) -> List[bytes]:
+    """
+    返回由 positions 对应行组成的编码矩阵的逆矩阵。丢包模式往往重复出现，因此缓存结果。
+    """
+    matrix = []
+    for pos in positions:
+        if pos < num_data:
+            matrix.append([1 if col == pos else 0 for col in range(num_data)])
+        else:
+            matrix.append([cauchy(pos - num_data, col, num_data) for col in range(num_data)])
+    return _invert_matrix(matrix)
+
+# ---------------------- 字节块编解码 ----------------------
+
+def encode(blocks: Sequence[bytes], num_coding: int) -> List[bytes]:
+    """
+    为等长的数据块生成编码块。
+
+    参数:
+        blocks (Sequence[bytes]): N 个等长数据块。
+        num_coding (int): 编码块数量 K。
+
+    返回:
+        List[bytes]: K 个编码块，长度与数据块相同。
+    """
+    num_data = len(blocks)
+    if num_data + num_coding > MAX_FEC_SHREDS:
+        raise ValueError("too many shreds in one FEC set")
+    size = len(blocks[0])
+    coding = []
+    for row in range(num_coding):
+        acc = 0
+        for col, block in enumerate(blocks):
+            acc = _xor_scaled(acc, cauchy(row, col, num_data), block)
+        coding.append(acc.to_bytes(size, "little"))
+    return coding
+
+def decode(num_data: int, received: Dict[int, bytes]) -> List[bytes]:
+    """
+    从任意 N 个块恢复全部数据块。
+
+    参数:
+        num_data (int): 数据块数量 N。
+        received (Dict[int, bytes]): 位置 -> 块。位置 0..N-1 为数据块，N 起为编码块。
+
+    返回:
+        List[bytes]: N 个数据块。
+
+    异常:
+        ValueError: 收到的块少于 N 个时抛出。
+    """
+    if all(i in received for i in range(num_data)):
+        return [received[i] for i in range(num_data)]
+    if len(received) < num_data:
+        raise ValueError("not enough shreds to recover the FEC set")
+    # 优先使用数据块，其在矩阵中对应单位行
+    positions = tuple(sorted(received)[:num_data])
+    size = len(received[positions[0]])
+    inverse = _decode_matrix(num_data, positions)
+    blocks = []
+    for i in range(num_data):
+        if i in received:
+            blocks.append(received[i])
+            continue
+        acc = 0
+        for coef, pos in zip(inverse[i], positions):
+            acc = _xor_scaled(acc, coef, received[pos])
+        blocks.append(acc.to_bytes(size, "little"))
+    return blocks
+
+# ---------------------- 分片级接口 ----------------------
+
+def _framed(payload, size: int) -> bytes:
+    """
+    给数据负载加上长度前缀并补零到 size 字节，使恢复出的负载长度可还原。
+    """
+    framed = LENGTH_PREFIX.pack(len(payload)) + bytes(payload)
+    return framed + bytes(size - len(framed))
+
+def make_coding_shreds(data_shreds: Sequence[Shred], num_coding: int) -> List[Shred]:
+    """
+    为一个 FEC 集合的数据分片生成编码分片（未签名）。
+
+    参数:
+        data_shreds (Sequence[Shred]): 同一集合内按索引排列的数据分片。
+        num_coding (int): 编码分片数量 K。
+
+    返回:
+        List[Shred]: K 个编码分片，index 为 fec_set_index + 位置。
+    """
+    first = data_shreds[0]
+    size = LENGTH_PREFIX.size + max(len(s.payload) for s in data_shreds)
+    blocks = encode([_framed(s.payload, size) for s in data_shreds], num_coding)
+    return [
+        Shred(first.fec_set_index + j, first.total, block, CODING_SHRED,
+              first.fec_set_index, len(data_shreds), num_coding, first.tx_id)
+        for j, block in enumerate(blocks)
+    ]
+
+def recover_data_shreds(shreds: Sequence[Shred]) -> Optional[List[Shred]]:
+    """
+    用同一 FEC 集合中收到的分片恢复该集合的全部数据分片。
+
+    恢复出的数据分片没有签名，其可信性来自参与恢复的已验证分片。
+
+    参数:
+        shreds (Sequence[Shred]): 同一集合内已收到（并已验证）的分片。
+
+    返回:
+        Optional[List[Shred]]: 按索引排列的数据分片；分片不足 N 个时返回 None。
+    """
+    first = shreds[0]
+    num_data = first.num_data
+    fec_set_index = first.fec_set_index
+    data = {s.index - fec_set_index: s for s in shreds if s.shred_type == DATA_SHRED}
+    if len(data) == num_data:
+        return [data[i] for i in range(num_data)]
+    coding = {s.index - fec_set_index: s for s in shreds if s.shred_type == CODING_SHRED}
+    if len(data) + len(coding) < num_data:
+        return None
+    size = len(next(iter(coding.values())).payload)
+    received = {pos: _framed(s.payload, size) for pos, s in data.items()}
+    received.update({num_data + pos: bytes(s.payload) for pos, s in coding.items()})
+    recovered = []
+    for i, block in enumerate(decode(num_data, received)):
+        if i in data:
+            recovered.append(data[i])
+            continue
+        length, = LENGTH_PREFIX.unpack_from(block)
+        recovered.append(Shred(fec_set_index + i, first.total,
+                               block[LENGTH_PREFIX.size:LENGTH_PREFIX.size + length],
+                               DATA_SHRED, fec_set_index, num_data, first.num_coding, first.tx_id))
+    return recovered
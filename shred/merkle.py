@@ -0,0 +1,107 @@
+"""
+分片批次的 Merkle 树签名。
+
+领导者对一笔交易的全部分片（数据分片与编码分片）构建 Merkle 树，只对树根签名一次；
+每个分片携带自己的包含证明（从叶子到树根路径上的兄弟节点哈希）。
+验证节点对同一树根只验证一次签名，之后每个分片只需计算 log2(n) 次哈希。
+
+叶子与内部节点使用不同的前缀做域分离；某层节点数为奇数时，最后一个节点与自身配对。
+"""
+import hashlib
+from typing import List, Sequence
+
+LEAF_PREFIX = b"\x00"  # 叶子哈希前缀
+NODE_PREFIX = b"\x01"  # 内部节点哈希前缀
+MERKLE_SIGNED = 0x01  # 分片头部 flags 位：签名为 Merkle 树根签名（否则为逐片签名）
+
+def hash_leaf(data) -> bytes:
+    """
+    计算叶子哈希。
+    """
+    return hashlib.sha256(LEAF_PREFIX + bytes(data)).digest()
+
+def hash_node(left: bytes, right: bytes) -> bytes:
+    """
+    计算内部节点哈希。
+    """
+    return hashlib.sha256(NODE_PREFIX + left + right).digest()
+
+def build_tree(leaves: Sequence[bytes]) -> List[List[bytes]]:
+    """
+    自底向上构建 Merkle 树。
+
+    参数:
+        leaves (Sequence[bytes]): 叶子哈希列表，至少一个。
+
+    返回:
+        List[List[bytes]]: 各层节点，第 0 层为叶子，最后一层只有树根。
+    """
+    if not leaves:
+        raise ValueError("cannot build a Merkle tree without leaves")
+    levels = [list(leaves)]
+    while len(levels[-1]) > 1:
+        level = levels[-1]
+        levels.append([hash_node(level[i], level[i + 1] if i + 1 < len(level) else level[i])
+                       for i in range(0, len(level), 2)])
+    return levels
+
+def prove(levels: List[List[bytes]], index: int) -> List[bytes]:
+    """
+    返回第 index 个叶子的包含证明。
+
+    参数:
+        levels (List[List[bytes]]): build_tree 的结果。
+        index (int): 叶子序号。
+
+    返回:
+        List[bytes]: 自底向上的兄弟节点哈希。
+    """
+    proof = []
+    for level in levels[:-1]:
+        sibling = index ^ 1
+        proof.append(level[sibling] if sibling < len(level) else level[index])
+        index >>= 1
+    return proof
+
+def root_from_proof(leaf: bytes, index: int, proof: Sequence[bytes]) -> bytes:
+    """
+    由叶子哈希、叶子序号和包含证明计算树根。
+
+    参数:
+        leaf (bytes): 叶子哈希。
+        index (int): 叶子序号，决定每一层的左右位置。
+        proof (Sequence[bytes]): 自底向上的兄弟节点哈希。
+
+    返回:
+        bytes: 计算得到的树根。
+    """
+    node = leaf
+    for sibling in proof:
+        node = hash_node(sibling, node) if index & 1 else hash_node(node, sibling)
+        index >>= 1
+    return node
+
+def sign_shreds(shreds: Sequence, signing_key) -> bytes:
+    """
+    对一批分片构建 Merkle 树并只对树根签名一次。
+
+    每个分片先设置 MERKLE_SIGNED 标志（标志在叶子哈希覆盖范围内），再填充 merkle_index 与 proof，
+    signature 统一设为树根的签名。只有一个分片时树根即其叶子哈希，证明为空。
+
+    参数:
+        shreds (Sequence[Shred]): 同一交易（或 slot）的全部分片。
+        signing_key (SigningKey): 用于签名的密钥。
+
+    返回:
+        bytes: 树根。
+    """
+    for shred in shreds:
+        shred.flags |= MERKLE_SIGNED
+    levels = build_tree([shred.leaf_hash() for shred in shreds])
+    root = levels[-1][0]
+    signature = signing_key.sign(root).signature
+    for index, shred in enumerate(shreds):
+        shred.merkle_index = index
+        shred.proof = prove(levels, index)
+        shred.signature = signature
+    return root
@@ -56,8 +56,10 @@ print(transaction)  # 打印包含签名的交易数据
 
 recived_transaction = b''  # 初始化接收的交易数据
 
+total = (len(transaction_data) + 49) // 50  # 分片总数
 for i in range(0, len(transaction_data), 50):
-    shred = Shred(i // 50, 50, transaction_data[i:i+50], signing_key)  # 创建 Shred 对象
+    shred = Shred(i // 50, total, transaction_data[i:i+50])  # 创建 Shred 对象
+    shred.sign_shred(signing_key)  # 领导者节点:对分片签名
     print(shred)  # 领导者节点:发送分片数据
     print(shred.verify_shred(verify_key))  # 验证节点:验证分片签名
     recived_transaction += shred.payload  #  验证节点:组合接收到的分片数据
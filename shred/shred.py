@@ -1,31 +1,100 @@
-import base58
+import hashlib
+import struct
+
+from .merkle import MERKLE_SIGNED, hash_leaf, root_from_proof
+
+# 签名覆盖的头部字段: tx_id, index, total, shred_type, fec_set_index, num_data, num_coding, flags
+SIGNED_HEADER = struct.Struct("<QIIBIHHB")
+# 线路格式头部: 签名覆盖的字段, signature, merkle_index, 证明节点数, payload 长度
+# 头部之后依次是 32 字节的证明节点和原始负载
+SHRED_HEADER = struct.Struct("<QIIBIHHB64sIBI")
+PROOF_NODE_SIZE = 32  # Merkle 证明中每个节点哈希的长度
+
+DATA_SHRED = 0    # 数据分片
+CODING_SHRED = 1  # 编码（纠删码）分片
+
 class Shred:    
     """
     Shred类表示一个数据分片，并提供签名和验证功能。
     属性:
-        index (int): 分片的索引。
-        total (int): 分片的总数。
-        payload (str): 分片的数据负载。
-        signature (bytes): 分片的签名。
+        tx_id (int): 分片所属交易（或 slot）的编号。
+        index (int): 分片的索引。数据分片为其在交易中的序号，
+            编码分片为 fec_set_index 加上其在集合内的位置。
+        total (int): 交易的数据分片总数。
+        payload (bytes | memoryview): 分片的原始数据负载（from_bytes 解析得到的是 memoryview）。
+        signature (bytes): 分片的 64 字节签名。
+        shred_type (int): DATA_SHRED 或 CODING_SHRED。
+        fec_set_index (int): 所属 FEC 集合第一个数据分片的索引。
+        num_data (int): 所属 FEC 集合的数据分片数 N。
+        num_coding (int): 所属 FEC 集合的编码分片数 K。
+        flags (int): 头部标志位，MERKLE_SIGNED 表示 Merkle 批量签名模式。
+            标志位在签名覆盖范围内，单叶子树（证明为空）也不会被当作逐片签名。
+        merkle_index (int): Merkle 批量签名模式下分片在树中的叶子序号。
+        proof (list[bytes]): Merkle 包含证明，叶子数为 1 时为空。
     方法:
-        __init__(index, total, payload, signing_key):
-            初始化Shred对象，并对其进行签名。
+        __init__(index, total, payload, shred_type, fec_set_index, num_data, num_coding, tx_id):
+            初始化Shred对象。
         sign_shred(signing_key):
             对Shred头部和数据进行签名。
-        verify_shred(verify_key):
-            验证签名是否有效。
+        verify_shred(verify_key, verified_roots):
+            验证签名是否有效，Merkle 模式下同一树根只验证一次签名。
+        to_bytes():
+            序列化为定长头部 + 原始负载的二进制格式。
+        from_bytes(data):
+            从二进制格式解析，负载以 memoryview 切片零拷贝引用。
         __str__():
             返回Shred对象的字符串表示。
     """
-    def __init__(self, index, total, payload):
+    # 不使用每实例 __dict__，大量在途分片的内存开销更小
+    __slots__ = ("tx_id", "index", "total", "payload", "signature", "shred_type",
+                 "fec_set_index", "num_data", "num_coding", "flags", "merkle_index", "proof")
+
+    def __init__(self, index, total, payload, shred_type=DATA_SHRED,
+                 fec_set_index=0, num_data=0, num_coding=0, tx_id=0):
+        self.tx_id = tx_id
         self.index = index
         self.total = total
         self.payload = payload
-        self.signature = ""
+        self.signature = b""
+        self.shred_type = shred_type
+        self.fec_set_index = fec_set_index
+        self.num_data = num_data
+        self.num_coding = num_coding
+        self.flags = 0
+        self.merkle_index = 0
+        self.proof = []
+
+    def header_fields(self) -> tuple:
+        """
+        返回签名覆盖的头部字段。
+        """
+        return (self.tx_id, self.index, self.total, self.shred_type,
+                self.fec_set_index, self.num_data, self.num_coding, self.flags)
+
+    def signed_message(self) -> bytes:
+        """
+        返回需要签名的消息：打包的头部字段加原始负载。
+
+        返回:
+        bytes: 待签名的字节串
+        """
+        return SIGNED_HEADER.pack(*self.header_fields()) + bytes(self.payload)
+
+    def leaf_hash(self) -> bytes:
+        """
+        返回分片在 Merkle 树中的叶子哈希（覆盖与逐片签名相同的内容）。
+        """
+        return hash_leaf(self.signed_message())
+
+    def merkle_root(self) -> bytes:
+        """
+        由叶子哈希与包含证明计算 Merkle 树根。
+        """
+        return root_from_proof(self.leaf_hash(), self.merkle_index, self.proof)
         
     def sign_shred(self, signing_key):
         """
-        对Shred头部和数据进行签名
+        对Shred头部和数据进行签名（逐片签名模式，清除 MERKLE_SIGNED 标志）
 
         参数:
         signing_key (SigningKey): 用于签名的密钥
@@ -33,29 +102,91 @@ class Shred:
         返回:
         bytes: 签名后的字节串
         """
-        """对Shred头部和数据进行签名"""
-        message = f"{self.index}|{self.total}|{self.payload}".encode()
-        signature_data=signing_key.sign(message).signature
-        self.signature=base58.b58encode(signature_data).decode()
+        self.flags &= ~MERKLE_SIGNED
+        self.signature = signing_key.sign(self.signed_message()).signature
+        return self.signature
     
-    def verify_shred(self, verify_key):
+    def verify_shred(self, verify_key, verified_roots=None):
         """
         验证分片签名
 
+        按头部 flags 选择模式。逐片签名模式下直接验证分片签名；Merkle 模式下先由包含证明计算树根，
+        树根已在 verified_roots 中时只需几次哈希，否则验证树根签名并记入缓存。
+        逐片签名模式下缓存键为 (公钥, 签名, 消息摘要)，重复收到的分片不再验证。
+
         参数:
         verify_key (VerifyKey): 用于验证签名的公钥
+        verified_roots (set | SignatureCache | None): 已验证通过的签名缓存
 
         返回:
         bool: 如果签名验证成功返回 True，否则返回 False
         """
-        """验证签名"""
-        message = f"{self.index}|{self.total}|{self.payload}".encode()
-        try:
-            verify_signature=base58.b58decode(self.signature)
-            verify_key.verify(message, verify_signature)
+        signature = bytes(self.signature)
+        if not self.flags & MERKLE_SIGNED:
+            message = self.signed_message()
+            key = (bytes(verify_key), signature, hashlib.sha256(message).digest())
+        else:
+            message = self.merkle_root()
+            key = (bytes(verify_key), message)
+        if verified_roots is not None and key in verified_roots:
             return True
+        try:
+            verify_key.verify(message, signature)
         except:
             return False
+        if verified_roots is not None:
+            verified_roots.add(key)
+        return True
+
+    def to_bytes(self) -> bytes:
+        """
+        序列化为线路格式：定长头部 (签名覆盖的字段含 flags, signature, merkle_index, 证明节点数, length)
+        后接 Merkle 证明节点与原始负载。
+
+        返回:
+        bytes: 序列化后的字节串
+        """
+        header = SHRED_HEADER.pack(*self.header_fields(), self.signature,
+                                   self.merkle_index, len(self.proof), len(self.payload))
+        return header + b"".join(self.proof) + self.payload
+
+    @classmethod
+    def from_bytes(cls, data) -> "Shred":
+        """
+        从线路格式解析 Shred。负载是对 data 的 memoryview 切片，不发生拷贝；
+        分片存活期间整条线路消息随之驻留，需要长期持有负载的使用方自行复制
+        （ReassemblyBuffer 写入交易缓冲区时复制），需要大量持有分片时用 ShredColumns。
+        32 字节的证明节点复制为 bytes，比每个节点一个 memoryview 更省内存。
+
+        参数:
+        data (bytes | bytearray | memoryview): to_bytes 生成的字节串
+
+        返回:
+        Shred: 解析得到的分片
+
+        异常:
+        ValueError: 数据长度与头部声明不符或含有未知标志位时抛出。
+        """
+        view = memoryview(data)
+        if len(view) < SHRED_HEADER.size:
+            raise ValueError("shred is shorter than its header")
+        *fields, signature, merkle_index, proof_len, length = SHRED_HEADER.unpack_from(view)
+        start = SHRED_HEADER.size + proof_len * PROOF_NODE_SIZE
+        end = start + length
+        if len(view) < end:
+            raise ValueError("shred payload is truncated")
+        tx_id, index, total, shred_type, fec_set_index, num_data, num_coding, flags = fields
+        if flags & ~MERKLE_SIGNED:
+            raise ValueError(f"unknown shred flags {flags:#x}")
+        shred = cls(index, total, view[start:end], shred_type,
+                    fec_set_index, num_data, num_coding, tx_id)
+        shred.flags = flags
+        shred.signature = signature
+        shred.merkle_index = merkle_index
+        shred.proof = [bytes(view[offset:offset + PROOF_NODE_SIZE])
+                       for offset in range(SHRED_HEADER.size, start, PROOF_NODE_SIZE)]
+        return shred
         
     def __str__(self):
-        return f"Shred({self.index}, {self.total}, {self.payload}, {self.signature})"
\ No newline at end of file
+        kind = "data" if self.shred_type == DATA_SHRED else "coding"
+        return f"Shred({kind}, {self.tx_id}, {self.index}, {self.total}, {bytes(self.payload)}, {self.signature.hex()})"
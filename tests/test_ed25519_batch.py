@@ -0,0 +1,57 @@
+"""
+checkvalid_batch 与 checkvalid 的一致性，包括 R / A 含小阶（挠）分量的签名。
+
+运行:
+    python -m pytest tests
+"""
+import os
+
+import pytest
+
+from ed25519 import ed255191 as ed
+from torsion import T8, keypair, mixed_items, reference, sign_with
+
+
+def test_order8_point():
+    assert ed.cofactorzero(T8)
+    assert not ed.pointequal(ed.scalarmult(T8, 4), ed.ident)
+
+
+def test_same_torsion_component_in_R():
+    # 两个 R 带相同的 8 阶分量：随机系数为奇数时曾让批量结果与逐个验证不一致
+    sk, pk = keypair()
+    items = []
+    for _ in range(2):
+        m = os.urandom(32)
+        s, key = sign_with(m, sk, pk, R_torsion=T8)
+        items.append((s, m, key))
+    expected = reference(items)
+    for _ in range(50):
+        assert ed.checkvalid_batch(items) == expected
+
+
+def test_torsion_with_bad_S_is_rejected():
+    sk, pk = keypair()
+    items = []
+    for _ in range(2):
+        m = os.urandom(32)
+        s, key = sign_with(m, sk, pk, R_torsion=T8, bump_S=1)
+        items.append((s, m, key))
+    assert reference(items) == [False, False]
+    for _ in range(20):
+        assert ed.checkvalid_batch(items) == [False, False]
+
+
+def test_mixed_batch_matches_checkvalid():
+    items = mixed_items(80)
+    expected = reference(items)
+    assert True in expected and False in expected
+    for _ in range(3):
+        assert ed.checkvalid_batch(items) == expected
+
+
+def test_vectorized_matches_checkvalid():
+    pytest.importorskip("numpy")
+    from ed25519 import vectorized
+    items = mixed_items(vectorized.VECTORIZE_MIN_BATCH + 6)
+    assert vectorized.checkvalid_vectorized(items) == reference(items)
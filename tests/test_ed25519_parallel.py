@@ -0,0 +1,13 @@
+"""
+ParallelVerifier 的结果与逐个 checkvalid 一致。
+"""
+from ed25519.parallel import ParallelVerifier
+from torsion import mixed_items, reference
+
+
+def test_parallel_matches_checkvalid():
+    items = mixed_items(90)
+    expected = reference(items)
+    with ParallelVerifier(workers=2, chunksize=16) as verifier:
+        assert verifier.verify(items) == expected
+        assert list(verifier.verify_iter(items)) == expected
@@ -0,0 +1,86 @@
+"""
+领导者流水线的任一阶段出错时，消费者收到已完成的交易后得到该异常，而不是一直等待。
+"""
+import asyncio
+import itertools
+import queue
+
+import pytest
+from nacl.signing import SigningKey
+
+from turbine import pipeline, shredding
+from turbine.broadcast import BroadcastHub
+from turbine.pipeline import LeaderPipeline
+
+
+@pytest.fixture(autouse=True)
+def signing_key(monkeypatch):
+    key = SigningKey.generate()
+    monkeypatch.setattr(shredding, "get_signkey", lambda: key)
+    return key
+
+
+@pytest.fixture
+def failing_shredder(monkeypatch):
+    create_shreds = shredding.create_shreds
+
+    def shred(data, tx_id=0):
+        if tx_id == 2:
+            raise ValueError("cannot shred")
+        return create_shreds(data, tx_id=tx_id)
+
+    monkeypatch.setattr(pipeline, "create_shreds", shred)
+
+
+def _failing_source():
+    yield from itertools.repeat(shredding.transaction, 2)
+    raise OSError("source failed")
+
+
+def test_shred_stage_error_reaches_consumer(failing_shredder):
+    leader = LeaderPipeline(itertools.repeat(shredding.transaction), report_interval=0)
+    delivered = []
+    with pytest.raises(ValueError, match="cannot shred"):
+        for items in leader.batches():
+            delivered.append(items)
+    assert len(delivered) == 2
+    assert isinstance(leader.error, ValueError)
+
+
+def test_source_error_reaches_coalesced_consumer():
+    leader = LeaderPipeline(_failing_source(), report_interval=0)
+    with pytest.raises(OSError, match="source failed"):
+        for _ in leader.coalesced():
+            pass
+    assert leader.stats.transactions == 2
+
+
+def test_async_consumer_sees_error(failing_shredder):
+    async def consume():
+        leader = LeaderPipeline(itertools.repeat(shredding.transaction), report_interval=0,
+                                loop=asyncio.get_running_loop())
+        async for _ in leader.async_batches():
+            pass
+
+    with pytest.raises(ValueError, match="cannot shred"):
+        asyncio.run(asyncio.wait_for(consume(), 10))
+
+
+def test_broadcast_subscribers_see_error(failing_shredder):
+    hub = BroadcastHub(itertools.repeat(shredding.transaction))
+    with pytest.raises(ValueError, match="cannot shred"):
+        for _ in hub.subscribe():
+            pass
+    hub.close()
+
+
+def test_queue_source_stops_on_close():
+    source = queue.Queue()
+    source.put(shredding.transaction)
+    leader = LeaderPipeline(source, report_interval=0)
+    batches = leader.batches()
+    assert next(batches)
+    batches.close()
+    for thread in leader._threads:
+        thread.join(timeout=2)
+    assert not any(thread.is_alive() for thread in leader._threads)
@@ -0,0 +1,50 @@
+"""
+重启后重放存储的分片，新流重用同一 tx_id 时交易不混合、不被挡住。
+"""
+import pytest
+from nacl.signing import SigningKey
+
+from turbine import shredding
+from turbine.reassembly import ReassemblyBuffer
+from turbine.store import ShredStore, replay
+
+OLD = b"o" * 3000
+NEW = b"n" * 3000  # 与 OLD 等长，total 相同
+
+
+@pytest.fixture(autouse=True)
+def signing_key(monkeypatch):
+    key = SigningKey.generate()
+    monkeypatch.setattr(shredding, "get_signkey", lambda: key)
+    return key
+
+
+def _feed(reassembly, shreds):
+    return [done for done in map(reassembly.add, shreds) if done is not None]
+
+
+@pytest.mark.parametrize("merkle_signing", [True, False])
+def test_replay_then_reused_tx_ids(tmp_path, merkle_signing):
+    finished = shredding.create_shreds(OLD, merkle_signing=merkle_signing, tx_id=0)
+    partial = shredding.create_shreds(OLD, merkle_signing=merkle_signing, tx_id=1)[:3]
+    store = ShredStore(str(tmp_path))
+    for shred in finished + partial:
+        store.append(shred.to_bytes())
+
+    reassembly = ReassemblyBuffer()
+    assert replay(store, reassembly) == [(0, OLD)]
+    store.close()
+    fresh = [shredding.create_shreds(NEW, merkle_signing=merkle_signing, tx_id=tx_id) for tx_id in (0, 1)]
+    assert _feed(reassembly, fresh[0] + fresh[1]) == [(0, NEW), (1, NEW)]
+
+
+def test_replayed_merkle_transaction_is_completed_by_new_stream(tmp_path):
+    shreds = shredding.create_shreds(OLD, merkle_signing=True, tx_id=4)
+    store = ShredStore(str(tmp_path))
+    for shred in shreds[:3]:
+        store.append(shred.to_bytes())
+
+    reassembly = ReassemblyBuffer()
+    assert replay(store, reassembly) == []
+    store.close()
+    assert _feed(reassembly, shreds[3:]) == [(4, OLD)]
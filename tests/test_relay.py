@@ -0,0 +1,56 @@
+"""
+树形转发的子节点队列有界：慢子节点按策略被断开或丢弃最早的分片，不阻塞发布。
+"""
+import pytest
+
+from turbine.broadcast import DROP, LAG
+from turbine.node import RelayService, _Subscriber
+
+
+def _relay(policy, capacity=2):
+    relay = RelayService(capacity=capacity, policy=policy)
+    slow, fast = _Subscriber(capacity), _Subscriber(capacity)
+    relay._subscribers.extend([slow, fast])
+    return relay, slow, fast
+
+
+def _drain(subscriber):
+    items = []
+    while not subscriber.queue.empty():
+        items.append(subscriber.queue.get_nowait())
+    return items
+
+
+def test_drop_disconnects_slow_subscriber():
+    relay, slow, fast = _relay(DROP)
+    for item in range(2):
+        relay.publish(item)
+    assert _drain(fast) == [0, 1]
+    relay.publish(2)
+    assert slow.closed and slow.dropped
+    assert fast.queue.get_nowait() == 2
+    assert relay.stats()["dropped_subscribers"] == 1
+
+
+def test_lag_drops_oldest_shreds():
+    relay, slow, fast = _relay(LAG)
+    for item in range(5):
+        relay.publish(item)
+        assert _drain(fast) == [item]
+    assert not slow.closed
+    assert _drain(slow) == [3, 4]
+    assert slow.lagged == 3 and relay.stats()["lagged_shreds"] == 3
+
+
+def test_close_keeps_queued_shreds():
+    relay, slow, _ = _relay(DROP, capacity=4)
+    relay.publish(0)
+    relay.close()
+    assert relay.backlog() == 2
+    assert _drain(slow) == [0, None]
+    assert not slow.closed
+
+
+def test_unknown_policy():
+    with pytest.raises(ValueError):
+        RelayService(policy="block")
@@ -0,0 +1,44 @@
+"""
+领导者在收到第一次额度前照常发送，这些分片不消耗之后授予的额度。
+"""
+import queue
+import threading
+
+from grpc_gen import sync_pb2
+from turbine.repair import RepairSession
+
+
+def _requests(source):
+    while True:
+        request = source.get()
+        if request is None:
+            return
+        yield request
+
+
+def _wait_for(session, credits):
+    with session._cond:
+        return session._cond.wait_for(lambda: session.credits == credits, timeout=5)
+
+
+def test_credits_start_after_flow_control_is_enabled():
+    requests = queue.Queue()
+    session = RepairSession(_requests(requests))
+    assert [list(session.transmit(item)) for item in range(3)] == [[0], [1], [2]]
+    assert session.credits == 0 and not session.flow_control
+
+    requests.put(sync_pb2.SyncRequest(credits=2))
+    assert _wait_for(session, 2)
+    assert [list(session.transmit(item)) for item in (3, 4)] == [[3], [4]]
+    assert session.credits == 0
+
+    sent = []
+    sender = threading.Thread(target=lambda: sent.extend(session.transmit(5)))
+    sender.start()
+    sender.join(timeout=0.1)
+    assert sender.is_alive()  # 额度用完，暂停发送
+    requests.put(sync_pb2.SyncRequest(credits=1))
+    sender.join(timeout=5)
+    assert sent == [5]
+    requests.put(None)
+    session.close()
@@ -0,0 +1,72 @@
+"""
+分片签名模式由头部 flags 决定：单叶子 Merkle 树与空交易都能签名、验证并重组。
+"""
+import pytest
+from nacl.signing import SigningKey
+
+from shred.batch import ShredColumns
+from shred.merkle import MERKLE_SIGNED
+from shred.shred import Shred
+from turbine import shredding
+from turbine.reassembly import ReassemblyBuffer
+
+
+@pytest.fixture
+def signing_key(monkeypatch):
+    key = SigningKey.generate()
+    monkeypatch.setattr(shredding, "get_signkey", lambda: key)
+    return key
+
+
+def _roundtrip(shreds, verify_key):
+    received = [Shred.from_bytes(shred.to_bytes()) for shred in shreds]
+    assert all(shred.verify_shred(verify_key, set()) for shred in received)
+    buffer = ReassemblyBuffer()
+    done = [result for result in map(buffer.add, received) if result is not None]
+    return received, done
+
+
+@pytest.mark.parametrize("merkle_signing", [True, False])
+def test_single_shred(signing_key, merkle_signing):
+    shreds = shredding.create_shreds(b"x" * 50, 32, 0, merkle_signing, tx_id=3)
+    assert len(shreds) == 1
+    received, done = _roundtrip(shreds, signing_key.verify_key)
+    assert bool(received[0].flags & MERKLE_SIGNED) == merkle_signing
+    assert received[0].proof == []
+    assert done == [(3, b"x" * 50)]
+
+
+@pytest.mark.parametrize("merkle_signing", [True, False])
+def test_empty_transaction(signing_key, merkle_signing):
+    shreds = shredding.create_shreds(b"", merkle_signing=merkle_signing, tx_id=5)
+    data = [shred for shred in shreds if shred.payload == b"" and shred.index == 0]
+    assert data and data[0].total == 1
+    _, done = _roundtrip(shreds, signing_key.verify_key)
+    assert done == [(5, b"")]
+
+
+def test_flags_are_signed(signing_key):
+    shred, = shredding.create_shreds(b"x" * 50, 32, 0, True)
+    raw = bytearray(shred.to_bytes())
+    raw[25] &= ~MERKLE_SIGNED  # flags 字节：把单叶子 Merkle 分片伪装成逐片签名
+    assert not Shred.from_bytes(raw).verify_shred(signing_key.verify_key, set())
+    raw[25] = 0x80
+    with pytest.raises(ValueError):
+        Shred.from_bytes(raw)
+
+
+def test_columns_keep_flags(signing_key):
+    shreds = shredding.create_shreds(b"y" * 3000, merkle_signing=True)
+    columns = ShredColumns()
+    for shred in shreds:
+        columns.append_bytes(shred.to_bytes())
+    assert [s.to_bytes() for s in columns] == [s.to_bytes() for s in shreds]
+    assert all(s.verify_shred(signing_key.verify_key, set()) for s in columns)
+
+
+def test_from_bytes_does_not_copy_payload(signing_key):
+    raw = shredding.create_shreds(b"z" * 3000, merkle_signing=True)[0].to_bytes()
+    shred = Shred.from_bytes(raw)
+    assert isinstance(shred.payload, memoryview) and shred.payload.obj is raw
+    assert shred.to_bytes() == raw
+    assert shred.verify_shred(signing_key.verify_key, set())
@@ -0,0 +1,71 @@
+"""
+验证节点的接收路径丢弃并统计无法解析的分片，返回时取消响应流。
+"""
+import asyncio
+
+import pytest
+from nacl.signing import SigningKey
+
+from grpc_gen import sync_pb2
+from turbine import shredding, validator
+
+TRANSACTION = bytes(range(256)) * 12
+
+
+class FakeCall:
+    """
+    模拟 gRPC 响应流：按顺序返回给定的消息，记录是否被取消。
+    """
+
+    def __init__(self, messages):
+        self.messages = messages
+        self.cancelled = False
+
+    def __iter__(self):
+        return iter(self.messages)
+
+    async def __aiter__(self):
+        for message in self.messages:
+            yield message
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class FakeStub:
+    def __init__(self, shreds):
+        self.shreds = shreds
+        self.calls = []
+
+    def BiStream(self, requests):
+        call = FakeCall([sync_pb2.SyncResponse(success=True, shred=raw) for raw in self.shreds])
+        self.calls.append(call)
+        return call
+
+    def BatchStream(self, requests):
+        call = FakeCall([sync_pb2.ShredBatch(shreds=self.shreds)])
+        self.calls.append(call)
+        return call
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    key = SigningKey.generate()
+    monkeypatch.setattr(shredding, "get_signkey", lambda: key)
+    monkeypatch.setattr(validator, "get_verify_key", lambda: key.verify_key)
+    raws = [shred.to_bytes() for shred in shredding.create_shreds(TRANSACTION)]
+    malformed = [b"", raws[0][:40], raws[0][:-1], bytes(10) + raws[0][10:25] + b"\x80" + raws[0][26:]]
+    return FakeStub(malformed + raws)
+
+
+@pytest.mark.parametrize("receive", [
+    lambda stub, stats: validator.process_responses(stub, verbose=False, stats=stats),
+    lambda stub, stats: validator.process_responses_repair(stub, stats=stats),
+    lambda stub, stats: validator.process_batches(stub, stats=stats),
+    lambda stub, stats: asyncio.run(validator.process_responses_aio(stub, stats=stats)),
+])
+def test_malformed_shreds_are_dropped(stub, receive):
+    stats = {}
+    assert receive(stub, stats) == TRANSACTION
+    assert stats["malformed"] == 4
+    assert all(call.cancelled for call in stub.calls)
@@ -0,0 +1,82 @@
+"""
+构造 R / A 含小阶（挠）分量的 Ed25519 签名，供一致性测试使用。
+"""
+import itertools
+import os
+
+from ed25519 import ed255191 as ed
+
+
+def order8_point():
+    """
+    返回一个阶为 8 的点：对曲线上的点乘以 l 得到小阶分量，直到其阶恰为 8。
+    """
+    for y in itertools.count(2):
+        try:
+            P = ed.decodepoint(ed.encodeint(y))
+        except Exception:
+            continue
+        T = ed.scalarmult(P, ed.l)
+        if not ed.pointequal(ed.scalarmult(T, 4), ed.ident):
+            return T
+
+
+T8 = order8_point()
+
+
+def keypair():
+    sk = os.urandom(32)
+    return sk, ed.publickey(sk)
+
+
+def sign_with(m, sk, pk, R_torsion=None, A_torsion=None, bump_S=0):
+    """
+    与 ed.signature 相同，但可以给 R 或公钥 A 加上小阶分量，或把 S 加上 bump_S。返回 (签名, 公钥)。
+    """
+    h = ed.H(sk)
+    a = ed.secretscalar(h)
+    if A_torsion is not None:
+        pk = ed.encodepoint(ed.edwards(ed.scalarmult_B(a), A_torsion))
+    r = ed.Hint(h[ed.b // 8:ed.b // 4] + m)
+    R = ed.scalarmult_B(r)
+    if R_torsion is not None:
+        R = ed.edwards(R, R_torsion)
+    Rs = ed.encodepoint(R)
+    S = (r + ed.Hint(Rs + pk + m) * a + bump_S) % ed.l
+    return Rs + ed.encodeint(S), pk
+
+
+def reference(items):
+    results = []
+    for s, m, pk in items:
+        try:
+            results.append(ed.checkvalid(s, m, pk))
+        except Exception:
+            results.append(False)
+    return results
+
+
+def mixed_items(count):
+    """
+    依次混合有效、消息被篡改、R 含挠分量、A 含挠分量以及含挠分量且 S 错误的签名。
+    """
+    sk, pk = keypair()
+    items = []
+    for i in range(count):
+        m = os.urandom(40)
+        kind = i % 6
+        if kind == 0:
+            s, key = sign_with(m, sk, pk)
+        elif kind == 1:
+            s, key = sign_with(m, sk, pk)
+            m = m[:-1] + bytes([m[-1] ^ 1])
+        elif kind == 2:
+            s, key = sign_with(m, sk, pk, R_torsion=T8)
+        elif kind == 3:
+            s, key = sign_with(m, sk, pk, A_torsion=T8)
+        elif kind == 4:
+            s, key = sign_with(m, sk, pk, R_torsion=T8, bump_S=1)
+        else:
+            s, key = sign_with(m, sk, pk, R_torsion=ed.scalarmult(T8, 3 + i % 4))
+        items.append((s, m, key))
+    return items
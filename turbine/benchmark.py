@@ -0,0 +1,251 @@
+"""
+领导者/验证节点的回环基准测试，领导者运行在独立进程中。
+
+- streams：比较线程池 gRPC（grpc.server + 阻塞客户端线程）与 grpc.aio（单事件循环）两种模式，
+  客户端同时打开 N 个流，记录每个流从发起到重组出第一笔交易的延迟。aio 服务的全部流共享一个
+  BroadcastHub，线程池的 StreamService 则为每个流单独签名、分片，工作量不同（见 work 列）；
+  thread-hub 是共享 BroadcastHub 的线程池服务，与 aio 只有服务模型不同；
+- batching：比较每条消息一个分片的 BiStream 与合并发送的 BatchStream，
+  客户端接收并解析 T 笔交易的全部分片，记录吞吐量；
+- broadcast：比较每个流独立签名编码与 BroadcastHub 一次编码两种模式，
+  N 个订阅者各接收相同数量的分片，记录领导者进程消耗的 CPU 时间。
+
+用法（运行目录下需要有 config.yml）:
+    python -m turbine.benchmark --streams 10 50 200
+    python -m turbine.benchmark --mode batching --transactions 500
+    python -m turbine.benchmark --mode broadcast --subscribers 1 4 8
+"""
+import argparse
+import asyncio
+import itertools
+import multiprocessing
+import threading
+import time
+from typing import List
+
+import grpc
+
+from grpc_gen import sync_pb2_grpc
+from shred.shred import Shred
+from turbine.harness import percentile
+from turbine.broadcast import LAG
+from turbine.leader import start_aio_server, start_broadcast_server, start_server
+from turbine.shredding import transaction
+from turbine.validator import process_responses, process_responses_aio
+
+BASE_PORT = 50060  # 基准测试使用的端口
+STREAM_MODES = (  # streams 基准的 (模式, 工作量)；thread-hub 与 aio 的工作量相同
+    ("thread", "per-stream"),
+    ("thread-hub", "shared"),
+    ("aio", "shared"),
+)
+
+
+def _run_leader(mode: str, address: str, ready, transactions=None) -> None:
+    """
+    领导者进程入口。transactions 为 None 时每个流无限重复示例交易，否则只发送该笔数。
+    """
+    source_factory = None
+    if transactions is not None:
+        source_factory = lambda: itertools.repeat(transaction, transactions)
+    if mode == "aio":
+        async def run():
+            server = await start_aio_server(address, source_factory, report_interval=0)
+            ready.set()
+            await server.wait_for_termination()
+        asyncio.run(run())
+    elif mode == "thread-hub":
+        source = None if transactions is None else source_factory()
+        server, _hub = start_broadcast_server(address, source, policy=LAG, report_interval=0)
+        ready.set()
+        server.wait_for_termination()
+    else:
+        server = start_server(address, source_factory, report_interval=0)
+        ready.set()
+        server.wait_for_termination()
+
+
+def run_threaded_clients(address: str, streams: int) -> List[float]:
+    """
+    每个流一个客户端线程，共享一个通道。返回各流的延迟（秒）。
+    """
+    channel = grpc.insecure_channel(address)
+    grpc.channel_ready_future(channel).result(timeout=10)
+    stub = sync_pb2_grpc.StreamServiceStub(channel)
+    latencies: List[float] = []
+    lock = threading.Lock()
+
+    def client():
+        start = time.perf_counter()
+        process_responses(stub, verbose=False)
+        with lock:
+            latencies.append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=client) for _ in range(streams)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    channel.close()
+    return latencies
+
+
+async def run_aio_clients(address: str, streams: int) -> List[float]:
+    """
+    全部流运行在同一个事件循环中，共享一个 grpc.aio 通道。返回各流的延迟（秒）。
+    """
+    async with grpc.aio.insecure_channel(address) as channel:
+        await channel.channel_ready()
+        stub = sync_pb2_grpc.StreamServiceStub(channel)
+
+        async def client():
+            start = time.perf_counter()
+            await process_responses_aio(stub)
+            return time.perf_counter() - start
+
+        return list(await asyncio.gather(*(client() for _ in range(streams))))
+
+
+def receive_all(address: str, batched: bool) -> tuple:
+    """
+    接收并解析一个流的全部分片。返回 (分片数, 消息数, 秒)。
+    """
+    channel = grpc.insecure_channel(address)
+    grpc.channel_ready_future(channel).result(timeout=10)
+    stub = sync_pb2_grpc.StreamServiceStub(channel)
+    shreds = messages = 0
+    start = time.perf_counter()
+    if batched:
+        for batch in stub.BatchStream(iter([])):
+            messages += 1
+            for raw in batch.shreds:
+                Shred.from_bytes(raw)
+                shreds += 1
+    else:
+        for response in stub.BiStream(iter([])):
+            messages += 1
+            Shred.from_bytes(response.shred)
+            shreds += 1
+    elapsed = time.perf_counter() - start
+    channel.close()
+    return shreds, messages, elapsed
+
+
+def run_batching(transactions: int) -> None:
+    """
+    比较 BiStream 与 BatchStream 的回环吞吐量。
+    """
+    ctx = multiprocessing.get_context("spawn")
+    address = f"localhost:{BASE_PORT + 5}"
+    ready = ctx.Event()
+    leader = ctx.Process(target=_run_leader, args=("thread", address, ready, transactions), daemon=True)
+    leader.start()
+    ready.wait(timeout=30)
+    print(f"{'stream':<12}{'shreds':>8}{'messages':>10}{'s':>8}{'shreds/s':>12}")
+    try:
+        for name, batched in (("BiStream", False), ("BatchStream", True)):
+            shreds, messages, elapsed = receive_all(address, batched)
+            print(f"{name:<12}{shreds:>8}{messages:>10}{elapsed:>8.2f}{shreds / elapsed:>12.0f}")
+    finally:
+        leader.terminate()
+        leader.join()
+
+
+def _run_cpu_reporting_leader(mode: str, address: str, ready, cpu) -> None:
+    """
+    广播基准的领导者进程入口：定期把本进程的 CPU 时间写入共享变量 cpu。
+    """
+    if mode == "broadcast":
+        server, _hub = start_broadcast_server(address, report_interval=0)
+    else:
+        server = start_server(address, report_interval=0)
+    ready.set()
+    while server.wait_for_termination(timeout=0.05):  # 超时返回 True，进程被终止前一直运行
+        cpu.value = time.process_time()
+
+
+def receive_count(address: str, count: int) -> None:
+    """
+    打开一个流，接收 count 个分片后断开。
+    """
+    channel = grpc.insecure_channel(address)
+    responses = sync_pb2_grpc.StreamServiceStub(channel).BiStream(iter([]))
+    for received, _ in enumerate(responses, start=1):
+        if received >= count:
+            break
+    responses.cancel()
+    channel.close()
+
+
+def run_broadcast(subscriber_counts: List[int], shreds: int) -> None:
+    """
+    比较逐流编码与一次编码广播的领导者 CPU 开销。
+    """
+    ctx = multiprocessing.get_context("spawn")
+    print(f"{'mode':<12}{'subscribers':>12}{'leader cpu s':>14}{'cpu ms/1k shreds':>18}")
+    for port, mode in enumerate(("per-stream", "broadcast"), start=BASE_PORT + 3):
+        address = f"localhost:{port}"
+        ready = ctx.Event()
+        cpu = ctx.Value("d", 0.0)
+        leader = ctx.Process(target=_run_cpu_reporting_leader, args=(mode, address, ready, cpu), daemon=True)
+        leader.start()
+        ready.wait(timeout=30)
+        try:
+            for subscribers in subscriber_counts:
+                time.sleep(0.2)
+                before = cpu.value
+                threads = [threading.Thread(target=receive_count, args=(address, shreds))
+                           for _ in range(subscribers)]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+                time.sleep(0.2)  # 等待共享变量更新
+                used = cpu.value - before
+                print(f"{mode:<12}{subscribers:>12}{used:>14.2f}{used * 1e6 / (shreds * subscribers):>18.2f}")
+        finally:
+            leader.terminate()
+            leader.join()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Turbine loopback benchmarks")
+    parser.add_argument("--mode", choices=("streams", "batching", "broadcast"), default="streams",
+                        help="基准测试类型")
+    parser.add_argument("--streams", type=int, nargs="+", default=[10, 50, 200], help="并发流数")
+    parser.add_argument("--transactions", type=int, default=500, help="batching 模式下每个流的交易笔数")
+    parser.add_argument("--subscribers", type=int, nargs="+", default=[1, 4, 8], help="broadcast 模式下的订阅者数")
+    parser.add_argument("--shreds", type=int, default=7200, help="broadcast 模式下每个订阅者接收的分片数")
+    args = parser.parse_args()
+
+    if args.mode == "broadcast":
+        run_broadcast(args.subscribers, args.shreds)
+        return
+    if args.mode == "batching":
+        run_batching(args.transactions)
+        return
+    ctx = multiprocessing.get_context("spawn")
+    print(f"{'mode':<12}{'work':<12}{'streams':>8}{'wall s':>10}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for port, (mode, work) in enumerate(STREAM_MODES, start=BASE_PORT):
+        address = f"localhost:{port}"
+        ready = ctx.Event()
+        leader = ctx.Process(target=_run_leader, args=(mode, address, ready), daemon=True)
+        leader.start()
+        ready.wait(timeout=30)
+        try:
+            for streams in args.streams:
+                start = time.perf_counter()
+                if mode == "aio":
+                    latencies = asyncio.run(run_aio_clients(address, streams))
+                else:
+                    latencies = run_threaded_clients(address, streams)
+                wall = time.perf_counter() - start
+                print(f"{mode:<12}{work:<12}{streams:>8}{wall:>10.2f}"
+                      + "".join(f"{percentile(latencies, p) * 1000:>10.1f}" for p in (50, 99, 100)))
+        finally:
+            leader.terminate()
+            leader.join()
+
+
+if __name__ == "__main__":
+    main()
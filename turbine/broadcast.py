@@ -0,0 +1,299 @@
+"""
+领导者的一次编码广播。
+
+BroadcastHub 只运行一条 签名 → 分片 → 序列化 流水线：每笔交易只签名、分片一次，
+每个分片只编码一次为 SyncResponse 字节串，存入固定容量的环形缓冲区。
+每个连接的验证节点持有自己的游标，从缓冲区读取同一份已编码的字节串；
+BroadcastService 以字节串原样作为响应（response_serializer 不做任何编码），
+因此领导者的 CPU 开销不随订阅者数量增长。
+
+生产速度跟随最快的订阅者：最快的订阅者落后不超过半个缓冲区时才继续生产。
+慢订阅者不会阻塞其他订阅者，其游标被覆盖后按策略处理：
+
+- "drop"：断开该订阅者，由其重新连接；
+- "lag"：跳到缓冲区中最早的分片继续读取，并记录跳过的分片数。
+
+环形缓冲区同时充当重传缓冲区：get(tx_id, index) 返回仍在缓冲区中的数据分片。
+
+事件循环中的订阅者用 poll 非阻塞地读取，并通过 add_listener 注册的回调得知新分片到达。
+
+流水线出错时广播结束，错误记入 error；订阅者读完缓冲区后抛出该异常，gRPC 流以错误状态结束。
+"""
+import threading
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import grpc
+
+from grpc_gen import sync_pb2
+from shred.shred import DATA_SHRED
+from turbine.pipeline import LeaderPipeline, TransactionSource
+from turbine.repair import RepairSession
+
+HUB_CAPACITY = 16384  # 环形缓冲区容量（分片数）
+READ_CHUNK = 256  # 订阅者每次从缓冲区取出的最多分片数
+DROP, LAG = "drop", "lag"  # 慢订阅者策略
+
+
+def encode_response(shred) -> bytes:
+    """
+    把分片编码为 SyncResponse 字节串。
+    """
+    return sync_pb2.SyncResponse(success=True, shred=shred.to_bytes()).SerializeToString()
+
+
+class Subscription:
+    """
+    一个订阅者在环形缓冲区上的游标。
+
+    属性:
+        cursor (int): 下一个要读取的序号。
+        sent (int): 已读取的分片数。
+        lagged (int): "lag" 策略下被跳过的分片数。
+        dropped (bool): "drop" 策略下是否因落后过多被断开。
+    """
+
+    def __init__(self, hub: "BroadcastHub", cursor: int):
+        self.hub = hub
+        self.cursor = cursor
+        self.sent = 0
+        self.lagged = 0
+        self.dropped = False
+        self.closed = False
+
+    def close(self) -> None:
+        self.hub._unsubscribe(self)
+
+    def __iter__(self) -> Iterator[bytes]:
+        try:
+            while True:
+                chunk = self.hub._read(self)
+                if not chunk:
+                    if self.hub.error is not None:
+                        raise self.hub.error
+                    return
+                self.sent += len(chunk)
+                yield from chunk
+        finally:
+            self.close()
+
+
+class BroadcastHub:
+    """
+    一次编码、多订阅者共享的分片广播。
+
+    参数:
+        source: 交易源，见 turbine.pipeline.transaction_source。
+        capacity (int): 环形缓冲区容量（分片数）。
+        policy (str): 慢订阅者策略，"drop" 或 "lag"。
+        report_interval (float): 流水线吞吐量报告间隔（秒），0 表示不报告。
+        encode (Callable): 把分片编码为缓冲区中的字节串，默认为 SyncResponse 编码。
+
+    属性:
+        dropped_subscribers (int): 被断开的慢订阅者数。
+        lagged_shreds (int): 慢订阅者被跳过的分片总数。
+        hits / misses (int): 重传查找命中 / 未命中次数。
+        error (BaseException | None): 使广播结束的流水线异常。
+    """
+
+    def __init__(self, source: TransactionSource, capacity: int = HUB_CAPACITY,
+                 policy: str = DROP, report_interval: float = 0.0,
+                 encode: Callable[[Any], bytes] = encode_response):
+        if policy not in (DROP, LAG):
+            raise ValueError(f"unknown slow subscriber policy: {policy}")
+        self.capacity = capacity
+        self.policy = policy
+        self.dropped_subscribers = 0
+        self.lagged_shreds = 0
+        self.hits = 0
+        self.misses = 0
+        self.error: Optional[BaseException] = None
+        self._ring: List[Optional[Tuple[int, int, int, bytes]]] = [None] * capacity
+        self._head = 0  # 下一个写入的序号
+        self._positions: Dict[Tuple[int, int], int] = {}  # (tx_id, index) -> 数据分片的序号
+        self._subscribers: List[Subscription] = []
+        self._listeners: List[Callable[[], None]] = []
+        self._closed = False
+        self._lock = threading.Lock()
+        self._data = threading.Condition(self._lock)  # 订阅者等待新分片
+        self._space = threading.Condition(self._lock)  # 生产者等待最快的订阅者
+        self._pipeline = LeaderPipeline(
+            source, report_interval=report_interval,
+            wrap=lambda shred: (shred.tx_id, shred.index, shred.shred_type, encode(shred)))
+        self._pump_thread = threading.Thread(target=self._pump, daemon=True)
+        self._pump_thread.start()
+
+    @property
+    def tail(self) -> int:
+        """
+        缓冲区中最早的序号。
+        """
+        return max(0, self._head - self.capacity)
+
+    def _pump(self) -> None:
+        try:
+            for entries in self._pipeline.batches():
+                with self._lock:
+                    # 没有订阅者，或最快的订阅者仍落后超过半个缓冲区时暂停生产
+                    while not self._closed and (
+                            not self._subscribers
+                            or self._head - max(s.cursor for s in self._subscribers) >= self.capacity // 2):
+                        self._space.wait()
+                    if self._closed:
+                        return
+                    for entry in entries:
+                        slot = self._head % self.capacity
+                        old = self._ring[slot]
+                        if old is not None and old[2] == DATA_SHRED:
+                            self._positions.pop((old[0], old[1]), None)
+                        self._ring[slot] = entry
+                        if entry[2] == DATA_SHRED:
+                            self._positions[(entry[0], entry[1])] = self._head
+                        self._head += 1
+                    self._data.notify_all()
+                self._notify()
+        except Exception as error:
+            self.error = error  # 订阅者读完缓冲区后抛出
+        finally:
+            with self._lock:
+                self._closed = True
+                self._data.notify_all()
+            self._notify()
+
+    def add_listener(self, callback: Callable[[], None]) -> None:
+        """
+        注册回调，在写入新分片或广播结束后（于生产线程中）调用，供 poll 的调用方等待。
+        """
+        with self._lock:
+            self._listeners.append(callback)
+
+    def _notify(self) -> None:
+        with self._lock:
+            listeners = list(self._listeners)
+        for callback in listeners:
+            callback()
+
+    def subscribe(self) -> Subscription:
+        """
+        新建订阅，从下一笔交易开始读取。
+        """
+        with self._lock:
+            subscription = Subscription(self, self._head)
+            self._subscribers.append(subscription)
+            self._space.notify_all()
+            return subscription
+
+    def _unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            if not subscription.closed:
+                subscription.closed = True
+                self._subscribers.remove(subscription)
+                self._space.notify_all()
+                self._data.notify_all()
+
+    def _read(self, subscription: Subscription, block: bool = True) -> Optional[List[bytes]]:
+        """
+        取出订阅者游标之后的一批已编码分片；订阅结束时返回空列表。
+        block 为 False 且暂无新分片时返回 None。
+        """
+        with self._lock:
+            while not subscription.closed and not self._closed and subscription.cursor == self._head:
+                if not block:
+                    return None
+                self._data.wait()
+            if subscription.closed:
+                return []
+            if subscription.cursor < self.tail:  # 游标已被覆盖
+                if self.policy == DROP:
+                    subscription.dropped = True
+                    self.dropped_subscribers += 1
+                    return []
+                skipped = self.tail - subscription.cursor
+                subscription.lagged += skipped
+                self.lagged_shreds += skipped
+                subscription.cursor = self.tail
+            end = min(self._head, subscription.cursor + READ_CHUNK)
+            chunk = [self._ring[seq % self.capacity][3] for seq in range(subscription.cursor, end)]
+            subscription.cursor = end
+            self._space.notify()
+            return chunk
+
+    def poll(self, subscription: Subscription) -> Optional[List[bytes]]:
+        """
+        非阻塞地读取：返回一批已编码分片，暂无新分片时返回 None，订阅结束时返回空列表。
+        """
+        chunk = self._read(subscription, block=False)
+        if chunk:
+            subscription.sent += len(chunk)
+        return chunk
+
+    def get(self, tx_id: int, index: int) -> Optional[bytes]:
+        """
+        重传查找：返回仍在缓冲区中的数据分片的已编码字节串，否则返回 None。
+        """
+        with self._lock:
+            seq = self._positions.get((tx_id, index))
+            if seq is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return self._ring[seq % self.capacity][3]
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return len(self._subscribers)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        返回广播计数。
+        """
+        with self._lock:
+            return {
+                "subscribers": len(self._subscribers),
+                "transactions": self._pipeline.stats.transactions,
+                "shreds_encoded": self._head,
+                "dropped_subscribers": self.dropped_subscribers,
+                "lagged_shreds": self.lagged_shreds,
+            }
+
+    def close(self) -> None:
+        """
+        停止生产并结束全部订阅。
+        """
+        self._pipeline.close()
+        with self._lock:
+            self._closed = True
+            self._data.notify_all()
+            self._space.notify_all()
+        self._notify()
+
+
+class BroadcastService:
+    """
+    基于 BroadcastHub 的 BiStream：所有流读取同一份已编码的分片，请求流中的流控与重传同样生效。
+    """
+
+    def __init__(self, hub: BroadcastHub):
+        self.hub = hub
+
+    def BiStream(self, request_iterator, context):
+        subscription = self.hub.subscribe()
+        session = RepairSession(request_iterator, self.hub)
+        context.add_callback(subscription.close)
+        context.add_callback(session.close)
+        for encoded in subscription:
+            yield from session.transmit(encoded)
+
+
+def add_broadcast_service(hub: BroadcastHub, server: grpc.Server) -> None:
+    """
+    在 server 上注册 sync.StreamService/BiStream，响应为 hub 中已编码的字节串，不再序列化。
+    """
+    service = BroadcastService(hub)
+    handler = grpc.method_handlers_generic_handler("sync.StreamService", {
+        "BiStream": grpc.stream_stream_rpc_method_handler(
+            service.BiStream,
+            request_deserializer=sync_pb2.SyncRequest.FromString,
+            response_serializer=bytes,  # 已编码
+        ),
+    })
+    server.add_generic_rpc_handlers((handler,))
@@ -0,0 +1,170 @@
+"""
+验证节点的重复分片过滤与签名验证结果缓存。
+
+存在重传或多个上游时，同一分片会被多次收到。ShredDedup 在解析之前按完整的二进制分片判重，
+重复的分片不再解析、验证和重组，也不再转发。判重键覆盖证明与负载：Merkle 模式下签名只覆盖树根，
+伪造证明或负载的副本头部与签名与真分片相同，若只按头部判重，先到的伪造副本会挡住真分片。
+判重使用两代轮换的 Bloom 过滤器：当前一代写满后丢弃上一代并换新，内存占用固定，
+只会把极少数新分片误判为重复（假阳性），不会漏判最近收到的重复分片。
+误判的分片与丢包一样，由 FEC 恢复或重传补齐。
+
+SignatureCache 是已验证签名的有界 LRU 缓存，取代 verify_shred 的 verified_roots 集合：
+Merkle 模式下缓存 (公钥, 树根)，逐片签名模式下缓存 (公钥, 签名, 消息摘要)。
+"""
+import math
+import threading
+from collections import OrderedDict
+from typing import Dict, Hashable, List
+
+DEDUP_MEMORY = 1 << 20  # 重复分片过滤器的内存预算（字节，两代合计）
+DEDUP_FALSE_POSITIVE_RATE = 1e-3  # 过滤器写满时的目标假阳性率
+SIGNATURE_CACHE_MEMORY = 1 << 20  # 签名缓存的内存预算（字节）
+SIGNATURE_CACHE_ENTRY = 256  # 每个缓存条目的估计占用（键元组与字节串）
+
+
+class ShredDedup:
+    """
+    两代轮换的 Bloom 过滤器，在解析之前丢弃重复分片。
+
+    内存预算平分给两代，每代 m 位；按目标假阳性率 p 取 k = log2(1/p) 个哈希位置，
+    每代最多写入 m·ln²2 / ln(1/p) 个分片后轮换。哈希位置由 Python 的 bytes 哈希（64 位）
+    双重散列得出，只在进程内有效。多个线程同时调用时可能把同一分片放行两次，不会误丢。
+
+    参数:
+        memory_budget (int): 两代合计的内存预算（字节）。
+        false_positive_rate (float): 每代写满时的目标假阳性率。
+
+    属性:
+        checked (int): 检查过的分片数。
+        hits (int): 判为重复而丢弃的分片数（含假阳性）。
+        rotations (int): 轮换次数。
+        estimated_false_positives (float): 按放行时的填充率估计的累计假阳性数。
+    """
+
+    def __init__(self, memory_budget: int = DEDUP_MEMORY,
+                 false_positive_rate: float = DEDUP_FALSE_POSITIVE_RATE):
+        size = max(8, memory_budget // 2)
+        self.num_bits = size * 8
+        self.num_hashes = max(1, round(-math.log2(false_positive_rate)))
+        self.capacity = max(1, int(self.num_bits * math.log(2) ** 2 / -math.log(false_positive_rate)))
+        self._current = bytearray(size)
+        self._previous = bytearray(size)
+        self._inserted = 0
+        self._fp_rate = 0.0
+        self.checked = 0
+        self.hits = 0
+        self.rotations = 0
+        self.estimated_false_positives = 0.0
+
+    def _positions(self, key: bytes) -> List[int]:
+        h = hash(key) & 0xFFFFFFFFFFFFFFFF
+        h1, h2 = h & 0xFFFFFFFF, (h >> 32) | 1
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+    @staticmethod
+    def _contains(bits: bytearray, positions: List[int]) -> bool:
+        for p in positions:
+            if not bits[p >> 3] & (1 << (p & 7)):
+                return False
+        return True
+
+    def _insert(self, positions: List[int]) -> None:
+        if self._inserted >= self.capacity:
+            self._previous, self._current = self._current, bytearray(len(self._current))
+            self._inserted = 0
+            self.rotations += 1
+        bits = self._current
+        for p in positions:
+            bits[p >> 3] |= 1 << (p & 7)
+        self._inserted += 1
+        self._fp_rate = self._estimate(self._inserted)
+
+    def _estimate(self, inserted: int) -> float:
+        """
+        当前一代写入 inserted 个分片后，两代合计的假阳性率。
+        """
+        def rate(n):
+            return (1.0 - math.exp(-self.num_hashes * n / self.num_bits)) ** self.num_hashes
+        previous = rate(self.capacity) if self.rotations else 0.0
+        return 1.0 - (1.0 - rate(inserted)) * (1.0 - previous)
+
+    def seen(self, raw) -> bool:
+        """
+        检查并记录一个二进制分片。
+
+        参数:
+            raw (bytes): 线路格式的分片。
+
+        返回:
+            bool: 最近已收到过完全相同的分片（应丢弃）时返回 True；首次收到时记录并返回 False。
+        """
+        positions = self._positions(raw if isinstance(raw, bytes) else bytes(raw))
+        self.checked += 1
+        if self._contains(self._current, positions):
+            self.hits += 1
+            return True
+        if self._contains(self._previous, positions):
+            self.hits += 1
+            self._insert(positions)  # 仍在活跃的分片续入当前一代
+            return True
+        self.estimated_false_positives += self._fp_rate
+        self._insert(positions)
+        return False
+
+    def stats(self) -> Dict[str, float]:
+        """
+        返回过滤器的计数与当前估计的假阳性率。
+        """
+        return {
+            "checked": self.checked,
+            "hits": self.hits,
+            "rotations": self.rotations,
+            "false_positive_rate": self._fp_rate,
+            "estimated_false_positives": self.estimated_false_positives,
+        }
+
+
+class SignatureCache:
+    """
+    已验证签名的有界 LRU 缓存，按集合的 in / add 接口传给 Shred.verify_shred。
+
+    参数:
+        memory_budget (int): 内存预算（字节），按每条目 SIGNATURE_CACHE_ENTRY 字节折算为容量。
+
+    属性:
+        hits (int): 命中次数（省去的签名验证）。
+        misses (int): 未命中次数。
+    """
+
+    def __init__(self, memory_budget: int = SIGNATURE_CACHE_MEMORY):
+        self.capacity = max(1, memory_budget // SIGNATURE_CACHE_ENTRY)
+        self.hits = 0
+        self.misses = 0
+        self._items: "OrderedDict[Hashable, None]" = OrderedDict()
+        self._lock = threading.Lock()  # 验证线程共享
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return True
+            self.misses += 1
+            return False
+
+    def add(self, key: Hashable) -> None:
+        with self._lock:
+            self._items[key] = None
+            self._items.move_to_end(key)
+            if len(self._items) > self.capacity:
+                self._items.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        返回缓存的命中计数与当前条目数。
+        """
+        with self._lock:
+            return {"entries": len(self._items), "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,139 @@
+"""
+本地多进程 Turbine 测试台。
+
+在回环地址上启动 N 个验证节点进程，按加权洗牌得到的传播树互相连接；
+领导者只向树的第一层发送分片，随后测量每笔交易从发送到各节点重组完成的端到端延迟。
+
+用法:
+    python -m turbine.harness --nodes 16 --fanout 4 --transactions 20
+
+运行目录下需要有 config.yml（与 turbine.leader 相同）。
+"""
+import argparse
+import multiprocessing
+import os
+import queue
+import random
+import time
+from typing import Dict, List, Sequence
+
+from grpc_gen import sync_pb2
+from turbine.node import RelayService, ValidatorNode, start_relay_server
+from turbine.shredding import create_shreds
+from turbine.tree import DEFAULT_SEED, Node, TurbineTree
+
+READY_TIMEOUT = 30.0  # 等待全部节点连接的超时（秒）
+TX_TIMEOUT = 30.0  # 等待单笔交易传播完成的超时（秒）
+
+
+def run_node(node_id: int, nodes: Sequence[Node], seed: bytes, fanout: int,
+             leader_address: str, events, stop) -> None:
+    """
+    验证节点进程的入口：启动 ValidatorNode，并通过 events 上报连接数与交易完成时间。
+    """
+    tree = TurbineTree(nodes, seed, fanout)
+    node = ValidatorNode(
+        node_id, tree, leader_address,
+        on_transaction=lambda tx_id, payload: events.put(("tx", node_id, tx_id, time.time())),
+        on_subscribers=lambda count: events.put(("subscribers", node_id, count)),
+    )
+    node.start()
+    stop.wait()
+    node.stop()
+
+
+def percentile(values: List[float], p: float) -> float:
+    """
+    最近秩法计算百分位数。
+    """
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * p // 100))
+    return ordered[int(rank) - 1]
+
+
+def wait_ready(tree: TurbineTree, relay: RelayService, events, subscribers: Dict[int, int]) -> None:
+    """
+    等待领导者与每个内部节点都接上了全部子节点。
+    """
+    expected = {n.node_id: len(tree.children(n.node_id)) for n in tree.order}
+    deadline = time.monotonic() + READY_TIMEOUT
+    while (relay.subscriber_count() < len(tree.leader_children())
+           or any(subscribers.get(i, 0) < count for i, count in expected.items())):
+        if time.monotonic() > deadline:
+            raise TimeoutError("validators did not connect in time")
+        try:
+            event = events.get(timeout=0.1)
+        except queue.Empty:
+            continue
+        if event[0] == "subscribers":
+            subscribers[event[1]] = event[2]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Turbine fan-out propagation harness")
+    parser.add_argument("--nodes", type=int, default=16, help="验证节点数")
+    parser.add_argument("--fanout", type=int, default=4, help="每个节点的扇出")
+    parser.add_argument("--transactions", type=int, default=20, help="发送的交易笔数")
+    parser.add_argument("--size", type=int, default=4000, help="每笔交易的字节数")
+    parser.add_argument("--base-port", type=int, default=50100, help="领导者端口，验证节点依次使用后续端口")
+    parser.add_argument("--seed", default=DEFAULT_SEED, help="加权洗牌种子")
+    args = parser.parse_args()
+
+    seed = args.seed.encode()
+    rng = random.Random(seed)
+    leader_address = f"localhost:{args.base_port}"
+    nodes = [Node(i, f"localhost:{args.base_port + 1 + i}", rng.randint(1, 100)) for i in range(args.nodes)]
+    tree = TurbineTree(nodes, seed, args.fanout)
+
+    # 先启动子进程，再在本进程中初始化 gRPC
+    ctx = multiprocessing.get_context("spawn")
+    events = ctx.Queue()
+    stop = ctx.Event()
+    processes = [ctx.Process(target=run_node, daemon=True,
+                             args=(n.node_id, nodes, seed, args.fanout, leader_address, events, stop))
+                 for n in nodes]
+    for process in processes:
+        process.start()
+
+    relay = RelayService()
+    server = start_relay_server(leader_address, relay)
+    latencies: List[float] = []
+    by_depth: Dict[int, List[float]] = {}
+    shreds_sent = 0
+    try:
+        wait_ready(tree, relay, events, {})
+        for tx_id in range(args.transactions):
+            responses = [sync_pb2.SyncResponse(success=True, shred=shred.to_bytes())
+                         for shred in create_shreds(os.urandom(args.size), tx_id=tx_id)]
+            start = time.time()
+            for response in responses:
+                relay.publish(response)
+            shreds_sent += len(responses) * relay.subscriber_count()
+            pending = {n.node_id for n in nodes}
+            deadline = time.monotonic() + TX_TIMEOUT
+            while pending:
+                event = events.get(timeout=max(0.0, deadline - time.monotonic()))
+                if event[0] == "tx" and event[2] == tx_id:
+                    pending.discard(event[1])
+                    latency = event[3] - start
+                    latencies.append(latency)
+                    by_depth.setdefault(tree.depth(event[1]), []).append(latency)
+    finally:
+        stop.set()
+        relay.close()
+        server.stop(grace=None)
+        for process in processes:
+            process.join(timeout=5)
+
+    depth = max(by_depth)
+    print(f"nodes={args.nodes} fanout={args.fanout} depth={depth} transactions={args.transactions}")
+    print(f"leader egress: {shreds_sent} shreds ({shreds_sent / args.transactions:.0f} per tx, "
+          f"{len(tree.leader_children())} streams instead of {args.nodes})")
+    print(f"{'':<10}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    rows = [("all", latencies)] + [(f"depth {d}", by_depth[d]) for d in sorted(by_depth)]
+    for name, values in rows:
+        print(f"{name:<10}" + "".join(f"{percentile(values, p) * 1000:>10.2f}" for p in (50, 90, 99, 100)))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,88 +1,303 @@
 from shred.shred import Shred
 from grpc_gen import sync_pb2_grpc, sync_pb2
+from turbine.pipeline import COALESCE_MAX_SHREDS, LeaderPipeline, REPORT_INTERVAL
+from turbine.repair import RepairSession, RetransmitBuffer, RETRANSMIT_CAPACITY
+from turbine.broadcast import BroadcastHub, DROP, LAG, add_broadcast_service, encode_response
+from turbine.node import RelayService, start_relay_server
+from turbine.shredding import transaction
+from turbine.tree import DEFAULT_FANOUT, DEFAULT_SEED, TurbineTree, parse_peers
 import grpc
+import argparse
+import asyncio
+import itertools
 from concurrent import futures
-from nacl.signing import SigningKey
-from utils.config_utils import load_config
-import base58
-import json
-from typing import Any 
-# 接收到的交易数据
-transaction = {
-    "message_header": {
-        "version": 1,
-        "account_count": 2,
-        "signature_count": 1
-    },
-    "account_keys": ["Alice", "Bob"],
-    "recent_blockhash": "5KQmYg7s8v9wX2y3z4a5b6c7d8e9f0g1h2i3j4k5l6m7n8o9p0q1r2s3t4u5v6w7",
-    "instructions": [],
-    "program_id": "TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA"
-}
-
-SHRED_LENGTH = 100  # 每个分片的长度
-
-def get_signkey()->None:
-    """
-    生成并返回签名密钥。
-    """
-    config = load_config("config.yml")  # 加载配置文件
-    private_key = config["private_key"]  # 获取私钥
-    seed = base58.b58decode(private_key)[:32]  # 解码私钥并取前32字节作为种子
-
-    signing_key = SigningKey(seed)  # 使用种子生成签名密钥
-    return signing_key
-
-def sign_transaction(transaction:dict[str,Any]) -> dict[str,Any]:
-    """
-    对交易数据进行签名并返回签名后的交易数据。
-    """
-    transaction_signature = get_signkey().sign(json.dumps(transaction).encode()).signature  # 对交易数据进行签名
-    transaction.update({"signature": base58.b58encode(transaction_signature).decode()})  # 将签名添加到交易数据中
-    return transaction
-
-def create_shreds(transaction_data:str) -> list[Shred]:
-    """
-    将交易数据分片并返回分片对象列表。
-    """
-    shreds = []
-    for i in range(0, len(transaction_data), SHRED_LENGTH):
-        payload = transaction_data[i:i+SHRED_LENGTH]  # 分片数据
-        base58_payload = base58.b58encode(payload).decode()  # 对分片数据进行 base58 编码
-        shred = Shred(i // SHRED_LENGTH, len(transaction_data) // SHRED_LENGTH + 1, base58_payload)  # 创建分片对象
-        signKey = get_signkey()  # 获取签名密钥
-        shred.sign_shred(signKey)  # 对分片进行签名
-        shreds.append(shred)
-    return shreds
+import random
+import time
+from typing import Any, Callable, Optional
+
+LEADER_ADDRESS = "[::]:50051"  # 领导者监听地址
+BROADCAST_WORKERS = 256  # 广播模式下的服务线程数，即同时服务的订阅者上限
+TREE_POLL_INTERVAL = 0.001  # 树模式下等待直接子节点取走分片的轮询间隔（秒）
 
 class StreamService(sync_pb2_grpc.StreamServiceServicer):
     """
     实现 gRPC 服务的类。
+
+    参数:
+        source_factory (Callable): 为每个流返回一个交易源（可迭代对象、queue.Queue 或 JSONL 路径），
+            默认无限重复示例交易。
+        report_interval (float): 吞吐量报告间隔（秒），0 表示不报告。
+        drop_rate (float): 模拟丢包率，被丢弃的分片仍记入重传缓冲区，仅用于测试重传。
+        retransmit_capacity (int): 每个流的重传缓冲区大小（分片数）。
     """
 
+    def __init__(self, source_factory:Optional[Callable[[], Any]]=None,
+                 report_interval:float=REPORT_INTERVAL, drop_rate:float=0.0,
+                 retransmit_capacity:int=RETRANSMIT_CAPACITY):
+        self.source_factory = source_factory or (lambda: itertools.repeat(transaction))
+        self.report_interval = report_interval
+        self.drop_rate = drop_rate
+        self.retransmit_capacity = retransmit_capacity
+        self._random = random.Random()
+
     def BiStream(self, request_iterator, context):
         """
-        双向流方法。
+        双向流方法：持续消费交易源，经签名 → 分片 → 序列化流水线后返回二进制分片。
+
+        请求流中的 credits 控制发送额度，nacks 触发从重传缓冲区重发缺失的数据分片；
+        新分片发送完后继续响应重传请求，直到客户端关闭请求流。
         """
-        while True:
-            signed_transaction = sign_transaction(transaction.copy())  # 对交易数据进行签名
-            transaction_data = json.dumps(signed_transaction)  # 将交易数据转换为 JSON 字符串
+        pipeline = LeaderPipeline(self.source_factory(), report_interval=self.report_interval)
+        session = RepairSession(request_iterator, RetransmitBuffer(self.retransmit_capacity))
+        context.add_callback(pipeline.close)  # 客户端断开时停止流水线
+        context.add_callback(session.close)
+        for response in pipeline:
+            if self.drop_rate and self._random.random() < self.drop_rate:
+                session.remember(response)  # 模拟丢包
+                continue
+            yield from session.send(response)
+        yield from session.drain()
 
-            shreds = create_shreds(transaction_data)  # 创建分片对象列表
-            for shred in shreds:
-                response_data = json.dumps(shred.__dict__)  # 将分片对象转换为 JSON 字符串
-                yield sync_pb2.SyncResponse(success=True, data=response_data)  # 服务器持续返回数据
-            break
+    def BatchStream(self, request_iterator, context):
+        """
+        与 BiStream 相同，但把分片合并为 ShredBatch 发送：凑满 COALESCE_MAX_SHREDS 个分片，
+        或批内第一个分片已等待 COALESCE_MAX_DELAY 秒时发送一条消息。
+        """
+        pipeline = LeaderPipeline(self.source_factory(), report_interval=self.report_interval,
+                                  wrap=Shred.to_bytes)
+        context.add_callback(pipeline.close)
+        for shreds in pipeline.coalesced():
+            yield sync_pb2.ShredBatch(shreds=shreds)
 
-def serve():
+class AsyncStreamService(StreamService):
     """
-    创建并启动 gRPC 服务器。
+    grpc.aio 版本的服务：所有流运行在同一个事件循环中，不受线程池大小限制。
+    该版本不处理请求流中的流控与重传请求。
+
+    全部 BiStream 流共享一个 BroadcastHub（全部 BatchStream 流共享另一个），流水线线程数不随流数增长，
+    每个分片只签名、编码一次；各流在事件循环中以 poll 读取自己的游标，hub 写入新分片时唤醒等待的流。
+    hub 在该方法的第一个流到达时创建，source_factory 只调用一次；新的流从下一笔交易开始接收。
+    BiStream 的响应为已编码的字节串，需用 add_async_stream_service 注册。
+
+    参数:
+        policy (str): 慢订阅者策略，"drop" 或 "lag"，见 turbine.broadcast。
+    """
+
+    def __init__(self, source_factory:Optional[Callable[[], Any]]=None,
+                 report_interval:float=REPORT_INTERVAL, policy:str=LAG):
+        super().__init__(source_factory, report_interval)
+        self.policy = policy
+        self._hubs: dict[str, BroadcastHub] = {}
+        self._arrived: dict[str, asyncio.Event] = {}
+
+    def _hub(self, name:str, encode:Callable[[Shred], bytes]) -> BroadcastHub:
+        """
+        返回方法 name 共享的 BroadcastHub，第一次调用时在当前事件循环中创建。
+        """
+        hub = self._hubs.get(name)
+        if hub is None:
+            loop = asyncio.get_running_loop()
+            self._arrived[name] = asyncio.Event()
+            hub = BroadcastHub(self.source_factory(), policy=self.policy,
+                               report_interval=self.report_interval, encode=encode)
+            hub.add_listener(lambda: loop.call_soon_threadsafe(self._wake, name))
+            self._hubs[name] = hub
+        return hub
+
+    def _wake(self, name:str) -> None:
+        event, self._arrived[name] = self._arrived[name], asyncio.Event()
+        event.set()
+
+    async def _chunks(self, name:str, encode:Callable[[Shred], bytes]):
+        """
+        订阅方法 name 的 hub，逐批返回已编码的分片，广播结束或订阅被断开时结束；
+        广播因流水线出错而结束时抛出该异常。
+        """
+        hub = self._hub(name, encode)
+        subscription = hub.subscribe()
+        try:
+            while True:
+                arrived = self._arrived[name]  # 先取事件再读取，避免错过读取之后的唤醒
+                chunk = hub.poll(subscription)
+                if chunk is None:
+                    await arrived.wait()
+                    continue
+                if not chunk:
+                    if hub.error is not None:
+                        raise hub.error
+                    return
+                yield chunk
+        finally:
+            subscription.close()  # 客户端断开时任务被取消，释放游标
+
+    async def BiStream(self, request_iterator, context):
+        """
+        双向流方法（异步），响应为已编码的 SyncResponse 字节串。
+        """
+        async for chunk in self._chunks("BiStream", encode_response):
+            for encoded in chunk:
+                yield encoded
+
+    async def BatchStream(self, request_iterator, context):
+        """
+        合并发送的双向流方法（异步）：每条 ShredBatch 最多携带 COALESCE_MAX_SHREDS 个已到达的分片。
+        """
+        async for chunk in self._chunks("BatchStream", Shred.to_bytes):
+            for start in range(0, len(chunk), COALESCE_MAX_SHREDS):
+                yield sync_pb2.ShredBatch(shreds=chunk[start:start + COALESCE_MAX_SHREDS])
+
+    def close(self) -> None:
+        """
+        停止全部 hub 的流水线并结束所有流。
+        """
+        for hub in self._hubs.values():
+            hub.close()
+
+def add_async_stream_service(service:AsyncStreamService, server:grpc.aio.Server) -> None:
+    """
+    在 grpc.aio 服务器上注册 service；BiStream 的响应为已编码字节串，不再序列化。
     """
-    server = grpc.server(futures.ThreadPoolExecutor(max_workers=10))
-    sync_pb2_grpc.add_StreamServiceServicer_to_server(StreamService(), server)
-    server.add_insecure_port("[::]:50051")
+    handler = grpc.method_handlers_generic_handler("sync.StreamService", {
+        "BiStream": grpc.stream_stream_rpc_method_handler(
+            service.BiStream,
+            request_deserializer=sync_pb2.SyncRequest.FromString,
+            response_serializer=bytes,  # 已编码
+        ),
+        "BatchStream": grpc.stream_stream_rpc_method_handler(
+            service.BatchStream,
+            request_deserializer=sync_pb2.SyncRequest.FromString,
+            response_serializer=sync_pb2.ShredBatch.SerializeToString,
+        ),
+    })
+    server.add_generic_rpc_handlers((handler,))
+
+def start_server(address:str=LEADER_ADDRESS, source_factory:Optional[Callable[[], Any]]=None,
+                 report_interval:float=REPORT_INTERVAL, max_workers:int=10,
+                 drop_rate:float=0.0) -> grpc.Server:
+    """
+    创建并启动线程池 gRPC 服务器。每个流占用一个线程，同时服务的流数不超过 max_workers。
+
+    返回:
+        grpc.Server: 已启动的服务器。
+    """
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=max_workers))
+    service = StreamService(source_factory, report_interval, drop_rate)
+    sync_pb2_grpc.add_StreamServiceServicer_to_server(service, server)
+    server.add_insecure_port(address)
     server.start()
-    server.wait_for_termination()
+    return server
+
+async def start_aio_server(address:str=LEADER_ADDRESS, source_factory:Optional[Callable[[], Any]]=None,
+                           report_interval:float=REPORT_INTERVAL) -> grpc.aio.Server:
+    """
+    创建并启动 grpc.aio 服务器，需在事件循环中调用。
+
+    返回:
+        grpc.aio.Server: 已启动的服务器。
+    """
+    server = grpc.aio.server()
+    add_async_stream_service(AsyncStreamService(source_factory, report_interval), server)
+    server.add_insecure_port(address)
+    await server.start()
+    return server
+
+def start_broadcast_server(address:str=LEADER_ADDRESS, source:Any=None, policy:str=DROP,
+                           report_interval:float=REPORT_INTERVAL,
+                           max_workers:int=BROADCAST_WORKERS) -> tuple:
+    """
+    创建并启动广播模式的 gRPC 服务器：全部流共享一个 BroadcastHub，每个分片只签名、编码一次。
+
+    参数:
+        source: 交易源，默认无限重复示例交易。
+        policy (str): 慢订阅者策略，"drop" 或 "lag"。
+
+    返回:
+        tuple: (grpc.Server, BroadcastHub)。
+    """
+    hub = BroadcastHub(itertools.repeat(transaction) if source is None else source,
+                       policy=policy, report_interval=report_interval)
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=max_workers))
+    add_broadcast_service(hub, server)
+    server.add_insecure_port(address)
+    server.start()
+    return server, hub
+
+def serve_tree(tree:TurbineTree, source:Any=None, policy:str=DROP,
+               report_interval:float=REPORT_INTERVAL, address:str=LEADER_ADDRESS) -> None:
+    """
+    Turbine 树模式：运行 RelayService，只有树的第一层节点连接领导者，其余节点由父节点转发。
+
+    等待第一层节点全部连接后才开始生产；之后按最慢的直接子节点限速，
+    排队超过半个队列时暂停，RelayService 的慢订阅者策略只在限速失效时生效。
+
+    参数:
+        tree (TurbineTree): 与全部验证节点相同参数构建的传播树。
+        source: 交易源，默认无限重复示例交易。
+        policy (str): 转发队列满时的慢子节点策略，"drop" 或 "lag"。
+    """
+    relay = RelayService(policy=policy)
+    server = start_relay_server(address, relay)
+    expected = len(tree.leader_children())
+    print(f"waiting for {expected} first-layer validators: {[n.address for n in tree.leader_children()]}")
+    while relay.subscriber_count() < expected:
+        time.sleep(0.1)
+    pipeline = LeaderPipeline(itertools.repeat(transaction) if source is None else source,
+                              report_interval=report_interval)
+    try:
+        for responses in pipeline.batches():
+            while relay.backlog() > relay.capacity // 2:
+                time.sleep(TREE_POLL_INTERVAL)
+            for response in responses:
+                relay.publish(response)
+    finally:
+        relay.close()
+        server.stop(grace=None)
+        print("relay:", relay.stats())
+
+def serve(source_factory:Optional[Callable[[], Any]]=None, report_interval:float=REPORT_INTERVAL,
+          drop_rate:float=0.0):
+    """
+    创建并启动 gRPC 服务器。
+    """
+    start_server(LEADER_ADDRESS, source_factory, report_interval, drop_rate=drop_rate).wait_for_termination()
+
+async def serve_aio(source_factory:Optional[Callable[[], Any]]=None, report_interval:float=REPORT_INTERVAL):
+    """
+    创建并启动 grpc.aio 服务器，直到服务器终止。
+    """
+    server = await start_aio_server(LEADER_ADDRESS, source_factory, report_interval)
+    await server.wait_for_termination()
+
+def main():
+    """
+    解析命令行参数并启动领导者。
+    """
+    parser = argparse.ArgumentParser(description="Turbine leader")
+    parser.add_argument("--source", help="JSONL 交易文件（每行一笔交易），默认无限重复示例交易")
+    parser.add_argument("--report-interval", type=float, default=REPORT_INTERVAL, help="吞吐量报告间隔（秒）")
+    parser.add_argument("--aio", action="store_true", help="使用 grpc.aio 服务器")
+    parser.add_argument("--drop-rate", type=float, default=0.0, help="模拟丢包率（仅线程池服务器）")
+    parser.add_argument("--broadcast", action="store_true", help="全部流共享一次编码的分片")
+    parser.add_argument("--slow-policy", choices=(DROP, LAG), default=DROP, help="广播与树模式下慢订阅者的处理策略")
+    parser.add_argument("--tree", action="store_true", help="Turbine 树模式：只向树的第一层节点发送分片")
+    parser.add_argument("--peers", nargs="+", default=[], metavar="ADDRESS[=STAKE]",
+                        help="树模式下的验证节点地址与质押，节点编号按顺序从 0 开始，全部节点必须相同")
+    parser.add_argument("--fanout", type=int, default=DEFAULT_FANOUT, help="树模式下每个节点的扇出")
+    parser.add_argument("--seed", default=DEFAULT_SEED, help="树模式下的加权洗牌种子")
+    args = parser.parse_args()
+    source_factory = (lambda: args.source) if args.source else None
+    if args.tree:
+        if not args.peers:
+            parser.error("--tree requires --peers")
+        tree = TurbineTree(parse_peers(args.peers), args.seed.encode(), args.fanout)
+        serve_tree(tree, args.source, args.slow_policy, args.report_interval)
+    elif args.broadcast:
+        server, _hub = start_broadcast_server(LEADER_ADDRESS, args.source, args.slow_policy, args.report_interval)
+        server.wait_for_termination()
+    elif args.aio:
+        asyncio.run(serve_aio(source_factory, args.report_interval))
+    else:
+        serve(source_factory, args.report_interval, args.drop_rate)
 
 if __name__ == "__main__":
-    serve()
+    main()
@@ -0,0 +1,298 @@
+"""
+Turbine 转发节点。
+
+每个验证节点既是客户端也是服务端：
+
+- 作为客户端，通过 BiStream 从父节点（或领导者）接收分片；
+- 作为服务端，运行自己的 gRPC 服务，把验证通过的分片转发给连接上来的子节点。
+
+领导者同样使用 RelayService 作为服务端，只把分片发布给树的第一层节点。
+
+每个子节点的转发队列有界（RELAY_QUEUE_SIZE 个分片），慢子节点不会让内存无限增长，也不会阻塞其他子节点；
+队列满时按与 BroadcastHub 相同的策略处理：
+
+- "drop"：断开该子节点，由其重新连接；
+- "lag"：丢弃队列中最早的分片，并记录跳过的分片数（由 FEC 或重传补齐）。
+"""
+import queue
+import threading
+from concurrent import futures
+from typing import Callable, Dict, List, Optional
+
+import grpc
+
+from grpc_gen import sync_pb2_grpc
+from shred.shred import Shred
+from turbine.broadcast import DROP, LAG
+from turbine.dedup import ShredDedup, SignatureCache
+from turbine.tree import TurbineTree
+from turbine.reassembly import ReassemblyBuffer
+from turbine.shredding import get_verify_key
+from turbine.store import ShredStore, replay
+
+RELAY_WORKERS = 64  # 转发服务线程数，每个子节点的流占用一个线程
+RELAY_QUEUE_SIZE = 4096  # 每个子节点转发队列的容量（分片数）
+RELAY_CLOSE_TIMEOUT = 1.0  # 关闭时等待子节点取走已排队分片的最长时间（秒）
+
+
+class _Subscriber:
+    """
+    一个子节点的有界转发队列。
+    """
+    __slots__ = ("queue", "closed", "dropped", "lagged")
+
+    def __init__(self, capacity: int):
+        self.queue: queue.Queue = queue.Queue(maxsize=capacity)
+        self.closed = False  # 子节点断开或被断开，已排队的分片不再发送
+        self.dropped = False
+        self.lagged = 0
+
+    def stop(self) -> None:
+        """
+        立即结束该子节点的流；队列满时发送循环在下一次取出后看到 closed。
+        """
+        self.closed = True
+        try:
+            self.queue.put_nowait(None)
+        except queue.Full:
+            pass
+
+    def finish(self) -> None:
+        """
+        发完已排队的分片后结束该子节点的流；RELAY_CLOSE_TIMEOUT 秒内仍无空位时立即结束。
+        """
+        try:
+            self.queue.put(None, timeout=RELAY_CLOSE_TIMEOUT)
+        except queue.Full:
+            self.stop()
+
+
+class RelayService(sync_pb2_grpc.StreamServiceServicer):
+    """
+    把发布的分片转发给所有已连接子节点的 gRPC 服务。
+
+    每个连接上来的子节点拥有一个独立的有界队列，publish 把同一个响应对象放入所有队列，
+    不做重复序列化，也不阻塞；队列满时按 policy 断开该子节点或丢弃其最早的分片。
+
+    参数:
+        on_subscribers (Callable[[int], None] | None): 子节点数变化时的回调。
+        capacity (int): 每个子节点队列的容量（分片数）。
+        policy (str): 慢子节点策略，"drop" 或 "lag"，见 turbine.broadcast。
+
+    属性:
+        dropped_subscribers (int): 被断开的慢子节点数。
+        lagged_shreds (int): 慢子节点被丢弃的分片总数。
+    """
+
+    def __init__(self, on_subscribers: Optional[Callable[[int], None]] = None,
+                 capacity: int = RELAY_QUEUE_SIZE, policy: str = DROP):
+        if policy not in (DROP, LAG):
+            raise ValueError(f"unknown slow subscriber policy: {policy}")
+        self.capacity = capacity
+        self.policy = policy
+        self.dropped_subscribers = 0
+        self.lagged_shreds = 0
+        self._subscribers: List[_Subscriber] = []
+        self._lock = threading.Lock()
+        self._on_subscribers = on_subscribers
+
+    def subscriber_count(self) -> int:
+        """
+        返回当前连接的子节点数。
+        """
+        with self._lock:
+            return len(self._subscribers)
+
+    def _changed(self) -> None:
+        if self._on_subscribers is not None:
+            self._on_subscribers(self.subscriber_count())
+
+    def publish(self, response) -> None:
+        """
+        把一个 SyncResponse 转发给所有子节点，不阻塞。
+        """
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            if subscriber.closed:
+                continue
+            try:
+                subscriber.queue.put_nowait(response)
+                continue
+            except queue.Full:
+                pass
+            if self.policy == DROP:
+                subscriber.dropped = True
+                subscriber.stop()
+                with self._lock:
+                    self.dropped_subscribers += 1
+                continue
+            try:
+                subscriber.queue.get_nowait()  # 丢弃最早的分片，只有本线程放入，取出后必有空位
+            except queue.Empty:
+                pass
+            subscriber.queue.put_nowait(response)
+            subscriber.lagged += 1
+            with self._lock:
+                self.lagged_shreds += 1
+
+    def close(self) -> None:
+        """
+        已排队的分片发送完后结束所有子节点的流。
+        """
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            if not subscriber.closed:
+                subscriber.finish()
+
+    def backlog(self) -> int:
+        """
+        返回各子节点队列中排队最多的分片数，供源头（领导者）按最慢的直接子节点限速。
+        """
+        with self._lock:
+            return max((s.queue.qsize() for s in self._subscribers), default=0)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        返回转发计数。
+        """
+        with self._lock:
+            return {
+                "subscribers": len(self._subscribers),
+                "queued": sum(s.queue.qsize() for s in self._subscribers),
+                "dropped_subscribers": self.dropped_subscribers,
+                "lagged_shreds": self.lagged_shreds,
+            }
+
+    def BiStream(self, request_iterator, context):
+        """
+        双向流方法：为子节点注册有界队列，并持续发送转发的分片。
+        """
+        subscriber = _Subscriber(self.capacity)
+        with self._lock:
+            self._subscribers.append(subscriber)
+        context.add_callback(subscriber.stop)  # 子节点断开时结束循环
+        self._changed()
+        try:
+            while True:
+                response = subscriber.queue.get()
+                if response is None or subscriber.closed:
+                    break
+                yield response
+        finally:
+            with self._lock:
+                self._subscribers.remove(subscriber)
+            self._changed()
+
+
+def start_relay_server(address: str, relay: RelayService) -> grpc.Server:
+    """
+    在 address 上启动运行 relay 的 gRPC 服务。
+
+    参数:
+        address (str): 监听地址，例如 "localhost:50101"。
+        relay (RelayService): 转发服务。
+
+    返回:
+        grpc.Server: 已启动的服务。
+    """
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=RELAY_WORKERS))
+    sync_pb2_grpc.add_StreamServiceServicer_to_server(relay, server)
+    server.add_insecure_port(address)
+    server.start()
+    return server
+
+
+class ValidatorNode:
+    """
+    Turbine 树中的一个验证节点。
+
+    属性:
+        node_id (int): 节点编号。
+        address (str): 本节点 gRPC 服务地址。
+        parent_address (str): 父节点（或领导者）的地址。
+        relay (RelayService): 转发给子节点的服务。
+        reassembly (ReassemblyBuffer): 按 tx_id 重组交易的缓冲区。
+        store (ShredStore | None): 持久化验证通过的分片；启动时先用其中的分片恢复未完成的交易。
+        malformed (int): 无法解析而丢弃的分片数。
+    """
+
+    def __init__(self, node_id: int, tree: TurbineTree, leader_address: str,
+                 on_transaction: Optional[Callable[[int, bytes], None]] = None,
+                 on_subscribers: Optional[Callable[[int], None]] = None,
+                 store: Optional[ShredStore] = None):
+        self.node_id = node_id
+        self.address = next(n.address for n in tree.order if n.node_id == node_id)
+        parent = tree.parent(node_id)
+        self.parent_address = leader_address if parent is None else parent.address
+        self.relay = RelayService(on_subscribers)
+        self.reassembly = ReassemblyBuffer()
+        self.store = store
+        self._on_transaction = on_transaction
+        self.malformed = 0
+        self._server: Optional[grpc.Server] = None
+        self._channel: Optional[grpc.Channel] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """
+        启动本节点的 gRPC 服务，并开始从父节点接收分片。
+        """
+        if self.store is not None:
+            replay(self.store, self.reassembly)  # 重放中完成的交易在重启前已经输出过
+        self._server = start_relay_server(self.address, self.relay)
+        self._channel = grpc.insecure_channel(self.parent_address)
+        self._thread = threading.Thread(target=self._receive, daemon=True)
+        self._thread.start()
+
+    def _receive(self) -> None:
+        """
+        接收循环：丢弃重复与无法解析的分片，验证分片、转发给子节点，并按 tx_id 重组交易。
+        """
+        stub = sync_pb2_grpc.StreamServiceStub(self._channel)
+        responses = stub.BiStream(iter(()), wait_for_ready=True)  # 不发送请求
+        dedup = ShredDedup()
+        verified_roots = SignatureCache()
+        try:
+            for response in responses:
+                if dedup.seen(response.shred):
+                    continue  # 重复分片不再验证，也不再转发
+                try:
+                    shred = Shred.from_bytes(response.shred)
+                except ValueError:
+                    self.malformed += 1  # 截断或格式错误的分片不影响后续接收
+                    continue
+                if not shred.verify_shred(get_verify_key(), verified_roots):
+                    continue
+                self.relay.publish(response)  # 转发给子节点
+                if self.store is not None:
+                    self.store.append(response.shred)
+                completed = self.reassembly.add(shred)
+                if completed is not None and self._on_transaction is not None:
+                    self._on_transaction(*completed)
+        except grpc.RpcError:
+            pass  # 父节点关闭或本节点停止
+        finally:
+            self.relay.close()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        等待接收循环结束（父节点关闭流时），最多等待 timeout 秒。
+
+        返回:
+            bool: 接收循环已结束（或尚未启动）时返回 True。
+        """
+        if self._thread is None:
+            return True
+        self._thread.join(timeout)
+        return not self._thread.is_alive()
+
+    def stop(self) -> None:
+        """
+        停止接收并关闭本节点的 gRPC 服务。
+        """
+        if self._channel is not None:
+            self._channel.close()
+        if self._server is not None:
+            self._server.stop(grace=None)
@@ -0,0 +1,411 @@
+"""
+领导者的流水线：签名 → 分片 → 序列化。
+
+三个阶段各占一个线程，阶段之间用有界队列连接：下游变慢时上游在 put 上阻塞（背压），
+内存占用不会随交易源的速度无限增长。PyNaCl 的签名与 hashlib 的哈希在计算时释放 GIL，
+因此签名、分片与序列化可以部分重叠。
+
+交易源可以是任意可迭代对象、queue.Queue（放入 None 表示结束）或 JSONL 文件路径。
+
+任一阶段出错（例如交易源或 create_shreds 抛出异常）时，该阶段仍把结束标记传给下游，
+消费者取完已完成的交易后重新抛出该异常，不会一直等待。
+
+吞吐量基准（不经过 gRPC）:
+    python -m turbine.pipeline --count 2000
+"""
+import argparse
+import asyncio
+import concurrent.futures
+import itertools
+import json
+import os
+import queue
+import threading
+import time
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, Iterator, Optional, Union
+
+from grpc_gen import sync_pb2
+from turbine.shredding import create_shreds, sign_transaction, transaction
+
+
+def to_response(shred) -> "sync_pb2.SyncResponse":
+    """
+    把分片包装为 SyncResponse（每条消息一个分片）。
+    """
+    return sync_pb2.SyncResponse(success=True, shred=shred.to_bytes())
+
+QUEUE_SIZE = 64  # 阶段之间队列的容量（笔交易）
+REPORT_INTERVAL = 5.0  # 吞吐量报告间隔（秒），0 表示不报告
+COALESCE_MAX_SHREDS = 64  # 合并发送时每条消息最多携带的分片数
+COALESCE_MAX_DELAY = 0.001  # 合并发送时第一个分片最多等待的时间（秒）
+_DONE = object()  # 阶段结束标记
+_EMPTY = object()  # 等待超时标记
+
+TransactionSource = Union[Iterable[Dict[str, Any]], "queue.Queue", str, os.PathLike]
+
+
+def _iter_queue(source: "queue.Queue", stop: Optional[threading.Event] = None) -> Iterator[Dict[str, Any]]:
+    """
+    从 queue.Queue 取出交易（None 表示结束）。按超时轮询，stop 被设置后不再取出新的交易。
+    """
+    while stop is None or not stop.is_set():
+        try:
+            item = source.get(timeout=0.1)
+        except queue.Empty:
+            continue
+        if item is None:
+            return
+        yield item
+
+
+def _iter_jsonl(path) -> Iterator[Dict[str, Any]]:
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def transaction_source(source: TransactionSource,
+                       stop: Optional[threading.Event] = None) -> Iterator[Dict[str, Any]]:
+    """
+    把交易源统一为交易字典的迭代器。
+
+    参数:
+        source: 可迭代对象、queue.Queue（None 表示结束）或 JSONL 文件路径（每行一笔交易）。
+        stop (threading.Event | None): 设置后 queue.Queue 交易源不再阻塞等待新的交易。
+
+    返回:
+        Iterator[Dict[str, Any]]: 交易迭代器。
+    """
+    if isinstance(source, (str, os.PathLike)):
+        return _iter_jsonl(source)
+    if isinstance(source, queue.Queue):
+        return _iter_queue(source, stop)
+    return iter(source)
+
+
+class PipelineStats:
+    """
+    流水线的吞吐量计数。
+
+    属性:
+        transactions (int): 已输出的交易数。
+        shreds (int): 已输出的分片数。
+        started (float): 流水线启动时间（time.monotonic）。
+    """
+
+    def __init__(self):
+        self.transactions = 0
+        self.shreds = 0
+        self.started = time.monotonic()
+        self._last = (self.started, 0, 0)
+
+    def add(self, shreds: int) -> None:
+        self.transactions += 1
+        self.shreds += shreds
+
+    def rates(self) -> tuple:
+        """
+        返回启动以来的 (tx/s, shreds/s)。
+        """
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        return self.transactions / elapsed, self.shreds / elapsed
+
+    def interval_rates(self) -> tuple:
+        """
+        返回距上次调用以来的 (tx/s, shreds/s)。
+        """
+        now = time.monotonic()
+        last_time, last_tx, last_shreds = self._last
+        self._last = (now, self.transactions, self.shreds)
+        elapsed = max(now - last_time, 1e-9)
+        return (self.transactions - last_tx) / elapsed, (self.shreds - last_shreds) / elapsed
+
+
+class LeaderPipeline:
+    """
+    把交易源转换为 SyncResponse 流的有界流水线。
+
+    迭代 LeaderPipeline 得到按交易顺序排列的 SyncResponse；同一交易的分片连续输出，
+    tx_id 从 first_tx_id 开始递增。
+
+    传入事件循环 loop 时，输出队列改为 asyncio.Queue，由 async_batches 在该循环中消费，
+    序列化线程直接把结果交给事件循环，不占用执行器线程。
+
+    wrap 决定序列化阶段对每个分片的输出，默认为 SyncResponse；合并发送时传入 Shred.to_bytes，
+    再由 coalesced 按数量或时限把分片合并成批。
+
+    任一阶段出错时仍向下游传递结束标记；各迭代方法输出出错前已完成的交易后重新抛出该异常。
+
+    属性:
+        stats (PipelineStats): 吞吐量计数。
+        error (BaseException | None): 第一个出错阶段的异常。
+    """
+
+    def __init__(self, source: TransactionSource, queue_size: int = QUEUE_SIZE,
+                 report_interval: float = REPORT_INTERVAL, first_tx_id: int = 0,
+                 loop: Optional[asyncio.AbstractEventLoop] = None,
+                 wrap: Callable[[Any], Any] = to_response):
+        self._wrap = wrap
+        self._stop = threading.Event()
+        self._source = transaction_source(source, self._stop)  # 关闭后不再阻塞在 queue.Queue 上
+        self._signed: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._shredded: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._loop = loop
+        if loop is None:
+            self._output = queue.Queue(maxsize=queue_size)
+        else:
+            self._output = asyncio.Queue(maxsize=queue_size)
+        self.error: Optional[BaseException] = None
+        self._next_tx_id = first_tx_id
+        self._report_interval = report_interval
+        self._next_report = time.monotonic() + report_interval
+        self.stats = PipelineStats()
+        self._threads = [
+            threading.Thread(target=self._sign_stage, daemon=True),
+            threading.Thread(target=self._shred_stage, daemon=True),
+            threading.Thread(target=self._serialize_stage, daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def _put(self, target: queue.Queue, item) -> bool:
+        """
+        向有界队列放入 item，队列满时阻塞；流水线关闭时返回 False。
+        """
+        while not self._stop.is_set():
+            try:
+                target.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _put_output(self, item) -> bool:
+        """
+        把一笔交易的结果交给消费者；异步模式下在事件循环中入队，队列满时同样阻塞。
+        """
+        if self._loop is None:
+            return self._put(self._output, item)
+        if self._stop.is_set():
+            return False  # 关闭后事件循环可能已结束，不再提交
+        future = asyncio.run_coroutine_threadsafe(self._output.put(item), self._loop)
+        while not self._stop.is_set():
+            try:
+                future.result(timeout=0.1)
+                return True
+            except concurrent.futures.TimeoutError:
+                continue
+        future.cancel()
+        return False
+
+    def _get(self, source: queue.Queue, timeout: Optional[float] = None):
+        """
+        从队列取出一项；流水线关闭时返回 _DONE，超过 timeout 秒仍为空时返回 _EMPTY。
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self._stop.is_set():
+            wait = 0.1 if deadline is None else min(0.1, deadline - time.monotonic())
+            if wait <= 0:
+                return _EMPTY
+            try:
+                return source.get(timeout=wait)
+            except queue.Empty:
+                continue
+        return _DONE
+
+    def _fail(self, error: BaseException) -> None:
+        """
+        记录第一个出错阶段的异常，由消费者在收到结束标记后抛出。
+        """
+        if self.error is None:
+            self.error = error
+
+    def _raise_error(self) -> None:
+        if self.error is not None:
+            raise self.error
+
+    def _sign_stage(self) -> None:
+        try:
+            for item in self._source:
+                if self._stop.is_set():
+                    return
+                transaction_data = json.dumps(sign_transaction(dict(item))).encode()  # 对交易签名并编码
+                if not self._put(self._signed, (self._next_tx_id, transaction_data)):
+                    return
+                self._next_tx_id += 1
+        except Exception as error:
+            self._fail(error)
+        finally:
+            self._put(self._signed, _DONE)
+
+    def _shred_stage(self) -> None:
+        try:
+            while True:
+                item = self._get(self._signed)
+                if item is _DONE:
+                    return
+                tx_id, transaction_data = item
+                if not self._put(self._shredded, create_shreds(transaction_data, tx_id=tx_id)):
+                    return
+        except Exception as error:
+            self._fail(error)
+        finally:
+            self._put(self._shredded, _DONE)
+
+    def _serialize_stage(self) -> None:
+        try:
+            while True:
+                shreds = self._get(self._shredded)
+                if shreds is _DONE:
+                    return
+                if not self._put_output([self._wrap(shred) for shred in shreds]):
+                    return
+        except Exception as error:
+            self._fail(error)
+        finally:
+            self._put_output(_DONE)
+
+    def _delivered(self, items: list) -> None:
+        """
+        记录一笔交易的输出，并按间隔打印吞吐量。
+        """
+        self.stats.add(len(items))
+        if self._report_interval and time.monotonic() >= self._next_report:
+            tx_rate, shred_rate = self.stats.interval_rates()
+            print(f"leader pipeline: {tx_rate:.1f} tx/s, {shred_rate:.1f} shreds/s "
+                  f"(total {self.stats.transactions} tx, {self.stats.shreds} shreds)")
+            self._next_report = time.monotonic() + self._report_interval
+
+    def batches(self) -> Iterator[list]:
+        """
+        按交易迭代：每次返回一笔交易的全部输出。
+
+        异常:
+            Exception: 某个阶段出错时，输出已完成的交易后抛出该阶段的异常。
+        """
+        try:
+            while True:
+                items = self._get(self._output)
+                if items is _DONE:
+                    self._raise_error()
+                    return
+                self._delivered(items)
+                yield items
+        finally:
+            self.close()
+
+    def coalesced(self, max_count: int = COALESCE_MAX_SHREDS,
+                  max_delay: float = COALESCE_MAX_DELAY) -> Iterator[list]:
+        """
+        跨交易合并输出：凑满 max_count 个分片，或批内第一个分片已等待 max_delay 秒时输出一批。
+
+        异常:
+            Exception: 某个阶段出错时，输出已完成的交易后抛出该阶段的异常。
+        """
+        items: list = []
+        deadline = 0.0
+        try:
+            while True:
+                entry = self._get(self._output, deadline - time.monotonic() if items else None)
+                if entry is _EMPTY:  # 时限已到，不再等待凑满
+                    yield items
+                    items = []
+                    continue
+                if entry is _DONE:
+                    if items:
+                        yield items
+                    self._raise_error()
+                    return
+                self._delivered(entry)
+                if not items:
+                    deadline = time.monotonic() + max_delay
+                items.extend(entry)
+                while len(items) >= max_count:
+                    yield items[:max_count]
+                    items = items[max_count:]
+                    deadline = time.monotonic() + max_delay
+        finally:
+            self.close()
+
+    async def async_batches(self) -> AsyncIterator[list]:
+        """
+        batches 的异步版本，只能在构造时传入的事件循环中使用。
+        """
+        try:
+            while True:
+                items = await self._output.get()
+                if items is _DONE:
+                    self._raise_error()
+                    return
+                self._delivered(items)
+                yield items
+        finally:
+            self.close()
+
+    async def async_coalesced(self, max_count: int = COALESCE_MAX_SHREDS,
+                              max_delay: float = COALESCE_MAX_DELAY) -> AsyncIterator[list]:
+        """
+        coalesced 的异步版本，只能在构造时传入的事件循环中使用。
+        """
+        items: list = []
+        deadline = 0.0
+        try:
+            while True:
+                if items:
+                    try:
+                        entry = await asyncio.wait_for(self._output.get(),
+                                                       max(0.0, deadline - time.monotonic()))
+                    except asyncio.TimeoutError:
+                        yield items
+                        items = []
+                        continue
+                else:
+                    entry = await self._output.get()
+                if entry is _DONE:
+                    if items:
+                        yield items
+                    self._raise_error()
+                    return
+                self._delivered(entry)
+                if not items:
+                    deadline = time.monotonic() + max_delay
+                items.extend(entry)
+                while len(items) >= max_count:
+                    yield items[:max_count]
+                    items = items[max_count:]
+                    deadline = time.monotonic() + max_delay
+        finally:
+            self.close()
+
+    def __iter__(self) -> Iterator["sync_pb2.SyncResponse"]:
+        for responses in self.batches():
+            yield from responses
+
+    def close(self) -> None:
+        """
+        停止全部阶段。已在队列中的交易被丢弃。
+        """
+        self._stop.set()
+
+
+def main():
+    """
+    在本进程内驱动流水线并打印吞吐量。
+    """
+    parser = argparse.ArgumentParser(description="Leader sign/shred/serialize pipeline throughput")
+    parser.add_argument("--count", type=int, default=2000, help="交易笔数")
+    parser.add_argument("--source", help="JSONL 交易文件，默认重复示例交易")
+    args = parser.parse_args()
+
+    source = args.source if args.source else itertools.repeat(transaction)
+    pipeline = LeaderPipeline(itertools.islice(transaction_source(source), args.count), report_interval=0)
+    for _ in pipeline:
+        pass
+    tx_rate, shred_rate = pipeline.stats.rates()
+    print(f"{pipeline.stats.transactions} tx, {pipeline.stats.shreds} shreds: "
+          f"{tx_rate:.1f} tx/s, {shred_rate:.1f} shreds/s")
+
+
+if __name__ == "__main__":
+    main()
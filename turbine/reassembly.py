@@ -0,0 +1,271 @@
+"""
+验证节点的多交易分片重组缓冲区。
+
+分片按头部的 tx_id 归属到各自的交易，可以乱序、交错到达：
+
+- 每笔交易预分配一个 bytearray，数据分片按 index * 步长直接写入对应位置，不做字节串拼接；
+- 同一 FEC 集合内收到任意 num_data 个分片后立即恢复缺失的数据分片；
+- 交易的全部数据分片到齐后立即输出；
+- 超过 max_age 秒仍未完成的交易，或总占用超过 max_bytes 时最早的交易，会被淘汰。
+
+步长（除最后一个外每个数据分片的长度）由第一个非末尾的数据分片确定；在此之前到达的末尾分片先暂存。
+
+tx_id 在每个流上都从 0 开始，同一 tx_id 可能属于不同的交易（例如重启后重放的旧分片与新流的分片）。
+每笔交易记录第一个分片的标识，之后标识不一致的分片属于另一笔交易：丢弃旧的未完成交易，按新交易重新开始，
+已完成的 tx_id 也只忽略同一笔交易的迟到分片。
+
+- Merkle 模式下标识为 (total, 树根签名)，树根签名在各个流上唯一确定一笔交易；
+- 逐片签名模式下各分片签名不同，头部也无法区分两笔重用 tx_id 的交易，标识为 (total, 当前纪元)：
+  每开始接收一个新的流（例如重放结束后）调用 new_epoch，之前纪元的交易与新流的同一 tx_id 互不混合，
+  已完成的旧交易也不会挡住新交易的分片。
+"""
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+from shred import fec
+from shred.merkle import MERKLE_SIGNED
+from shred.shred import DATA_SHRED
+
+MAX_AGE = 10.0  # 未完成交易的最长保留时间（秒）
+MAX_BYTES = 64 * 1024 * 1024  # 全部未完成交易占用内存的上限
+COMPLETED_HISTORY = 4096  # 记住最近完成或淘汰的 tx_id 数量，用于丢弃迟到的分片
+
+
+class _PartialTransaction:
+    """
+    一笔尚未完成的交易。
+    """
+    __slots__ = ("total", "identity", "stride", "buffer", "received", "count", "last_length",
+                 "fec_sets", "done_sets", "parked", "created", "bytes_held")
+
+    def __init__(self, total: int, identity: tuple, created: float):
+        self.total = total
+        self.identity = identity  # (total, 树根签名)，逐片签名模式下为 (total, 纪元)
+        self.stride: Optional[int] = None
+        self.buffer: Optional[bytearray] = None
+        self.received = bytearray(total)  # 每个数据分片是否已写入
+        self.count = 0
+        self.last_length = 0
+        self.fec_sets: Dict[int, list] = {}  # fec_set_index -> 已收到的分片（用于恢复）
+        self.done_sets = set()  # 数据分片已齐的 FEC 集合
+        self.parked: Dict[int, bytes] = {}  # 步长未知时暂存的末尾分片
+        self.created = created
+        self.bytes_held = 0
+
+
+class ReassemblyBuffer:
+    """
+    按 tx_id 同时重组多笔交易。
+
+    参数:
+        max_age (float): 未完成交易的最长保留时间（秒）。
+        max_bytes (int): 全部未完成交易占用内存的上限（字节）。
+        clock (Callable[[], float]): 时钟，默认 time.monotonic。
+
+    属性:
+        completed (int): 已输出的交易数。
+        evicted_age (int): 因超时被淘汰的交易数。
+        evicted_memory (int): 因内存上限被淘汰的交易数。
+        duplicates (int): 重复或迟到而被忽略的分片数。
+        recovered (int): 通过 FEC 恢复的数据分片数。
+        conflicts (int): 因同一 tx_id 出现另一笔交易的分片而丢弃的未完成交易数。
+        epoch (int): 当前纪元，逐片签名模式的交易只与同一纪元的分片匹配。
+    """
+
+    def __init__(self, max_age: float = MAX_AGE, max_bytes: int = MAX_BYTES,
+                 clock: Callable[[], float] = time.monotonic):
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+        self._clock = clock
+        self._pending: "OrderedDict[int, _PartialTransaction]" = OrderedDict()  # 按创建时间排序
+        self._finished: "OrderedDict[int, tuple]" = OrderedDict()  # tx_id -> 交易标识
+        self.bytes_held = 0
+        self.completed = 0
+        self.evicted_age = 0
+        self.evicted_memory = 0
+        self.duplicates = 0
+        self.recovered = 0
+        self.conflicts = 0
+        self.epoch = 0
+
+    def new_epoch(self) -> None:
+        """
+        开始新的纪元：之后到达的逐片签名分片不会与此前纪元中同一 tx_id 的交易（未完成或已完成）匹配。
+        Merkle 模式的交易由树根签名区分，不受影响，重放后未完成的交易仍可由新流补齐。
+        """
+        self.epoch += 1
+
+    def metrics(self) -> Dict[str, int]:
+        """
+        返回当前的计数。
+        """
+        return {
+            "pending": len(self._pending),
+            "bytes_held": self.bytes_held,
+            "completed": self.completed,
+            "evicted_age": self.evicted_age,
+            "evicted_memory": self.evicted_memory,
+            "duplicates": self.duplicates,
+            "recovered": self.recovered,
+            "conflicts": self.conflicts,
+        }
+
+    def _identity(self, shred) -> tuple:
+        """
+        返回分片所属交易的标识：Merkle 模式下为 (total, 树根签名)，逐片签名模式下各分片签名不同，为 (total, 纪元)。
+        """
+        if shred.flags & MERKLE_SIGNED:
+            return shred.total, bytes(shred.signature)
+        return shred.total, self.epoch
+
+    def add(self, shred) -> Optional[Tuple[int, bytes]]:
+        """
+        加入一个已验证的分片。
+
+        参数:
+            shred (Shred): 已通过签名验证的分片。
+
+        返回:
+            Optional[Tuple[int, bytes]]: 该分片使交易完成时返回 (tx_id, 交易数据)，否则返回 None。
+        """
+        now = self._clock()
+        self._evict_expired(now)
+        tx_id = shred.tx_id
+        identity = self._identity(shred)
+        if tx_id in self._finished:
+            if self._finished[tx_id] == identity:
+                self.duplicates += 1
+                return None
+            del self._finished[tx_id]  # 该 tx_id 已被另一笔交易重用
+        partial = self._pending.get(tx_id)
+        if partial is not None and partial.identity != identity:
+            self._drop(tx_id, remember=False)  # 旧交易的分片不能与新交易混合
+            self.conflicts += 1
+            partial = None
+        if partial is None:
+            partial = self._pending[tx_id] = _PartialTransaction(shred.total, identity, now)
+        if shred.fec_set_index in partial.done_sets:
+            self.duplicates += 1
+            return None
+
+        if shred.shred_type == DATA_SHRED and (partial.received[shred.index] or shred.index in partial.parked):
+            self.duplicates += 1
+            return None
+        members = partial.fec_sets.setdefault(shred.fec_set_index, [])
+        members.append(shred)
+        self._hold(partial, len(shred.payload))
+        if shred.shred_type == DATA_SHRED:
+            self._place(partial, shred.index, shred.payload)
+        self._try_finish_set(partial, shred.fec_set_index, shred.num_data)
+
+        if partial.count == partial.total:
+            return self._finish(tx_id, partial)
+        self._evict_over_budget(tx_id)
+        return None
+
+    def _hold(self, partial: _PartialTransaction, size: int) -> None:
+        partial.bytes_held += size
+        self.bytes_held += size
+
+    def _place(self, partial: _PartialTransaction, index: int, payload) -> None:
+        """
+        把数据分片写入预分配缓冲区中的对应位置。
+        """
+        if partial.received[index]:
+            return
+        last = index == partial.total - 1
+        if partial.stride is None:
+            if last and partial.total > 1:
+                partial.parked[index] = bytes(payload)  # 还不知道步长
+                return
+            partial.stride = len(payload)
+            partial.buffer = bytearray(partial.stride * partial.total)  # 按最大长度预分配
+            self._hold(partial, len(partial.buffer))
+            for parked_index, parked in partial.parked.items():
+                self._write(partial, parked_index, parked)
+            partial.parked.clear()
+        self._write(partial, index, payload)
+
+    def _write(self, partial: _PartialTransaction, index: int, payload) -> None:
+        offset = index * partial.stride
+        partial.buffer[offset:offset + len(payload)] = payload
+        partial.received[index] = 1
+        partial.count += 1
+        if index == partial.total - 1:
+            partial.last_length = len(payload)
+
+    def _try_finish_set(self, partial: _PartialTransaction, fec_set_index: int, num_data: int) -> None:
+        """
+        FEC 集合的数据分片到齐时释放集合；收到足够分片时恢复缺失的数据分片。
+        """
+        indices = range(fec_set_index, fec_set_index + num_data)
+        missing = [i for i in indices if not partial.received[i] and i not in partial.parked]
+        members = partial.fec_sets[fec_set_index]
+        if missing and len(members) >= num_data:
+            recovered = fec.recover_data_shreds(members) or []  # 用纠删码恢复缺失的数据分片
+            for shred in recovered:
+                if not partial.received[shred.index] and shred.index not in partial.parked:
+                    self.recovered += 1
+                    self._place(partial, shred.index, shred.payload)
+            if recovered:
+                missing = None
+        if not missing:
+            released = sum(len(s.payload) for s in members)
+            partial.bytes_held -= released
+            self.bytes_held -= released
+            del partial.fec_sets[fec_set_index]
+            partial.done_sets.add(fec_set_index)
+
+    def _finish(self, tx_id: int, partial: _PartialTransaction) -> Tuple[int, bytes]:
+        length = (partial.total - 1) * partial.stride + partial.last_length
+        payload = bytes(memoryview(partial.buffer)[:length])
+        self._drop(tx_id)
+        self.completed += 1
+        return tx_id, payload
+
+    def _drop(self, tx_id: int, remember: bool = True) -> None:
+        """
+        移除交易；remember 为 True 时记住其 tx_id 与标识，之后到达的同一交易的分片不会再重新创建它。
+        """
+        partial = self._pending.pop(tx_id)
+        self.bytes_held -= partial.bytes_held
+        if not remember:
+            return
+        self._finished[tx_id] = partial.identity
+        if len(self._finished) > COMPLETED_HISTORY:
+            self._finished.popitem(last=False)
+
+    def _evict_expired(self, now: float) -> None:
+        while self._pending:
+            tx_id, partial = next(iter(self._pending.items()))
+            if now - partial.created <= self.max_age:
+                return
+            self._drop(tx_id)
+            self.evicted_age += 1
+
+    def _evict_over_budget(self, keep: int) -> None:
+        """
+        超出内存上限时从最早的交易开始淘汰，不淘汰刚写入的交易 keep。
+        """
+        for tx_id in list(self._pending):
+            if self.bytes_held <= self.max_bytes:
+                return
+            if tx_id != keep:
+                self._drop(tx_id)
+                self.evicted_memory += 1
+
+    def missing(self, tx_id: int) -> List[int]:
+        """
+        返回未完成交易 tx_id 尚缺的数据分片索引；交易未知或已完成时返回空列表。
+        """
+        partial = self._pending.get(tx_id)
+        if partial is None:
+            return []
+        return [i for i in range(partial.total) if not partial.received[i] and i not in partial.parked]
+
+    def pending(self) -> List[int]:
+        """
+        返回尚未完成的 tx_id，按创建时间排序。
+        """
+        return list(self._pending)
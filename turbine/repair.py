@@ -0,0 +1,197 @@
+"""
+BiStream 的双向流控与重传。
+
+验证节点通过请求流发送两类消息：
+
+- credits：追加的发送额度（分片数）。领导者收到第一次额度后启用流控，额度用完即暂停发送；
+  从不发送额度的旧客户端不受影响。
+- nacks：缺失的数据分片 (tx_id, index)。领导者从最近发送分片的环形缓冲区中取出原分片立即重发，
+  验证节点因此在一个往返时间内补齐，不必等待整笔交易重发。
+  同一请求中重复的索引与已在重传队列中的分片被忽略，重传队列最多 REPAIR_QUEUE_CAPACITY 个分片。
+"""
+import threading
+from collections import OrderedDict, deque
+from typing import Iterator, List, Optional, Tuple
+
+from shred.shred import DATA_SHRED, SIGNED_HEADER
+
+RETRANSMIT_CAPACITY = 8192  # 重传缓冲区保存的最近数据分片数
+REPAIR_QUEUE_CAPACITY = 1024  # 每个流排队等待重传的最多分片数，超出的 NACK 索引被忽略
+
+
+def shred_key(raw) -> Tuple[int, int, int]:
+    """
+    从二进制分片头部读出 (tx_id, index, shred_type)，不解析整个分片。
+    """
+    tx_id, index, _total, shred_type = SIGNED_HEADER.unpack_from(raw)[:4]
+    return tx_id, index, shred_type
+
+
+class RetransmitBuffer:
+    """
+    最近发送的数据分片的环形缓冲区，按 (tx_id, index) 查找。
+
+    属性:
+        capacity (int): 最多保存的分片数，超出时丢弃最早的分片。
+        hits (int): 命中的重传请求数。
+        misses (int): 已被淘汰或从未发送而无法满足的请求数。
+    """
+
+    def __init__(self, capacity: int = RETRANSMIT_CAPACITY):
+        self.capacity = capacity
+        self.hits = 0
+        self.misses = 0
+        self._items: "OrderedDict[Tuple[int, int], object]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, tx_id: int, index: int, response) -> None:
+        with self._lock:
+            self._items[(tx_id, index)] = response
+            if len(self._items) > self.capacity:
+                self._items.popitem(last=False)
+
+    def get(self, tx_id: int, index: int):
+        """
+        返回保存的响应，不存在时返回 None。
+        """
+        with self._lock:
+            response = self._items.get((tx_id, index))
+            if response is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return response
+
+
+class RepairSession:
+    """
+    领导者一侧单个流的流控与重传状态。
+
+    后台线程读取请求流：credits 增加额度，nacks 从重传缓冲区中取出分片排入重传队列。
+    send / transmit 在额度允许时先输出排队的重传分片，再输出新分片。
+    重复的索引、已在队列中的分片以及超出 max_repairs 的索引不再查找，计入 ignored。
+
+    参数:
+        request_iterator: gRPC 请求流。
+        buffer: 重传缓冲区，任何提供 get(tx_id, index) 的对象（RetransmitBuffer 或 BroadcastHub）。
+        max_repairs (int): 重传队列容量（分片数）。
+
+    属性:
+        retransmitted (int): 已重发的分片数。
+        ignored (int): 被忽略的 NACK 索引数。
+    """
+
+    def __init__(self, request_iterator, buffer: Optional[RetransmitBuffer] = None,
+                 max_repairs: int = REPAIR_QUEUE_CAPACITY):
+        self.buffer = buffer or RetransmitBuffer()
+        self.max_repairs = max_repairs
+        self.credits = 0
+        self.flow_control = False  # 收到第一次额度后启用
+        self.retransmitted = 0
+        self.ignored = 0
+        self._repairs: deque = deque()  # (tx_id, index), 响应
+        self._pending = set()  # 重传队列中的 (tx_id, index)
+        self._requests_done = False
+        self._closed = False
+        self._cond = threading.Condition()
+        self._reader = threading.Thread(target=self._read, args=(request_iterator,), daemon=True)
+        self._reader.start()
+
+    def _wanted(self, request) -> List[Tuple[int, int]]:
+        """
+        返回请求中需要重传的 (tx_id, index)：去重，跳过已在队列中的分片，不超过队列剩余容量。
+        """
+        keys = dict.fromkeys((nack.tx_id, index) for nack in request.nacks for index in nack.indices)
+        with self._cond:
+            room = self.max_repairs - len(self._repairs)
+            wanted = [key for key in keys if key not in self._pending][:max(0, room)]
+            self.ignored += sum(len(nack.indices) for nack in request.nacks) - len(wanted)
+        return wanted
+
+    def _read(self, request_iterator) -> None:
+        try:
+            for request in request_iterator:
+                repairs: List[Tuple[Tuple[int, int], object]] = []
+                for key in self._wanted(request):
+                    response = self.buffer.get(*key)
+                    if response is not None:
+                        repairs.append((key, response))
+                with self._cond:
+                    if request.credits:
+                        self.flow_control = True
+                        self.credits += request.credits
+                    for key, response in repairs:
+                        if key not in self._pending and len(self._repairs) < self.max_repairs:
+                            self._pending.add(key)
+                            self._repairs.append((key, response))
+                    self._cond.notify_all()
+        except Exception:
+            pass  # 客户端断开
+        finally:
+            with self._cond:
+                self._requests_done = True
+                self._cond.notify_all()
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def _wait_for_credit(self) -> bool:
+        """
+        等待可用额度；会话关闭时返回 False。调用方须持有 _cond。
+        """
+        while not self._closed and self.flow_control and self.credits <= 0:
+            self._cond.wait()
+        return not self._closed
+
+    def transmit(self, response=None) -> Iterator[object]:
+        """
+        在额度允许时依次取出排队的重传分片，最后取出 response（可为 None）。
+        """
+        while True:
+            with self._cond:
+                if not self._repairs and response is None:
+                    return  # 没有要发送的分片时不等待额度
+                if not self._wait_for_credit():
+                    return
+                if self._repairs:
+                    key, item = self._repairs.popleft()
+                    self._pending.discard(key)
+                    self.retransmitted += 1
+                elif response is not None:
+                    item, response = response, None
+                else:
+                    return
+                if self.flow_control:  # 启用流控前发送的分片不消耗额度
+                    self.credits -= 1
+            yield item
+
+    def send(self, response) -> Iterator[object]:
+        """
+        输出排队的重传分片与新分片 response，并把数据分片记入重传缓冲区。
+        """
+        tx_id, index, shred_type = shred_key(response.shred)
+        if shred_type == DATA_SHRED:
+            self.buffer.add(tx_id, index, response)
+        yield from self.transmit(response)
+
+    def remember(self, response) -> None:
+        """
+        只把分片记入重传缓冲区而不发送（用于模拟丢包）。
+        """
+        tx_id, index, shred_type = shred_key(response.shred)
+        if shred_type == DATA_SHRED:
+            self.buffer.add(tx_id, index, response)
+
+    def drain(self) -> Iterator[object]:
+        """
+        新分片发送完后继续响应重传请求，直到客户端关闭请求流或会话关闭。
+        """
+        while True:
+            yield from self.transmit()
+            with self._cond:
+                while not (self._closed or self._requests_done or self._repairs):
+                    self._cond.wait()
+                if self._closed or (self._requests_done and not self._repairs):
+                    return
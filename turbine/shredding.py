@@ -0,0 +1,85 @@
+"""
+领导者的签名与分片：对交易签名，把交易数据切分为数据分片与 FEC 编码分片并签名。
+
+领导者的服务（leader）与流水线（pipeline）共用这些函数与常量，测试台（harness）直接用 create_shreds 生成分片；
+验证节点（validator、node）用 get_verify_key 取得对应的验证密钥。
+"""
+import json
+from typing import Any
+
+import base58
+from nacl.signing import SigningKey, VerifyKey
+
+from shred import fec, merkle
+from shred.shred import DATA_SHRED, Shred
+from utils.key_utils import get_key_provider
+
+# 接收到的交易数据
+transaction = {
+    "message_header": {
+        "version": 1,
+        "account_count": 2,
+        "signature_count": 1
+    },
+    "account_keys": ["Alice", "Bob"],
+    "recent_blockhash": "5KQmYg7s8v9wX2y3z4a5b6c7d8e9f0g1h2i3j4k5l6m7n8o9p0q1r2s3t4u5v6w7",
+    "instructions": [],
+    "program_id": "TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA"
+}
+
+SHRED_LENGTH = 100  # 每个分片的长度
+FEC_DATA_SHREDS = 32  # 每个 FEC 集合的数据分片数 N
+FEC_CODING_SHREDS = 32  # 每个 FEC 集合的编码分片数 K，收到任意 N 个分片即可恢复
+MERKLE_SIGNING = True  # 对整笔交易的分片构建 Merkle 树，只签名树根；False 时逐片签名
+
+def get_signkey()->SigningKey:
+    """
+    返回签名密钥。密钥由进程级 KeyProvider 缓存，只有 config.yml 修改后才重新加载。
+    """
+    return get_key_provider("config.yml").signing_key()
+
+def get_verify_key()->VerifyKey:
+    """
+    返回验证密钥。密钥由进程级 KeyProvider 缓存，只有 config.yml 修改后才重新加载。
+    """
+    return get_key_provider("config.yml").verify_key()
+
+def sign_transaction(transaction:dict[str,Any]) -> dict[str,Any]:
+    """
+    对交易数据进行签名并返回签名后的交易数据。
+    """
+    transaction_signature = get_signkey().sign(json.dumps(transaction).encode()).signature  # 对交易数据进行签名
+    transaction.update({"signature": base58.b58encode(transaction_signature).decode()})  # 将签名添加到交易数据中
+    return transaction
+
+def create_shreds(transaction_data:bytes, num_data:int=FEC_DATA_SHREDS,
+                  num_coding:int=FEC_CODING_SHREDS, merkle_signing:bool=MERKLE_SIGNING,
+                  tx_id:int=0) -> list[Shred]:
+    """
+    将交易数据分片并返回分片对象列表。分片负载为原始字节，不再做 base58 编码。
+
+    每 num_data 个数据分片组成一个 FEC 集合，并紧随其后生成 num_coding 个编码分片，
+    验证节点收到集合中任意 num_data 个分片即可恢复该集合的数据。
+    merkle_signing 为 True 时整笔交易只做一次签名（Merkle 树根），每个分片携带包含证明。
+    tx_id 写入每个分片头部，验证节点据此区分不同交易的分片。
+    空交易生成一个空负载的数据分片，验证节点同样能重组出空交易。
+    """
+    total = max(1, (len(transaction_data) + SHRED_LENGTH - 1) // SHRED_LENGTH)  # 数据分片总数（向上取整）
+    shreds = []
+    for fec_set_index in range(0, total, num_data):
+        set_size = min(num_data, total - fec_set_index)  # 最后一个集合可能不满
+        data_shreds = []
+        for index in range(fec_set_index, fec_set_index + set_size):
+            payload = transaction_data[index * SHRED_LENGTH:(index + 1) * SHRED_LENGTH]  # 分片数据
+            data_shreds.append(Shred(index, total, payload, DATA_SHRED,
+                                     fec_set_index, set_size, num_coding, tx_id))  # 创建数据分片
+        shreds.extend(data_shreds)
+        if num_coding:
+            shreds.extend(fec.make_coding_shreds(data_shreds, num_coding))  # 生成编码分片
+    if merkle_signing:
+        merkle.sign_shreds(shreds, get_signkey())  # 只对 Merkle 树根签名一次
+        return shreds
+    signKey = get_signkey()  # 获取签名密钥
+    for shred in shreds:
+        shred.sign_shred(signKey)  # 对分片进行签名
+    return shreds
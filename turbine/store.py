@@ -0,0 +1,319 @@
+"""
+验证节点的内存映射分片存储。
+
+分片以线路格式追加写入目录中的定长段文件（每段 segment_size 字节，mmap 映射），
+内存中只保留 (tx_id, index, shred_type, 签名) -> (段, 偏移) 的索引。tx_id 在每个流上都从 0 开始，
+键中的签名（Merkle 模式下为树根签名）区分重用同一 tx_id 的不同交易：
+
+- 段头为魔数、版本与创建时间；其后依次是记录，每条记录为 4 字节长度加原始分片，长度为 0 表示段内数据结束；
+- 写入时先写分片再写长度，写到一半中断的记录在重新打开时被忽略；
+- 当前段放不下新记录时封存并新建下一段；
+- 读取返回指向映射区的 memoryview，不发生拷贝；访问映射区时持有锁，不会与 truncate 关闭映射交错；
+- truncate(max_age) 删除最新数据早于 max_age 秒的已封存段（段 i 的数据不晚于段 i + 1 的创建时间）。
+
+重新打开同一目录时扫描全部段重建索引，用于重启后恢复未完成的交易，以及从磁盘响应重传请求。
+"""
+import mmap
+import os
+import struct
+import threading
+import time
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from shred.shred import DATA_SHRED, SHRED_HEADER, SIGNED_HEADER, Shred
+from turbine.reassembly import ReassemblyBuffer
+from turbine.repair import shred_key
+
+SEGMENT_SIZE = 64 * 1024 * 1024  # 每个段文件的大小（字节）
+SEGMENT_SUFFIX = ".seg"
+SEGMENT_MAGIC = b"SHRD"
+SEGMENT_VERSION = 2  # 分片头部加入 flags 后记录格式改变
+SEGMENT_HEADER = struct.Struct("<4sHd")  # 魔数, 版本, 创建时间（Unix 时间戳）
+RECORD_HEADER = struct.Struct("<I")  # 记录长度
+KEY_SIZE = SIGNED_HEADER.size + 64  # 索引键所需的前缀：签名覆盖的头部字段与签名
+
+StoreKey = Tuple[int, int, int, bytes]  # (tx_id, index, shred_type, 签名)
+
+
+def store_key(raw) -> StoreKey:
+    """
+    从二进制分片头部读出存储键 (tx_id, index, shred_type, 签名)。
+    """
+    return shred_key(raw) + (bytes(raw[SIGNED_HEADER.size:KEY_SIZE]),)
+
+
+class _Segment:
+    """
+    一个已映射的段文件。
+    """
+    __slots__ = ("seq", "path", "file", "map", "created", "end")
+
+    def __init__(self, seq: int, path: str, file, mapped: mmap.mmap, created: float, end: int):
+        self.seq = seq
+        self.path = path
+        self.file = file
+        self.map = mapped
+        self.created = created
+        self.end = end  # 下一条记录的写入偏移
+
+    def records(self, start: int = SEGMENT_HEADER.size) -> Iterator[Tuple[int, int]]:
+        """
+        依次返回 (记录偏移, 分片长度)，遇到长度为 0 或越界的记录时停止。
+        """
+        offset = start
+        size = len(self.map)
+        while offset + RECORD_HEADER.size <= size:
+            (length,) = RECORD_HEADER.unpack_from(self.map, offset)
+            if length == 0 or offset + RECORD_HEADER.size + length > size:
+                return
+            yield offset, length
+            offset += RECORD_HEADER.size + length
+
+    def close(self) -> None:
+        try:
+            self.map.close()
+        except BufferError:
+            pass  # 仍有读者持有 memoryview，映射在最后一个视图释放后回收
+        self.file.close()
+
+
+class ShredStore:
+    """
+    追加写入的分片存储，按 (tx_id, index, shred_type, 签名) 去重，按位置零拷贝读取。
+
+    写入只能在一个线程中进行；get / scan 可以在其他线程中调用，二者在持有锁时访问映射区。
+    get / scan 返回的 memoryview 在所属段被 truncate 删除后仍然有效（映射在视图释放后才回收）。
+
+    参数:
+        directory (str): 段文件所在目录，不存在时创建；已有段文件时重建索引并在最后一段之后继续写入。
+        segment_size (int): 新建段文件的大小（字节）。
+        max_age (float | None): 不为 None 时，每次封存段后自动调用 truncate(max_age)。
+        clock (Callable[[], float]): 时钟，默认 time.time（段创建时间持久化到文件中，需要跨进程可比）。
+
+    属性:
+        appended (int): 写入的分片数。
+        duplicates (int): 已存在而未写入的分片数。
+        truncated (int): 被删除的段数。
+
+    异常:
+        ValueError: 段文件头部无效时抛出。
+    """
+
+    def __init__(self, directory: str, segment_size: int = SEGMENT_SIZE, max_age: Optional[float] = None,
+                 clock: Callable[[], float] = time.time):
+        self.directory = directory
+        self.segment_size = segment_size
+        self.max_age = max_age
+        self._clock = clock
+        self._segments: List[_Segment] = []  # 按序号排列，最后一段为当前写入段
+        self._index: Dict[StoreKey, Tuple[_Segment, int]] = {}
+        self._latest: Dict[Tuple[int, int, int], Tuple[_Segment, int]] = {}  # 每个位置最近写入的分片
+        self._lock = threading.Lock()
+        self.appended = 0
+        self.duplicates = 0
+        self.truncated = 0
+        os.makedirs(directory, exist_ok=True)
+        for name in sorted(os.listdir(directory)):
+            if name.endswith(SEGMENT_SUFFIX):
+                self._recover(int(name[:-len(SEGMENT_SUFFIX)]), os.path.join(directory, name))
+
+    def _path(self, seq: int) -> str:
+        return os.path.join(self.directory, f"{seq:010d}{SEGMENT_SUFFIX}")
+
+    def _map(self, path: str, create: bool):
+        file = open(path, "w+b" if create else "r+b")
+        if create:
+            file.truncate(self.segment_size)
+        return file, mmap.mmap(file.fileno(), 0)
+
+    def _recover(self, seq: int, path: str) -> None:
+        """
+        映射已有的段文件，把其中的记录加入索引。
+        """
+        file, mapped = self._map(path, create=False)
+        magic, version, created = SEGMENT_HEADER.unpack_from(mapped)
+        if magic != SEGMENT_MAGIC or version != SEGMENT_VERSION:
+            mapped.close()
+            file.close()
+            raise ValueError(f"invalid shred segment: {path}")
+        segment = _Segment(seq, path, file, mapped, created, SEGMENT_HEADER.size)
+        for offset, length in segment.records():
+            start = offset + RECORD_HEADER.size
+            self._remember(store_key(mapped[start:start + KEY_SIZE]), segment, offset)
+            segment.end = start + length
+        self._segments.append(segment)
+
+    def _remember(self, key: StoreKey, segment: _Segment, offset: int) -> None:
+        self._index[key] = (segment, offset)
+        self._latest[key[:3]] = (segment, offset)
+
+    def _open_segment(self) -> _Segment:
+        seq = self._segments[-1].seq + 1 if self._segments else 0
+        path = self._path(seq)
+        file, mapped = self._map(path, create=True)
+        created = self._clock()
+        SEGMENT_HEADER.pack_into(mapped, 0, SEGMENT_MAGIC, SEGMENT_VERSION, created)
+        segment = _Segment(seq, path, file, mapped, created, SEGMENT_HEADER.size)
+        with self._lock:
+            self._segments.append(segment)
+        return segment
+
+    def append(self, raw) -> bool:
+        """
+        追加一个线路格式的分片。
+
+        参数:
+            raw (bytes): 线路格式的分片，通常为已通过验证的分片。
+
+        返回:
+            bool: 写入时返回 True；同一 (tx_id, index, shred_type, 签名) 已存在时不写入并返回 False。
+
+        异常:
+            ValueError: 分片短于头部，或单条记录超过段容量时抛出。
+        """
+        if len(raw) < SHRED_HEADER.size:
+            raise ValueError("shred is shorter than its header")
+        size = RECORD_HEADER.size + len(raw)
+        if SEGMENT_HEADER.size + size > self.segment_size:
+            raise ValueError("shred does not fit in a segment")
+        key = store_key(raw)
+        if key in self._index:
+            self.duplicates += 1
+            return False
+        segment = self._segments[-1] if self._segments else self._open_segment()
+        if segment.end + size > len(segment.map):
+            segment.map.flush()  # 封存当前段
+            segment = self._open_segment()
+            if self.max_age is not None:
+                self.truncate(self.max_age)
+        offset = segment.end
+        segment.map[offset + RECORD_HEADER.size:offset + size] = raw
+        RECORD_HEADER.pack_into(segment.map, offset, len(raw))  # 最后写长度，中断的写入不可见
+        segment.end = offset + size
+        with self._lock:
+            self._remember(key, segment, offset)
+        self.appended += 1
+        return True
+
+    def get(self, tx_id: int, index: int, shred_type: int = DATA_SHRED,
+            signature: Optional[bytes] = None) -> Optional[memoryview]:
+        """
+        返回已存储分片的 memoryview（指向映射区，不拷贝），不存在时返回 None。
+        不指定 signature 时返回该位置最近写入的分片。
+        """
+        with self._lock:
+            if signature is None:
+                location = self._latest.get((tx_id, index, shred_type))
+            else:
+                location = self._index.get((tx_id, index, shred_type, bytes(signature)))
+            if location is None:
+                return None
+            segment, offset = location
+            (length,) = RECORD_HEADER.unpack_from(segment.map, offset)
+            start = offset + RECORD_HEADER.size
+            return memoryview(segment.map)[start:start + length]
+
+    def __contains__(self, key: StoreKey) -> bool:
+        return key in self._index
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def scan(self) -> Iterator[memoryview]:
+        """
+        按写入顺序返回全部已存储分片的 memoryview，用于重启后重建重组状态。
+        每段的视图在持有锁时取出；迭代期间被 truncate 删除的段不再返回。
+        """
+        with self._lock:
+            segments = list(self._segments)
+        for segment in segments:
+            with self._lock:
+                if segment not in self._segments:  # 已被 truncate 或 close 移除
+                    continue
+                view = memoryview(segment.map)
+                views = [view[offset + RECORD_HEADER.size:offset + RECORD_HEADER.size + length]
+                         for offset, length in segment.records()]
+            yield from views
+
+    def truncate(self, max_age: float) -> int:
+        """
+        删除最新数据早于 max_age 秒的已封存段，当前写入段不会被删除。
+
+        返回:
+            int: 删除的段数。
+        """
+        cutoff = self._clock() - max_age
+        removed = []
+        with self._lock:
+            # 段 i 的全部数据都写于段 i + 1 创建之前
+            while len(self._segments) > 1 and self._segments[1].created < cutoff:
+                segment = self._segments.pop(0)
+                for offset, length in segment.records():
+                    start = offset + RECORD_HEADER.size
+                    key = store_key(segment.map[start:start + KEY_SIZE])
+                    del self._index[key]
+                    if self._latest.get(key[:3], (None,))[0] is segment:
+                        del self._latest[key[:3]]
+                removed.append(segment)
+            for segment in removed:
+                segment.close()
+        for segment in removed:
+            os.remove(segment.path)
+        self.truncated += len(removed)
+        return len(removed)
+
+    def flush(self) -> None:
+        """
+        把当前写入段刷新到磁盘。
+        """
+        if self._segments:
+            self._segments[-1].map.flush()
+
+    def close(self) -> None:
+        """
+        刷新并关闭全部段文件。
+        """
+        self.flush()
+        with self._lock:
+            segments, self._segments = self._segments, []
+            self._index.clear()
+            self._latest.clear()
+            for segment in segments:
+                segment.close()
+
+    def stats(self) -> Dict[str, int]:
+        """
+        返回存储的计数与占用。
+        """
+        with self._lock:
+            return {
+                "shreds": len(self._index),
+                "segments": len(self._segments),
+                "bytes": sum(len(s.map) for s in self._segments),
+                "appended": self.appended,
+                "duplicates": self.duplicates,
+                "truncated": self.truncated,
+            }
+
+
+def replay(store: ShredStore, reassembly: ReassemblyBuffer) -> List[Tuple[int, bytes]]:
+    """
+    把存储中的分片按写入顺序重新加入重组缓冲区，用于重启后恢复未完成的交易。
+    存储中的分片写入前已通过验证，这里不再验证签名。重放结束后调用 reassembly.new_epoch，
+    新流中重用同一 tx_id 的逐片签名交易不会与重放的交易混合，也不会被重放中已完成的交易挡住；
+    Merkle 模式的交易由树根签名区分，重放后未完成的交易仍可由新流补齐。
+
+    参数:
+        store (ShredStore): 分片存储。
+        reassembly (ReassemblyBuffer): 新建的重组缓冲区。
+
+    返回:
+        List[Tuple[int, bytes]]: 重放过程中完成的交易 (tx_id, 交易数据)，通常在重启前已经输出过。
+    """
+    completed = []
+    for raw in store.scan():
+        transaction = reassembly.add(Shred.from_bytes(raw))
+        if transaction is not None:
+            completed.append(transaction)
+    reassembly.new_epoch()
+    return completed
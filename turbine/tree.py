@@ -0,0 +1,132 @@
+"""
+Turbine 传播树。
+
+所有节点用相同的种子对验证节点做确定性的按质押加权洗牌，得到一致的排列，
+再按固定扇出（fanout）把排列组织成一棵树：
+
+- 领导者只把分片发给排列中的前 fanout 个节点；
+- 排列中第 i 个节点把分片转发给第 fanout*(i+1) 到 fanout*(i+1)+fanout-1 个节点。
+
+这样领导者的出口流量是 O(fanout) 而不是 O(节点数)，树高为 O(log_fanout(节点数))。
+"""
+import hashlib
+import math
+from typing import Dict, List, NamedTuple, Optional, Sequence
+
+DEFAULT_FANOUT = 200  # 默认扇出
+DEFAULT_SEED = "turbine"  # 默认洗牌种子（命令行）
+
+
+class Node(NamedTuple):
+    """
+    集群中的一个验证节点。
+
+    属性:
+        node_id (int): 节点编号。
+        address (str): gRPC 服务地址，例如 "localhost:50101"。
+        stake (int): 质押量，决定其在洗牌中靠前的概率。
+    """
+    node_id: int
+    address: str
+    stake: int
+
+
+def _uniform(seed: bytes, node_id: int) -> float:
+    """
+    由种子和节点编号确定性地生成 (0, 1) 区间的伪随机数。
+    """
+    digest = hashlib.sha256(seed + node_id.to_bytes(8, "little")).digest()
+    return (int.from_bytes(digest[:8], "little") + 1) / (2 ** 64 + 2)
+
+
+def parse_peers(peers: Sequence[str]) -> List[Node]:
+    """
+    解析命令行给出的验证节点列表。
+
+    参数:
+        peers (Sequence[str]): "地址" 或 "地址=质押"，节点编号按顺序从 0 开始，质押默认为 1。
+            领导者与全部验证节点必须使用相同的列表。
+
+    返回:
+        List[Node]: 验证节点。
+
+    异常:
+        ValueError: 质押不是整数时抛出。
+    """
+    nodes = []
+    for node_id, peer in enumerate(peers):
+        address, _, stake = peer.partition("=")
+        nodes.append(Node(node_id, address, int(stake) if stake else 1))
+    return nodes
+
+
+def weighted_shuffle(nodes: Sequence[Node], seed: bytes) -> List[Node]:
+    """
+    确定性的按质押加权洗牌（Efraimidis-Spirakis 加权无放回抽样）。
+
+    每个节点的排序键为 -ln(u) / stake，键越小越靠前；质押越大，越可能排在前面。
+    质押为 0 的节点排在最后，按编号排序。
+
+    参数:
+        nodes (Sequence[Node]): 验证节点。
+        seed (bytes): 洗牌种子，所有节点必须相同。
+
+    返回:
+        List[Node]: 洗牌后的节点列表。
+    """
+    staked = [n for n in nodes if n.stake > 0]
+    unstaked = sorted((n for n in nodes if n.stake <= 0), key=lambda n: n.node_id)
+    staked.sort(key=lambda n: (-math.log(_uniform(seed, n.node_id)) / n.stake, n.node_id))
+    return staked + unstaked
+
+
+class TurbineTree:
+    """
+    由加权洗牌结果构建的传播树。
+
+    属性:
+        fanout (int): 每个节点（包括领导者）最多转发给的子节点数。
+        order (List[Node]): 洗牌后的节点顺序。
+    """
+
+    def __init__(self, nodes: Sequence[Node], seed: bytes, fanout: int = DEFAULT_FANOUT):
+        if fanout < 1:
+            raise ValueError("fanout must be positive")
+        self.fanout = fanout
+        self.order = weighted_shuffle(nodes, seed)
+        self._position: Dict[int, int] = {n.node_id: i for i, n in enumerate(self.order)}
+
+    def _children_at(self, first: int) -> List[Node]:
+        return self.order[first:first + self.fanout]
+
+    def leader_children(self) -> List[Node]:
+        """
+        返回领导者直接发送的节点。
+        """
+        return self._children_at(0)
+
+    def children(self, node_id: int) -> List[Node]:
+        """
+        返回节点 node_id 需要转发的子节点。
+        """
+        return self._children_at(self.fanout * (self._position[node_id] + 1))
+
+    def parent(self, node_id: int) -> Optional[Node]:
+        """
+        返回节点 node_id 的父节点，父节点为领导者时返回 None。
+        """
+        position = self._position[node_id]
+        if position < self.fanout:
+            return None
+        return self.order[position // self.fanout - 1]
+
+    def depth(self, node_id: int) -> int:
+        """
+        返回节点所在的层数，领导者的直接子节点为第 1 层。
+        """
+        depth = 1
+        parent = self.parent(node_id)
+        while parent is not None:
+            depth += 1
+            parent = self.parent(parent.node_id)
+        return depth
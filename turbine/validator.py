@@ -1,34 +1,42 @@
+import argparse
+import asyncio
 import base58
+import collections
 import grpc
 import json
-from nacl.signing import SigningKey
-from utils.config_utils import load_config
+import queue
+import threading
+import time
 from shred.shred import Shred
-from grpc_gen import sync_pb2_grpc
+from grpc_gen import sync_pb2, sync_pb2_grpc
+from turbine.dedup import ShredDedup, SignatureCache
+from turbine.node import ValidatorNode
+from turbine.reassembly import ReassemblyBuffer
+from turbine.shredding import get_verify_key
+from turbine.store import ShredStore, replay
+from turbine.tree import DEFAULT_FANOUT, DEFAULT_SEED, TurbineTree, parse_peers
 
-def create_grpc_stub():
+LEADER_ADDRESS = "localhost:50051"  # 默认的领导者地址（--leader）
+VERIFY_BATCH = 16  # 异步模式下每批提交给执行器验证的分片数
+VERIFY_WINDOW = 4  # 异步模式下同时在执行器中验证的批次数上限
+VERIFY_WORKERS = 4  # 流水线模式下的验证线程数（PyNaCl 验证时释放 GIL）
+PIPELINE_QUEUE_SIZE = 1024  # 流水线模式下阶段之间队列的容量（批）
+CREDIT_WINDOW = 256  # 重传模式下授予领导者的发送额度（分片数）
+NACK_RETRY = 0.2  # 同一交易两次重传请求之间的最小间隔（秒）
+
+def create_grpc_stub(address=LEADER_ADDRESS):
     """
     创建 gRPC 客户端存根。
 
+    参数:
+        address (str): 服务端地址。
+
     返回:
         sync_pb2_grpc.StreamServiceStub: gRPC 客户端存根。
     """
-    channel = grpc.insecure_channel("localhost:50051")
+    channel = grpc.insecure_channel(address)
     return sync_pb2_grpc.StreamServiceStub(channel)
 
-def get_verify_key():
-    """
-    从配置文件加载私钥并生成签名密钥对。
-
-    返回:
-        nacl.signing.VerifyKey: 验证密钥。
-    """
-    config = load_config("config.yml")
-    private_key = config["private_key"]
-    seed = base58.b58decode(private_key)[:32]
-    signing_key = SigningKey(seed)
-    return signing_key.verify_key
-
 def empty_request_iterator():
     """
     返回一个空的请求迭代器。
@@ -38,43 +46,526 @@ def empty_request_iterator():
     """
     return iter([])
 
-def json_to_shred(d) -> Shred:
+def parse_shred(raw, stats=None):
     """
-    将 JSON 数据转换为 Shred 对象。
+    解析一个二进制分片。截断或格式错误的分片被丢弃，不影响后续接收。
 
     参数:
-        d (dict): JSON 数据。
+        raw (bytes): 线路格式的分片。
+        stats (dict | None): 不为 None 时把丢弃的分片计入 stats["malformed"]。
 
     返回:
-        Shred: Shred 对象。
+        Shred | None: 解析得到的分片；无法解析时返回 None。
     """
-    shred = Shred(d['index'], d['total'], d['payload'])
-    shred.signature = d['signature']
-    return shred
+    try:
+        return Shred.from_bytes(raw)
+    except ValueError:
+        if stats is not None:
+            stats["malformed"] = stats.get("malformed", 0) + 1
+        return None
 
-def process_responses(stub):
+def process_responses(stub, verbose=True, store=None, stats=None):
     """
-    处理来自 gRPC 服务器的响应。
+    处理来自 gRPC 服务器的响应。返回时取消响应流，领导者随即释放该订阅。
 
     参数:
         stub (sync_pb2_grpc.StreamServiceStub): gRPC 客户端存根。
+        verbose (bool): 是否打印每个分片的验证结果。
+        store (ShredStore | None): 不为 None 时先用其中的分片恢复未完成的交易，
+            并把验证通过的分片追加写入。
+        stats (dict | None): 不为 None 时累加接收计数（"malformed"：无法解析而丢弃的分片数）。
 
     返回:
         bytes: 累积的有效负载数据。
+
+    抛出:
+        RuntimeError: 数据流结束时仍有 FEC 集合无法恢复。
     """
     responses = stub.BiStream(empty_request_iterator())
-    payload = b""
+    reassembly = ReassemblyBuffer()  # 按 tx_id 重组，分片可以乱序、交错到达
+    dedup = ShredDedup()  # 重复分片在解析之前丢弃
+    verified_roots = SignatureCache()  # 已验证的签名，同一树根只做一次签名验证
+    if store is not None:
+        replay(store, reassembly)  # 重放中完成的交易在重启前已经输出过
+
+    try:
+        for response in responses:
+            if dedup.seen(response.shred):
+                continue
+            res_data = parse_shred(response.shred, stats)
+            if res_data is None:
+                continue
+            verify = res_data.verify_shred(get_verify_key(), verified_roots)
+            if verbose:
+                print("验证每个shred的签名:",verify)
+                print(f"Received from Server: {response.success}:{res_data}:{verify}")
+            if verify and store is not None:
+                store.append(response.shred)
+            completed = reassembly.add(res_data) if verify else None
+            if completed is not None:
+                return completed[1]
+    finally:
+        responses.cancel()
+    raise RuntimeError("stream ended before the transaction could be reassembled")
+
+class RequestStream:
+    """
+    发往领导者的请求流：send 放入的 SyncRequest 由 gRPC 在后台线程中读取。
+    """
+
+    def __init__(self):
+        self._queue = queue.Queue()
+
+    def send(self, request):
+        self._queue.put(request)
+
+    def close(self):
+        self._queue.put(None)
+
+    def __iter__(self):
+        while True:
+            request = self._queue.get()
+            if request is None:
+                return
+            yield request
+
+def process_responses_repair(stub, node_id=0, credit_window=CREDIT_WINDOW, verbose=False, stats=None):
+    """
+    使用请求流做流控与重传的 process_responses。
+
+    开始时授予领导者 credit_window 个分片的额度，每处理一半额度再补充；
+    收到更新交易的分片时，说明更早的交易已发送完毕，立即为其缺失的数据分片发送 NACK，
+    之后每隔 NACK_RETRY 秒重复，直到交易完成。
+
+    参数:
+        stub (sync_pb2_grpc.StreamServiceStub): gRPC 客户端存根。
+        node_id (int): 本节点编号。
+        credit_window (int): 发送额度（分片数）。
+        verbose (bool): 是否打印重传请求。
+        stats (dict | None): 不为 None 时累加接收计数（"malformed"：无法解析而丢弃的分片数）。
+
+    返回:
+        bytes: 第一笔重组完成的交易数据。
+
+    抛出:
+        RuntimeError: 数据流结束时仍没有完成的交易。
+    """
+    requests = RequestStream()
+    requests.send(sync_pb2.SyncRequest(node_id=node_id, credits=credit_window))
+    responses = stub.BiStream(iter(requests))
+    reassembly = ReassemblyBuffer()
+    dedup = ShredDedup()
+    verified_roots = SignatureCache()
+    verify_key = get_verify_key()
+    consumed = 0
+    newest = -1
+    nacked = {}  # tx_id -> 上次发送 NACK 的时间
+    next_scan = 0.0
+    try:
+        for response in responses:
+            consumed += 1
+            if consumed >= credit_window // 2:
+                requests.send(sync_pb2.SyncRequest(node_id=node_id, credits=consumed))  # 补充额度
+                consumed = 0
+            if dedup.seen(response.shred):
+                continue
+            shred = parse_shred(response.shred, stats)
+            if shred is None or not shred.verify_shred(verify_key, verified_roots):
+                continue
+            completed = reassembly.add(shred)
+            if completed is not None:
+                return completed[1]
+            now = time.monotonic()
+            if shred.tx_id <= newest and now < next_scan:
+                continue
+            newest = max(newest, shred.tx_id)
+            next_scan = now + NACK_RETRY
+            nacks = []
+            for tx_id in reassembly.pending():
+                if tx_id < newest and now - nacked.get(tx_id, 0.0) >= NACK_RETRY:
+                    missing = reassembly.missing(tx_id)
+                    if missing:
+                        nacks.append(sync_pb2.Nack(tx_id=tx_id, indices=missing))
+                        nacked[tx_id] = now
+            if nacks:
+                if verbose:
+                    print("NACK:", [(n.tx_id, len(n.indices)) for n in nacks])
+                requests.send(sync_pb2.SyncRequest(node_id=node_id, nacks=nacks))
+    finally:
+        requests.close()
+        responses.cancel()
+    raise RuntimeError("stream ended before the transaction could be reassembled")
+
+def process_batches(stub, verbose=False, stats=None):
+    """
+    处理 BatchStream 返回的 ShredBatch：每条消息携带多个分片，其余与 process_responses 相同。
+
+    参数:
+        stub (sync_pb2_grpc.StreamServiceStub): gRPC 客户端存根。
+        verbose (bool): 是否打印每个分片的验证结果。
+        stats (dict | None): 不为 None 时累加接收计数（"malformed"：无法解析而丢弃的分片数）。
+
+    返回:
+        bytes: 第一笔重组完成的交易数据。
+
+    抛出:
+        RuntimeError: 数据流结束时仍没有完成的交易。
+    """
+    batches = stub.BatchStream(empty_request_iterator())
+    reassembly = ReassemblyBuffer()
+    dedup = ShredDedup()
+    verified_roots = SignatureCache()
+    verify_key = get_verify_key()
+    try:
+        for batch in batches:
+            for raw in batch.shreds:
+                if dedup.seen(raw):
+                    continue
+                shred = parse_shred(raw, stats)
+                if shred is None:
+                    continue
+                verify = shred.verify_shred(verify_key, verified_roots)
+                if verbose:
+                    print(f"Received from Server: {shred}:{verify}")
+                completed = reassembly.add(shred) if verify else None
+                if completed is not None:
+                    return completed[1]
+    finally:
+        batches.cancel()
+    raise RuntimeError("stream ended before the transaction could be reassembled")
+
+class StageStats:
+    """
+    流水线单个阶段的计数。
+
+    属性:
+        name (str): 阶段名。
+        items (int): 已处理的条目数。
+        batches (int): 已处理的批次数。
+        busy (float): 处理耗时合计（秒，多个工作线程累加）。
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.items = 0
+        self.batches = 0
+        self.busy = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, items, elapsed):
+        with self._lock:
+            self.items += items
+            self.batches += 1
+            self.busy += elapsed
+
+class VerificationPipeline:
+    """
+    验证节点的分级流水线：接收 → 解析 → 验证 → 重组。
+
+    接收线程只调用 submit 把原始字节放入队列，不做任何密码学运算；
+    解析、验证、重组各由独立的线程（组）处理，阶段之间是有界队列，队列元素为一批条目。
+    每个工作线程一次取出队列中已有的多个批次（合计不超过 batch_size 个条目）一起处理。
+    解析阶段先用 dedup 丢弃重复分片；同一 Merkle 树根的签名在 verified_roots 中只验证一次。
+    无法解析或未通过验证的分片计入 rejected；某一批处理出错时整批计入 rejected，工作线程继续运行。
+
+    参数:
+        verify_key (VerifyKey): 领导者公钥。
+        verify_workers (int): 验证线程数。
+        deserialize_workers (int): 解析线程数。
+        batch_size (int): 每个工作线程一次处理的最多条目数。
+        queue_size (int): 每个队列的容量（批）。
+        on_transaction (Callable[[int, bytes], None]): 交易重组完成时的回调，在重组线程中调用。
+    """
+
+    def __init__(self, verify_key, verify_workers=VERIFY_WORKERS, deserialize_workers=1,
+                 batch_size=VERIFY_BATCH, queue_size=PIPELINE_QUEUE_SIZE, on_transaction=None):
+        self.verify_key = verify_key
+        self.batch_size = batch_size
+        self.on_transaction = on_transaction
+        self.reassembly = ReassemblyBuffer()
+        self.dedup = ShredDedup()
+        self.verified_roots = SignatureCache()  # 已验证的签名，各验证线程共享
+        self.rejected = 0
+        self.started = time.monotonic()
+        self._lock = threading.Lock()
+        self._deserialize_workers = deserialize_workers
+        self._raw = queue.Queue(maxsize=queue_size)
+        self._parsed = queue.Queue(maxsize=queue_size)
+        self._verified = queue.Queue(maxsize=queue_size)
+        self.stages = {
+            "deserialize": StageStats("deserialize"),
+            "verify": StageStats("verify"),
+            "reassemble": StageStats("reassemble"),
+        }
+        self._threads = []
+        stages = [
+            ("deserialize", self._deserialize, self._raw, self._parsed, deserialize_workers),
+            ("verify", self._verify, self._parsed, self._verified, verify_workers),
+            ("reassemble", self._reassemble, self._verified, None, 1),  # ReassemblyBuffer 非线程安全
+        ]
+        for position, (name, func, inbox, outbox, workers) in enumerate(stages):
+            downstream = stages[position + 1][4] if position + 1 < len(stages) else 0
+            remaining = [workers]  # 尚未退出的工作线程数，最后一个退出时通知下游
+            for _ in range(workers):
+                thread = threading.Thread(target=self._run_stage, daemon=True,
+                                          args=(self.stages[name], func, inbox, outbox, remaining, downstream))
+                thread.start()
+                self._threads.append(thread)
 
-    for response in responses:
-        res_data = json.loads(response.data, object_hook=json_to_shred)
-        verify = res_data.verify_shred(get_verify_key())
-        print("验证每个shred的签名:",verify)
-        print(f"Received from Server: {response.success}:{res_data}:{verify}")
-        payload += base58.b58decode(res_data.payload)
-        if res_data.index + 1 == res_data.total:
-            break
+    def submit(self, raw):
+        """
+        提交一个原始分片。队列满时阻塞，把背压传给 gRPC 流控。
+        """
+        self._raw.put([raw])
 
-    return payload
+    def submit_many(self, raws):
+        """
+        提交一批原始分片（例如一条 ShredBatch 的全部分片），只占一个队列位置。
+        """
+        self._raw.put(list(raws))
+
+    def close(self):
+        """
+        不再提交新分片；已提交的分片处理完后各阶段线程退出。
+        """
+        for _ in range(self._deserialize_workers):
+            self._raw.put(None)
+
+    def join(self, timeout=None):
+        """
+        等待全部阶段线程退出。
+        """
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def _take(self, inbox):
+        """
+        阻塞取出一批，再取出队列中已有的批次，合计不超过 batch_size 个条目。遇到结束标记时返回 (条目, True)。
+        """
+        batch = inbox.get()
+        if batch is None:
+            return [], True
+        items = list(batch)
+        while len(items) < self.batch_size:
+            try:
+                batch = inbox.get_nowait()
+            except queue.Empty:
+                break
+            if batch is None:
+                return items, True
+            items.extend(batch)
+        return items, False
+
+    def _run_stage(self, stats, func, inbox, outbox, remaining, downstream):
+        try:
+            while True:
+                items, done = self._take(inbox)
+                if items:
+                    start = time.perf_counter()
+                    try:
+                        results = func(items)
+                    except Exception:
+                        self._reject(len(items))  # 丢弃出错的一批，工作线程继续处理后续批次
+                        results = None
+                    stats.record(len(items), time.perf_counter() - start)
+                    if outbox is not None and results:
+                        outbox.put(results)
+                if done:
+                    break
+        finally:
+            # 无论如何都把结束标记传给下游，否则 join 会一直等待
+            with self._lock:
+                remaining[0] -= 1
+                last = remaining[0] == 0
+            if last and outbox is not None:
+                for _ in range(downstream):
+                    outbox.put(None)
+
+    def _reject(self, count):
+        with self._lock:
+            self.rejected += count
+
+    def _deserialize(self, raws):
+        shreds = []
+        for raw in raws:
+            if self.dedup.seen(raw):
+                continue
+            try:
+                shreds.append(Shred.from_bytes(raw))
+            except ValueError:
+                self._reject(1)  # 截断或格式错误的分片
+        return shreds
+
+    def _verify(self, shreds):
+        verified = []
+        for shred in shreds:
+            if shred.verify_shred(self.verify_key, self.verified_roots):
+                verified.append(shred)
+        if len(verified) < len(shreds):
+            self._reject(len(shreds) - len(verified))
+        return verified
+
+    def _reassemble(self, shreds):
+        for shred in shreds:
+            completed = self.reassembly.add(shred)
+            if completed is not None and self.on_transaction is not None:
+                self.on_transaction(*completed)
+
+    def stats(self):
+        """
+        返回各阶段的吞吐量与队列深度。
+
+        返回:
+            dict: 阶段名 -> {"items", "per_second", "busy", "queued"}，
+            另含 "rejected"、"reassembly"、"dedup" 与 "signature_cache"。
+        """
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        queues = {"deserialize": self._raw, "verify": self._parsed, "reassemble": self._verified}
+        result = {
+            name: {
+                "items": stage.items,
+                "per_second": stage.items / elapsed,
+                "busy": stage.busy,
+                "queued": queues[name].qsize(),
+            }
+            for name, stage in self.stages.items()
+        }
+        result["rejected"] = self.rejected
+        result["reassembly"] = self.reassembly.metrics()
+        result["dedup"] = self.dedup.stats()
+        result["signature_cache"] = self.verified_roots.stats()
+        return result
+
+def process_responses_pipelined(stub, verify_workers=VERIFY_WORKERS, verbose=False, batched=False):
+    """
+    用 VerificationPipeline 处理来自 gRPC 服务器的响应：接收线程只负责收包，验证在工作线程中进行。
+
+    参数:
+        stub (sync_pb2_grpc.StreamServiceStub): gRPC 客户端存根。
+        verify_workers (int): 验证线程数。
+        verbose (bool): 是否打印流水线各阶段的计数。
+        batched (bool): 是否使用 BatchStream 接收合并后的分片。
+
+    返回:
+        bytes: 第一笔重组完成的交易数据。
+
+    抛出:
+        RuntimeError: 数据流结束时仍没有完成的交易。
+    """
+    responses = (stub.BatchStream if batched else stub.BiStream)(empty_request_iterator())
+    completed = []
+
+    def on_transaction(tx_id, payload):
+        if not completed:
+            completed.append(payload)
+            responses.cancel()  # 结束接收循环
+
+    pipeline = VerificationPipeline(get_verify_key(), verify_workers, on_transaction=on_transaction)
+    try:
+        for response in responses:
+            if batched:
+                pipeline.submit_many(response.shreds)
+            else:
+                pipeline.submit(response.shred)
+    except grpc.RpcError:
+        if not completed:
+            raise
+    finally:
+        responses.cancel()
+        pipeline.close()
+        pipeline.join()
+    if verbose:
+        for name, value in pipeline.stats().items():
+            print(f"{name}: {value}")
+    if not completed:
+        raise RuntimeError("stream ended before the transaction could be reassembled")
+    return completed[0]
+
+def _verify_batch(raws, verify_key, verified_roots):
+    """
+    解析并验证一批二进制分片，返回 (验证通过的分片, 无法解析而丢弃的分片数)。在执行器线程中运行。
+    """
+    shreds = []
+    malformed = 0
+    for raw in raws:
+        shred = parse_shred(raw)
+        if shred is None:
+            malformed += 1
+        elif shred.verify_shred(verify_key, verified_roots):
+            shreds.append(shred)
+    return shreds, malformed
+
+async def process_responses_aio(stub, executor=None, verbose=False, stats=None):
+    """
+    process_responses 的 grpc.aio 版本。
+
+    接收协程只负责收包并丢弃重复分片；分片的解析与签名验证成批交给 executor（默认为事件循环的默认执行器）。
+    没有批次在验证时立即提交已收到的分片，否则先累积到 VERIFY_BATCH 个再提交，
+    最多 VERIFY_WINDOW 个批次同时在验证。事件循环因此不会被密码学运算阻塞，
+    线程切换的开销也按批摊薄，同一事件循环可以同时处理大量流。
+
+    参数:
+        stub (sync_pb2_grpc.StreamServiceStub): 基于 grpc.aio 通道的存根。
+        executor (concurrent.futures.Executor): 执行验证的执行器。
+        verbose (bool): 是否打印每个分片的验证结果。
+        stats (dict | None): 不为 None 时累加接收计数（"malformed"：无法解析而丢弃的分片数）。
+
+    返回:
+        bytes: 累积的有效负载数据。
+
+    抛出:
+        RuntimeError: 数据流结束时仍有 FEC 集合无法恢复。
+    """
+    loop = asyncio.get_running_loop()
+    verify_key = get_verify_key()
+    call = stub.BiStream(empty_request_iterator())
+    reassembly = ReassemblyBuffer()
+    dedup = ShredDedup()
+    verified_roots = SignatureCache()
+    batch = []
+    pending = collections.deque()  # 按到达顺序排列的验证批次
+
+    def submit():
+        nonlocal batch
+        pending.append(loop.run_in_executor(executor, _verify_batch, batch, verify_key, verified_roots))
+        batch = []
+
+    async def drain(block):
+        # 取走已完成的批次；block 为 True 时等待最早的批次，返回第一笔完成的交易数据
+        while pending and (block or pending[0].done()):
+            shreds, malformed = await pending.popleft()
+            if malformed and stats is not None:
+                stats["malformed"] = stats.get("malformed", 0) + malformed
+            for shred in shreds:
+                if verbose:
+                    print(f"Received from Server: {shred}")
+                completed = reassembly.add(shred)
+                if completed is not None:
+                    return completed[1]
+            block = False
+        return None
+
+    try:
+        async for response in call:
+            if dedup.seen(response.shred):
+                continue
+            batch.append(response.shred)
+            payload = await drain(len(pending) >= VERIFY_WINDOW)
+            if payload is not None:
+                return payload
+            if not pending or len(batch) >= VERIFY_BATCH:
+                submit()
+        if batch:
+            submit()
+        while pending:
+            payload = await drain(True)
+            if payload is not None:
+                return payload
+    finally:
+        call.cancel()
+        for future in pending:
+            future.cancel()
+    raise RuntimeError("stream ended before the transaction could be reassembled")
 
 def verify_payload_signature(payload):
     """
@@ -96,13 +587,94 @@ def verify_payload_signature(payload):
     get_verify_key().verify(payload_verify, signature_bytes)
     print("signature verify success")
 
+def run_tree_node(node_id, tree, leader_address, store=None):
+    """
+    以 Turbine 树中的节点运行：从父节点（或领导者）接收分片，转发给子节点并重组交易。
+
+    验证第一笔重组完成的交易的签名后继续转发，直到父节点关闭流。
+
+    参数:
+        node_id (int): 本节点在 tree 中的编号。
+        tree (TurbineTree): 与领导者及其他节点相同参数构建的传播树。
+        leader_address (str): 领导者地址。
+        store (ShredStore | None): 持久化验证通过的分片。
+
+    抛出:
+        RuntimeError: 父节点在第一笔交易完成前关闭了流。
+    """
+    completed = queue.Queue()
+    node = ValidatorNode(node_id, tree, leader_address, store=store,
+                         on_transaction=lambda tx_id, payload: completed.put(payload))
+    print(f"node {node_id} at {node.address}, parent {node.parent_address}, "
+          f"children {[n.address for n in tree.children(node_id)]}")
+    node.start()
+    try:
+        while True:
+            try:
+                payload = completed.get(timeout=0.1)
+                break
+            except queue.Empty:
+                if node.wait(0):
+                    raise RuntimeError("parent closed the stream before a transaction was reassembled")
+        verify_payload_signature(payload)
+        node.wait()  # 继续为子节点转发
+    finally:
+        node.stop()
+        print("relay:", node.relay.stats(), "malformed:", node.malformed)
+
 def main():
     """
     执行 gRPC 客户端逻辑的主函数。
     """
-    stub = create_grpc_stub()
-    payload = process_responses(stub)
+    parser = argparse.ArgumentParser(description="Turbine validator")
+    parser.add_argument("--leader", default=LEADER_ADDRESS, help="领导者地址")
+    parser.add_argument("--aio", action="store_true", help="使用 grpc.aio 通道")
+    parser.add_argument("--pipeline", action="store_true", help="使用分级验证流水线")
+    parser.add_argument("--batch", action="store_true", help="通过 BatchStream 接收合并后的分片")
+    parser.add_argument("--repair", action="store_true", help="启用流控与重传请求")
+    parser.add_argument("--store", metavar="DIR", help="把验证通过的分片持久化到目录，启动时先重放")
+    parser.add_argument("--tree", action="store_true", help="作为 Turbine 树中的节点运行，并转发给子节点")
+    parser.add_argument("--node-id", type=int, default=0, help="树模式下本节点在 --peers 中的编号")
+    parser.add_argument("--peers", nargs="+", default=[], metavar="ADDRESS[=STAKE]",
+                        help="树模式下的验证节点地址与质押，须与领导者相同")
+    parser.add_argument("--fanout", type=int, default=DEFAULT_FANOUT, help="树模式下每个节点的扇出")
+    parser.add_argument("--seed", default=DEFAULT_SEED, help="树模式下的加权洗牌种子")
+    args = parser.parse_args()
+
+    store = ShredStore(args.store) if args.store else None
+    stats = {}  # 接收计数，例如无法解析而丢弃的分片数
+    try:
+        if args.tree:
+            if not args.peers:
+                parser.error("--tree requires --peers")
+            tree = TurbineTree(parse_peers(args.peers), args.seed.encode(), args.fanout)
+            run_tree_node(args.node_id, tree, args.leader, store)
+            return
+        if args.aio:
+            payload = asyncio.run(_main_aio(args.leader, stats=stats))
+        elif args.pipeline:
+            payload = process_responses_pipelined(create_grpc_stub(args.leader), verbose=True, batched=args.batch)
+        elif args.batch:
+            payload = process_batches(create_grpc_stub(args.leader), stats=stats)
+        elif args.repair:
+            payload = process_responses_repair(create_grpc_stub(args.leader), verbose=True, stats=stats)
+        else:
+            payload = process_responses(create_grpc_stub(args.leader), store=store, stats=stats)
+        if store is not None:
+            print("shred store:", store.stats())
+    finally:
+        if store is not None:
+            store.close()
+    if stats:
+        print("receive stats:", stats)
     verify_payload_signature(payload)
 
+async def _main_aio(address=LEADER_ADDRESS, stats=None):
+    """
+    用 grpc.aio 通道运行 process_responses_aio。
+    """
+    async with grpc.aio.insecure_channel(address) as channel:
+        return await process_responses_aio(sync_pb2_grpc.StreamServiceStub(channel), stats=stats)
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
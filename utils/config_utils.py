@@ -1,15 +1,40 @@
+import os
+import threading
 import yaml
-from typing import Dict,Any
+from typing import Dict,Any,Tuple
+
+_config_cache: Dict[str, Tuple[int, Dict[str, Any]]] = {}  # 绝对路径 -> (mtime_ns, 配置)
+_config_lock = threading.Lock()
 
 
 def load_config(config_path:str)->Dict[str,Any]:
     """
         从路径中读取yml数据
 
+        解析结果按文件的修改时间缓存，文件未变化时直接返回缓存的字典，
+        因此调用方不应修改返回值。
+
         Args:
             config_path(str): yml文件的路径
         Returns:
             Dict[str,Any]: 配置文件的字典数据
     """
-    with open(config_path,"r") as config_file:
-        return yaml.safe_load(config_file)
+    path = os.path.abspath(config_path)
+    mtime = os.stat(path).st_mtime_ns
+    with _config_lock:
+        cached = _config_cache.get(path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+    with open(path,"r") as config_file:
+        config = yaml.safe_load(config_file)
+    with _config_lock:
+        _config_cache[path] = (mtime, config)
+    return config
+
+
+def clear_config_cache()->None:
+    """
+        清空 load_config 的缓存，下次调用时重新读取文件。
+    """
+    with _config_lock:
+        _config_cache.clear()
@@ -0,0 +1,86 @@
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+import base58
+from nacl.signing import SigningKey, VerifyKey
+
+from utils.config_utils import load_config
+
+DEFAULT_CONFIG_PATH = "config.yml"  # 默认配置文件路径
+CHECK_INTERVAL = 1.0  # 两次检查配置文件修改时间的最小间隔（秒）
+
+
+class KeyProvider:
+    """
+        进程内共享的密钥提供者。
+
+        首次使用时从配置文件加载私钥并构建 SigningKey / VerifyKey，之后直接返回缓存的对象；
+        每隔 check_interval 秒检查一次配置文件的修改时间，只有文件变化时才重新加载。
+
+        Attributes:
+            config_path(str): 配置文件路径
+            check_interval(float): 检查修改时间的最小间隔（秒）
+    """
+
+    def __init__(self, config_path: str = DEFAULT_CONFIG_PATH, check_interval: float = CHECK_INTERVAL):
+        self.config_path = config_path
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._mtime: Optional[int] = None
+        self._checked_at = 0.0
+        self._signing_key: Optional[SigningKey] = None
+
+    def _refresh(self) -> SigningKey:
+        """
+            必要时重新加载密钥，返回当前的签名密钥。
+        """
+        now = time.monotonic()
+        signing_key = self._signing_key
+        if signing_key is not None and now - self._checked_at < self.check_interval:
+            return signing_key
+        with self._lock:
+            mtime = os.stat(self.config_path).st_mtime_ns
+            if self._signing_key is None or mtime != self._mtime:
+                private_key = load_config(self.config_path)["private_key"]  # 获取私钥
+                seed = base58.b58decode(private_key)[:32]  # 解码私钥并取前32字节作为种子
+                self._signing_key = SigningKey(seed)
+                self._mtime = mtime
+            self._checked_at = now
+            return self._signing_key
+
+    def signing_key(self) -> SigningKey:
+        """
+            Returns:
+                SigningKey: 缓存的签名密钥
+        """
+        return self._refresh()
+
+    def verify_key(self) -> VerifyKey:
+        """
+            Returns:
+                VerifyKey: 缓存的验证密钥
+        """
+        return self._refresh().verify_key
+
+
+_providers: Dict[str, KeyProvider] = {}
+_providers_lock = threading.Lock()
+
+
+def get_key_provider(config_path: str = DEFAULT_CONFIG_PATH) -> KeyProvider:
+    """
+        返回 config_path 对应的进程级 KeyProvider，同一路径只创建一次。
+
+        Args:
+            config_path(str): 配置文件路径
+        Returns:
+            KeyProvider: 密钥提供者
+    """
+    path = os.path.abspath(config_path)
+    with _providers_lock:
+        provider = _providers.get(path)
+        if provider is None:
+            provider = _providers[path] = KeyProvider(path)
+        return provider